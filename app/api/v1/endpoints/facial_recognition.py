@@ -1,15 +1,30 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 import structlog
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pydantic import BaseModel, Field
 
+from app.core.config import Settings
 from app.core.exceptions import APIException
+from app.core.metrics import TimedRoute
+from app.services.face_gallery import FaceGallery
+from app.services.face_pipeline import FacePipeline
 from app.services.facial_recognition_service import FacialRecognitionService
+from app.services.image_ingest import decode_image
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = structlog.get_logger()
+settings = Settings()
 facial_recognition_service = FacialRecognitionService()
+face_gallery = FaceGallery(
+    collection_name=settings.FACE_COLLECTION,
+    dimension=settings.FACE_EMBEDDING_DIM,
+    payload_m=settings.FACE_GALLERY_PAYLOAD_M,
+)
+face_pipeline = FacePipeline.from_settings(settings)
 
 
 class ImageContent(BaseModel):
@@ -118,6 +133,24 @@ class Summary(BaseModel):
     matchedCount: int
 
 
+class EnrollmentRequest(BaseModel):
+    """Gallery enrollment request model"""
+
+    personId: str
+    name: Optional[str] = None
+    embeddings: List[List[float]] = Field(
+        ..., min_items=1, description="One or more face embeddings of the person"
+    )
+    metadata: Dict[str, Any] = {}
+
+
+class GalleryMatchRequest(BaseModel):
+    """Gallery match request model"""
+
+    embeddings: List[List[float]]
+    threshold: float = 0.8
+
+
 class FacialRecognitionResponse(BaseModel):
     """Facial recognition processing response model"""
 
@@ -186,18 +219,57 @@ async def batch_detect_faces(
     Detect faces in multiple images in batch
     """
     try:
-        results = []
-        for request in requests:
-            result = await facial_recognition_service.detect_faces(
-                image_content=request.image.content,
-                image_format=request.image.format,
-                features=request.features.dict(),
-                max_results=request.maxResults,
+        loop = asyncio.get_running_loop()
+        images = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    None,
+                    decode_image,
+                    request.image.content,
+                    settings.FACE_DETECTION_MAX_SIDE,
+                )
+                for request in requests
             )
-            results.append(FacialRecognitionResponse(**result))
+        )
 
-        return results
+        async def match(database_id, embeddings, threshold):
+            return await face_gallery.match(
+                database_id=database_id,
+                embeddings=embeddings,
+                threshold=threshold,
+                candidates=settings.FACE_MATCH_CANDIDATES,
+            )
 
+        # Faces of all images are analyzed together in large model batches
+        faces_per_image = await face_pipeline.process(
+            list(images),
+            [request.features.dict() for request in requests],
+            [
+                request.maxResults if request.features.detectFaces else 0
+                for request in requests
+            ],
+            match,
+        )
+        processed_time = datetime.now(timezone.utc).isoformat()
+        return [
+            FacialRecognitionResponse(
+                status="completed",
+                requestId=str(uuid.uuid4()),
+                processedTime=processed_time,
+                faces=faces,
+                summary=Summary(
+                    faceCount=len(faces),
+                    matchedCount=sum(
+                        bool(face["matching"] and face["matching"]["matched"])
+                        for face in faces
+                    ),
+                ),
+            )
+            for faces in faces_per_image
+        ]
+
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error("Batch face detection failed", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -216,3 +288,68 @@ async def get_facial_recognition_status(request_id: str):
     except Exception as e:
         logger.error("Failed to get facial recognition status", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/galleries/{database_id}/identities", response_model=Dict[str, Any])
+async def enroll_identity(database_id: str, request: EnrollmentRequest):
+    """
+    Enroll an identity's reference faces in a gallery
+    """
+    try:
+        return await face_gallery.enroll(
+            database_id=database_id,
+            person_id=request.personId,
+            embeddings=request.embeddings,
+            name=request.name,
+            metadata=request.metadata,
+        )
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error("Face enrollment failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.delete("/galleries/{database_id}/identities/{person_id}")
+async def delete_identity(database_id: str, person_id: str):
+    """
+    Remove an identity from a gallery
+    """
+    try:
+        await face_gallery.delete_identity(database_id, person_id)
+        return {"databaseId": database_id, "personId": person_id, "deleted": True}
+    except Exception as e:
+        logger.error("Face identity deletion failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.delete("/galleries/{database_id}")
+async def delete_gallery(database_id: str):
+    """
+    Remove a whole gallery
+    """
+    try:
+        await face_gallery.delete_gallery(database_id)
+        return {"databaseId": database_id, "deleted": True}
+    except Exception as e:
+        logger.error("Face gallery deletion failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/galleries/{database_id}/match", response_model=List[MatchingResult])
+async def match_faces(database_id: str, request: GalleryMatchRequest):
+    """
+    Match face embeddings against a gallery with one batched k-NN query
+    """
+    try:
+        return await face_gallery.match(
+            database_id=database_id,
+            embeddings=request.embeddings,
+            threshold=request.threshold,
+            candidates=settings.FACE_MATCH_CANDIDATES,
+        )
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error("Face matching failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,15 +1,26 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+import redis
 import structlog
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pydantic import BaseModel, Field
 
+from app.core.cache import RedisCache
+from app.core.config import Settings
 from app.core.exceptions import APIException
+from app.core.metrics import TimedRoute
 from app.services.ocr_service import OCRService
+from app.services.ocr_tiling import PageProgress
+from app.services.semantic_search_service import get_semantic_search_service
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = structlog.get_logger()
+settings = Settings()
 ocr_service = OCRService()
+semantic_search_service = get_semantic_search_service()
+page_progress = PageProgress(
+    RedisCache(redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT))
+)
 
 
 class ImageContent(BaseModel):
@@ -103,6 +114,16 @@ class OCRStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
+class OCRPagesResponse(BaseModel):
+    """Per-page OCR results of a multi-page request"""
+
+    requestId: str
+    status: str
+    progress: float
+    pageCount: int
+    pages: Dict[str, List[TextAnnotation]]
+
+
 @router.post("/process", response_model=OCRResponse)
 async def process_ocr(background_tasks: BackgroundTasks, request: OCRRequest):
     """
@@ -116,6 +137,8 @@ async def process_ocr(background_tasks: BackgroundTasks, request: OCRRequest):
             features=request.features.dict(),
             options=request.options.dict(),
         )
+        # Make the recognized text searchable once the response is sent
+        background_tasks.add_task(semantic_search_service.indexer.submit_ocr, [result])
 
         return OCRResponse(**result)
 
@@ -143,6 +166,10 @@ async def batch_process_ocr(
                 options=request.options.dict(),
             )
             results.append(OCRResponse(**result))
+        background_tasks.add_task(
+            semantic_search_service.indexer.submit_ocr,
+            [result.dict() for result in results],
+        )
 
         return results
 
@@ -166,6 +193,17 @@ async def get_ocr_status(request_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/status/{request_id}/pages", response_model=OCRPagesResponse)
+async def get_ocr_pages(request_id: str):
+    """
+    Get the pages of a multi-page OCR job finished so far
+    """
+    state = await page_progress.get(request_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="OCR request not found")
+    return OCRPagesResponse(requestId=request_id, **state)
+
+
 @router.post("/extract")
 async def extract_text(request: dict):
     """Extract text from an image."""
@@ -1,15 +1,31 @@
 from typing import Any, Dict, List, Optional
 
 import structlog
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from app.core.exceptions import APIException
-from app.services.semantic_search_service import SemanticSearchService
+from app.core.metrics import TimedRoute
+from app.services.reindex_service import ReindexException
+from app.services.semantic_search_service import get_semantic_search_service
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = structlog.get_logger()
-semantic_search_service = SemanticSearchService()
+semantic_search_service = get_semantic_search_service()
+
+
+class SearchParams(BaseModel):
+    """Approximate search accuracy/latency controls"""
+
+    hnsw_ef: Optional[int] = Field(None, description="HNSW candidate list size")
+    exact: Optional[bool] = Field(None, description="Exhaustive search, no HNSW")
+    rescore: Optional[bool] = Field(
+        None, description="Rescore quantized candidates with original vectors"
+    )
+    oversampling: Optional[float] = Field(
+        None, description="Candidates fetched per result before rescoring"
+    )
 
 
 class SearchQuery(BaseModel):
@@ -19,6 +35,21 @@ class SearchQuery(BaseModel):
     filters: Optional[Dict[str, Any]] = None
     top_k: Optional[int] = 10
     score_threshold: Optional[float] = 0.7
+    chunk_aggregation: str = Field(
+        "max", description="How chunk scores combine per document: max or sum"
+    )
+    mode: str = Field("vector", description="Search mode: vector, lexical or hybrid")
+    lexical_prefilter: bool = Field(
+        False, description="Restrict vector search to documents matching a query term"
+    )
+    profile: Optional[str] = Field(
+        None, description="Named search profile, e.g. fast, balanced or exact"
+    )
+    search_params: Optional[SearchParams] = None
+    offset: int = Field(0, ge=0, description="Number of results to skip")
+    cursor: Optional[str] = Field(
+        None, description="next_cursor from a previous page; overrides offset"
+    )
 
 
 class SearchResult(BaseModel):
@@ -28,6 +59,7 @@ class SearchResult(BaseModel):
     score: float
     content: Dict[str, Any]
     metadata: Dict[str, Any]
+    collection: Optional[str] = None
 
 
 class SearchResponse(BaseModel):
@@ -36,6 +68,48 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total_results: int
     processing_time: float
+    next_cursor: Optional[str] = None
+    # Federated search: collections left out because Qdrant could not serve them
+    skipped_collections: Optional[List[str]] = None
+
+
+class FederatedSearchQuery(BaseModel):
+    """Cross-collection search query model"""
+
+    query: str
+    collections: List[str] = ["text", "image", "audio", "video"]
+    weights: Optional[Dict[str, float]] = Field(
+        None, description="Per-collection score weights, default 1.0"
+    )
+    normalization: str = Field(
+        "minmax", description="Per-collection score scaling: minmax, zscore or none"
+    )
+    filters: Optional[Dict[str, Any]] = None
+    top_k: Optional[int] = 10
+    score_threshold: Optional[float] = 0.7
+
+
+class ExportRequest(BaseModel):
+    """Collection export request model"""
+
+    filters: Optional[Dict[str, Any]] = None
+    batch_size: int = Field(256, gt=0, le=10000)
+    with_vectors: bool = False
+
+
+class ReindexRequest(BaseModel):
+    """Collection reindex request model"""
+
+    collection: str
+    vector_size: Optional[int] = None
+    distance: Optional[str] = None
+    hnsw_config: Optional[Dict[str, Any]] = None
+    reembed: bool = Field(
+        False,
+        description="Re-encode text instead of copying stored vectors; media "
+        "collections must be re-ingested into a new version instead",
+    )
+    drop_previous: bool = False
 
 
 class BatchSearchRequest(BaseModel):
@@ -69,16 +143,26 @@ async def semantic_search(
             top_k=query.top_k,
             score_threshold=query.score_threshold,
             collection=collection,
+            chunk_aggregation=query.chunk_aggregation,
+            mode=query.mode,
+            lexical_prefilter=query.lexical_prefilter,
+            profile=query.profile,
+            search_params=(
+                query.search_params.dict() if query.search_params else None
+            ),
+            offset=query.offset,
+            cursor=query.cursor,
         )
 
         return SearchResponse(
             results=result["results"],
             total_results=result["total_results"],
             processing_time=result["processing_time"],
+            next_cursor=result["next_cursor"],
         )
 
     except APIException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error("Semantic search failed", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -103,6 +187,15 @@ async def batch_semantic_search(
                 top_k=query.top_k,
                 score_threshold=query.score_threshold,
                 collection=collection,
+                chunk_aggregation=query.chunk_aggregation,
+                mode=query.mode,
+                lexical_prefilter=query.lexical_prefilter,
+                profile=query.profile,
+                search_params=(
+                    query.search_params.dict() if query.search_params else None
+                ),
+                offset=query.offset,
+                cursor=query.cursor,
             )
             results.append(SearchResponse(**result))
             total_time += result["processing_time"]
@@ -113,11 +206,112 @@ async def batch_semantic_search(
             total_processing_time=total_time,
         )
 
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error("Batch semantic search failed", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/federated-search", response_model=SearchResponse)
+async def federated_search(query: FederatedSearchQuery):
+    """
+    Search several collections at once and merge the results into one ranking
+    """
+    try:
+        result = await semantic_search_service.federated_search(
+            query=query.query,
+            collections=query.collections,
+            weights=query.weights,
+            normalization=query.normalization,
+            filters=query.filters,
+            top_k=query.top_k,
+            score_threshold=query.score_threshold,
+        )
+        return SearchResponse(**result)
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error("Federated search failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/export")
+async def export_collection(
+    request: ExportRequest,
+    collection: Optional[str] = Query(None, description="Collection to export"),
+):
+    """
+    Stream every document matching the filters as newline-delimited JSON
+    """
+    return StreamingResponse(
+        semantic_search_service.export(
+            collection=collection,
+            filters=request.filters,
+            batch_size=request.batch_size,
+            with_vectors=request.with_vectors,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/reindex", response_model=Dict[str, Any])
+async def reindex_collection(
+    request: ReindexRequest, background_tasks: BackgroundTasks
+):
+    """
+    Rebuild a collection into a new version and switch its alias once verified
+    """
+    reindexer = semantic_search_service.reindexer
+    try:
+        job_id = reindexer.start(
+            request.collection, **request.dict(exclude={"collection"})
+        )
+    except ReindexException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    background_tasks.add_task(reindexer.run_job, job_id)
+    return reindexer.jobs[job_id]
+
+
+@router.get("/reindex/{job_id}", response_model=Dict[str, Any])
+async def get_reindex_job(job_id: str):
+    """
+    Get the status of a reindex job
+    """
+    job = semantic_search_service.reindexer.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Reindex job not found")
+    return job
+
+
+@router.post("/snapshots/{collection}", response_model=Dict[str, Any])
+async def snapshot_collection(collection: str):
+    """
+    Snapshot a collection to the configured local or S3 location
+    """
+    try:
+        location = await semantic_search_service.reindexer.snapshot(collection)
+        return {"collection": collection, "location": location}
+    except Exception as e:
+        logger.error("Snapshot failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/snapshots/{collection}/restore", response_model=Dict[str, Any])
+async def restore_collection(collection: str, location: str = Query(...)):
+    """
+    Restore a snapshot URL or path into a new version of a collection
+    """
+    try:
+        target = await semantic_search_service.reindexer.restore(collection, location)
+        return {"collection": collection, "location": location, "target": target}
+    except ReindexException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error("Snapshot restore failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.post("/index", response_model=Dict[str, Any])
 async def index_document(
     document: Dict[str, Any],
@@ -132,7 +326,7 @@ async def index_document(
         )
         return result
     except APIException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error("Document indexing failed", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -147,13 +341,11 @@ async def batch_index_documents(
     Index multiple documents in batch
     """
     try:
-        results = []
-        for document in documents:
-            result = await semantic_search_service.index_document(
-                document=document, collection=collection
-            )
-            results.append(result)
-        return results
+        return await semantic_search_service.index_documents(
+            documents=documents, collection=collection
+        )
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error("Batch document indexing failed", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
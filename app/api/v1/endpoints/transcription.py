@@ -1,15 +1,37 @@
+import asyncio
+import functools
 from typing import List, Optional
 
+import redis
 import structlog
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from pydantic import BaseModel, Field
 
+from app.core.cache import RedisCache
+from app.core.config import Settings
 from app.core.exceptions import APIException
+from app.core.metrics import TimedRoute
+from app.services.audio_streaming import PartialTranscripts
+from app.services.live_transcription import LiveTranscriptionSession, PcmDecoder
+from app.services.semantic_search_service import get_semantic_search_service
 from app.services.transcription_service import TranscriptionService
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = structlog.get_logger()
+settings = Settings()
 transcription_service = TranscriptionService()
+semantic_search_service = get_semantic_search_service()
+partial_transcripts = PartialTranscripts(
+    RedisCache(redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT))
+)
+# Live WebSocket streams currently open in this worker
+active_streams = 0
 
 
 class AudioContent(BaseModel):
@@ -81,6 +103,17 @@ class TranscriptionResponse(BaseModel):
     metadata: Metadata
 
 
+class PartialTranscriptionResponse(BaseModel):
+    """Transcript of a running request, so far"""
+
+    status: str
+    duration: str
+    transcript: str
+    confidence: float
+    segments: List[Segment]
+    words: List[Word]
+
+
 @router.post("/process", response_model=TranscriptionResponse)
 async def process_transcription(
     background_tasks: BackgroundTasks, request: TranscriptionRequest
@@ -95,6 +128,10 @@ async def process_transcription(
             audio_format=request.audio.format,
             config=request.config.dict(),
         )
+        # Make the transcript searchable once the response is sent
+        background_tasks.add_task(
+            semantic_search_service.indexer.submit_transcriptions, [result]
+        )
 
         return TranscriptionResponse(**result)
 
@@ -121,6 +158,10 @@ async def batch_process_transcription(
                 config=request.config.dict(),
             )
             results.append(TranscriptionResponse(**result))
+        background_tasks.add_task(
+            semantic_search_service.indexer.submit_transcriptions,
+            [result.dict() for result in results],
+        )
 
         return results
 
@@ -144,6 +185,121 @@ async def get_transcription_status(request_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get(
+    "/status/{request_id}/partial", response_model=PartialTranscriptionResponse
+)
+async def get_partial_transcription(request_id: str):
+    """
+    Get the segments transcribed so far for a streaming transcription job
+    """
+    partial = await partial_transcripts.get(request_id)
+    if partial is None:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+    return PartialTranscriptionResponse(**partial)
+
+
+async def _send_events(websocket: WebSocket, queue: asyncio.Queue):
+    """Forward queued segment events to the client until a None sentinel"""
+    while True:
+        event = await queue.get()
+        if event is None:
+            return
+        await websocket.send_json(event)
+
+
+async def _enqueue(queue: asyncio.Queue, event, sender: asyncio.Future):
+    """Wait for queue space, giving up if the sender has stopped"""
+    put = asyncio.ensure_future(queue.put(event))
+    await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+    if not put.done():
+        put.cancel()
+        raise WebSocketDisconnect()
+
+
+async def _close(websocket: WebSocket, code: int, reason: str):
+    """Close a stream with an error code, unless the client already left"""
+    try:
+        await websocket.close(code=code, reason=reason)
+    except RuntimeError:
+        pass
+
+
+@router.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    sampleRateHertz: int = 16000,
+    encoding: str = "pcm_s16le",
+    audioChannels: int = 1,
+    language: str = "en-US",
+):
+    """
+    Transcribe live audio sent as binary PCM frames
+
+    Interim and final segments are sent back as JSON events. Send the text
+    message "end" to flush the last utterance and close the stream.
+    """
+    global active_streams
+    await websocket.accept()
+    try:
+        if sampleRateHertz <= 0:
+            raise ValueError("sampleRateHertz must be positive")
+        decoder = PcmDecoder(encoding, audioChannels)
+    except ValueError as e:
+        # 1003: unsupported data
+        await websocket.close(code=1003, reason=str(e))
+        return
+    if active_streams >= settings.TRANSCRIPTION_MAX_STREAMS:
+        # 1013: try again later
+        await websocket.close(code=1013, reason="Too many concurrent streams")
+        return
+
+    active_streams += 1
+    session = LiveTranscriptionSession(
+        transcribe=functools.partial(
+            transcription_service.transcribe_samples, language=language
+        ),
+        sample_rate=sampleRateHertz,
+        interim_seconds=settings.TRANSCRIPTION_INTERIM_SECONDS,
+        silence_seconds=settings.TRANSCRIPTION_SILENCE_SECONDS,
+    )
+    # Final segments wait for queue space, which stops reading from a client
+    # that does not keep up; interim segments are dropped instead
+    queue: asyncio.Queue = asyncio.Queue(settings.TRANSCRIPTION_STREAM_QUEUE_SIZE)
+    sender = asyncio.ensure_future(_send_events(websocket, queue))
+    try:
+        while not sender.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                events = await session.feed(decoder.decode(message["bytes"]))
+            elif message.get("text") == "end":
+                for event in await session.close():
+                    await _enqueue(queue, event, sender)
+                break
+            else:
+                raise ValueError('Expected binary PCM frames or the text "end"')
+            interim = session.interim()
+            if interim is not None and not queue.full():
+                queue.put_nowait(interim)
+            for event in events:
+                await _enqueue(queue, event, sender)
+        await _enqueue(queue, None, sender)
+        await sender
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except ValueError as e:
+        await _close(websocket, 1003, str(e))
+    except Exception as e:
+        logger.error("Live transcription failed", error=str(e))
+        # 1011: the server hit an unexpected condition
+        await _close(websocket, 1011, "Internal server error")
+    finally:
+        sender.cancel()
+        active_streams -= 1
+
+
 @router.post("/process")
 async def process_audio(request: dict):
     """Process audio and return transcription."""
@@ -1,24 +1,33 @@
 import json
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 import redis
 
+from app.core.metrics import CACHE_LOOKUPS, StageTimer
+
+_hit = CACHE_LOOKUPS.labels("hit").inc
+_miss = CACHE_LOOKUPS.labels("miss").inc
+
 
 class RedisCache:
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
 
+    @StageTimer("cache", "get")
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
             value = self.redis.get(key)
             if value is None:
+                _miss()
                 return None
+            _hit()
             return json.loads(value)
         except Exception as e:
             print(f"Error getting from cache: {e}")
             return None
 
+    @StageTimer("cache", "set")
     async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         """Set value in cache with expiration time in seconds"""
         try:
@@ -28,6 +37,47 @@ class RedisCache:
             print(f"Error setting cache: {e}")
             return False
 
+    @StageTimer("cache", "incr")
+    async def incr(self, key: str) -> Optional[int]:
+        """Atomically increment a counter, starting it at 1"""
+        try:
+            return int(self.redis.incr(key))
+        except Exception as e:
+            print(f"Error incrementing cache counter: {e}")
+            return None
+
+    @StageTimer("cache", "hset")
+    async def hset(self, key: str, field: str, value: Any, expire: int = 3600) -> bool:
+        """Set one field of a hash, refreshing the hash's expiration"""
+        try:
+            pipeline = self.redis.pipeline()
+            pipeline.hset(key, field, json.dumps(value))
+            pipeline.expire(key, expire)
+            pipeline.execute()
+            return True
+        except Exception as e:
+            print(f"Error setting cache hash field: {e}")
+            return False
+
+    @StageTimer("cache", "hgetall")
+    async def hgetall(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get every field of a hash, or None if it does not exist"""
+        try:
+            fields = self.redis.hgetall(key)
+            if not fields:
+                _miss()
+                return None
+            _hit()
+            decoded = {}
+            for field, value in fields.items():
+                field = field.decode() if isinstance(field, bytes) else field
+                decoded[field] = json.loads(value)
+            return decoded
+        except Exception as e:
+            print(f"Error getting cache hash: {e}")
+            return None
+
+    @StageTimer("cache", "delete")
     async def delete(self, key: str) -> bool:
         """Delete value from cache"""
         try:
@@ -36,6 +86,7 @@ class RedisCache:
             print(f"Error deleting from cache: {e}")
             return False
 
+    @StageTimer("cache", "exists")
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
         try:
@@ -1,3 +1,5 @@
+from typing import Any, Dict, List, Optional
+
 from pydantic import BaseSettings
 
 
@@ -33,6 +35,148 @@ class Settings(BaseSettings):
     # Qdrant Configuration
     QDRANT_CLUSTER: str
     QDRANT_PORT: int = 6333
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = True
+    # Per-call deadline in seconds
+    QDRANT_TIMEOUT: float = 5.0
+    QDRANT_MAX_CONNECTIONS: int = 100
+    QDRANT_RETRIES: int = 3
+    QDRANT_RETRY_BACKOFF: float = 0.1
+    # Consecutive failures that open the circuit, and seconds before a probe
+    QDRANT_BREAKER_THRESHOLD: int = 5
+    QDRANT_BREAKER_RESET_TIMEOUT: float = 30.0
+    # Per-call deadline of reindex copies and exact counts, which read whole
+    # pages or collections
+    QDRANT_BULK_TIMEOUT: float = 120.0
+    # Deadline of snapshot creation and recovery, which are never retried: a
+    # retry would start a second one while the first still runs on the server
+    QDRANT_ADMIN_TIMEOUT: float = 3600.0
+    # Bulk writes: max points and approximate bytes per request, and how many
+    # requests run at once
+    QDRANT_UPSERT_BATCH_SIZE: int = 512
+    QDRANT_MAX_BATCH_BYTES: int = 8 * 1024 * 1024
+    QDRANT_WRITE_CONCURRENCY: int = 4
+
+    # Uploaded images are never decoded beyond IMAGE_MAX_SIDE pixels; face
+    # detection and OCR decode straight to their own working resolution
+    IMAGE_MAX_SIDE: int = 8192
+    FACE_DETECTION_MAX_SIDE: int = 640
+    OCR_MAX_SIDE: int = 4096
+
+    # Large pages are OCR'd as overlapping tiles in a process pool
+    OCR_TILE_SIZE: int = 2048
+    OCR_TILE_OVERLAP: int = 128
+    OCR_MAX_WORKERS: Optional[int] = None
+    # Seconds a page's word boxes and tables stay cached by image content
+    OCR_LAYOUT_CACHE_TTL: int = 86400
+
+    # Long audio is transcribed as overlapping chunks, several at a time
+    TRANSCRIPTION_CHUNK_SECONDS: float = 30.0
+    TRANSCRIPTION_CHUNK_OVERLAP: float = 2.0
+    TRANSCRIPTION_MAX_CONCURRENCY: int = 4
+    # Live streams: cap per worker, events buffered per client before interim
+    # results are dropped, and the VAD pause that ends an utterance
+    TRANSCRIPTION_MAX_STREAMS: int = 200
+    TRANSCRIPTION_STREAM_QUEUE_SIZE: int = 32
+    TRANSCRIPTION_INTERIM_SECONDS: float = 1.0
+    TRANSCRIPTION_SILENCE_SECONDS: float = 0.6
+    # Uploaded audio is decoded once to mono float32 at this rate and kept in
+    # an in-process cache of at most AUDIO_PCM_CACHE_BYTES, keyed by content
+    AUDIO_TARGET_SAMPLE_RATE: int = 16000
+    AUDIO_PCM_CACHE_BYTES: int = 512 * 1024 * 1024
+    # Diarization: embedding window and hop, windows embedded per batch,
+    # windows clustered per block, the cosine similarity at which clusters
+    # merge, and the speaker cap when a request sets no maxSpeakers
+    DIARIZATION_WINDOW_SECONDS: float = 1.5
+    DIARIZATION_HOP_SECONDS: float = 0.75
+    DIARIZATION_BATCH_SIZE: int = 64
+    DIARIZATION_BLOCK_SIZE: int = 500
+    DIARIZATION_THRESHOLD: float = 0.5
+    DIARIZATION_MAX_SPEAKERS: int = 10
+
+    # Video: frames per second checked for scene changes, the histogram
+    # distance that starts a new shot, max seconds between keyframes within a
+    # shot, embedder input size and batch, and keyframes buffered ahead
+    VIDEO_SAMPLE_FPS: float = 2.0
+    VIDEO_SCENE_THRESHOLD: float = 0.35
+    VIDEO_MAX_KEYFRAME_GAP: float = 10.0
+    VIDEO_FRAME_SIZE: int = 224
+    VIDEO_EMBED_BATCH_SIZE: int = 32
+    VIDEO_QUEUE_SIZE: int = 64
+
+    # Face galleries: collection, embedding size, per-gallery HNSW degree and
+    # how many nearest faces are fetched per detected face
+    FACE_COLLECTION: str = "faces"
+    FACE_EMBEDDING_DIM: int = 512
+    FACE_GALLERY_PAYLOAD_M: int = 16
+    FACE_MATCH_CANDIDATES: int = 5
+    # Batch face analysis: ONNX face embedding network (ArcFace-style, 112 px
+    # crops) used for matching, unset to skip matching, and faces per model call
+    FACE_EMBEDDING_MODEL_PATH: Optional[str] = None
+    FACE_BATCH_SIZE: int = 64
+
+    # Reindexing: points per copy request, copy rate cap (0 = unlimited), and
+    # the sampled recall@k a new collection must reach before the alias switch
+    REINDEX_BATCH_SIZE: int = 256
+    REINDEX_MAX_POINTS_PER_SECOND: int = 2000
+    REINDEX_RECALL_SAMPLE_SIZE: int = 50
+    REINDEX_RECALL_K: int = 10
+    REINDEX_MIN_RECALL: float = 0.95
+    # Writes made during a reindex are logged in Redis and replayed. Workers
+    # re-read the reindex state every REINDEX_POLL_SECONDS and hold writes for
+    # up to REINDEX_WRITE_PAUSE_SECONDS while the alias is switched; a reindex
+    # that stops refreshing its lock loses it after REINDEX_LOCK_TTL seconds
+    REINDEX_POLL_SECONDS: float = 1.0
+    REINDEX_WRITE_PAUSE_SECONDS: float = 30.0
+    REINDEX_LOCK_TTL: int = 600
+    # Snapshots are downloaded to SNAPSHOT_DIR, then uploaded to S3 (or any
+    # S3-compatible endpoint) when a bucket is configured
+    SNAPSHOT_DIR: str = "snapshots"
+    SNAPSHOT_S3_BUCKET: Optional[str] = None
+    SNAPSHOT_S3_PREFIX: str = "qdrant/"
+    SNAPSHOT_S3_ENDPOINT_URL: Optional[str] = None
+
+    # Payload indexes per collection, as field -> keyword|integer|datetime|text.
+    # They are created or rebuilt at startup to match this definition. Indexes
+    # are only dropped when listed in RETIRED_PAYLOAD_INDEXES, so indexes made
+    # by other services or by hand survive.
+    PAYLOAD_INDEXES: Dict[str, Dict[str, str]] = {
+        "text": {
+            "parent_id": "keyword",
+            "chunk_index": "integer",
+            "metadata.category": "keyword",
+            "metadata.created_at": "datetime",
+            "data.content": "text",
+            "indexed_at": "float",
+        },
+        "image": {"metadata.category": "keyword", "metadata.created_at": "datetime"},
+        "audio": {"metadata.category": "keyword", "metadata.created_at": "datetime"},
+        "video": {
+            "parent_id": "keyword",
+            "metadata.category": "keyword",
+            "metadata.created_at": "datetime",
+        },
+    }
+    RETIRED_PAYLOAD_INDEXES: Dict[str, List[str]] = {}
+    # Filters matching at most this many points are searched exactly
+    QUERY_PLANNER_EXACT_THRESHOLD: int = 10000
+
+    # Named accuracy/latency profiles for approximate search. Per-collection
+    # entries in COLLECTION_SEARCH_PROFILES override these field by field.
+    SEARCH_PROFILES: Dict[str, Dict[str, Any]] = {
+        "fast": {"hnsw_ef": 32, "rescore": False, "oversampling": 1.0},
+        "balanced": {"hnsw_ef": 128, "rescore": True, "oversampling": 2.0},
+        "exact": {"exact": True},
+    }
+    COLLECTION_SEARCH_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    # Pagination Settings
+    # Pages of candidates ranked and cached ahead of the requested page
+    SEARCH_PREFETCH_PAGES: int = 5
+    # Deepest result that can be paged to
+    SEARCH_MAX_CANDIDATES: int = 1000
+    # Seconds a cached candidate list (and its cursors) stays valid
+    SEARCH_CANDIDATE_TTL: int = 300
 
     # Security Settings
     SECRET_KEY: str = "your-secret-key"
@@ -41,6 +185,39 @@ class Settings(BaseSettings):
     # Model Settings
     MODEL_PATH: str = "models"
     BATCH_SIZE: int = 32
+    TEXT_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
+    IMAGE_MODEL_NAME: str = "openai/clip-vit-base-patch32"
+    AUDIO_MODEL_NAME: str = "laion/clap-htsat-unfused"
+    # One of: eager, torchscript, quantized, onnx
+    TEXT_ENCODER_BACKEND: str = "eager"
+    # Max padded tokens (batch size x longest sequence) per embedding batch
+    EMBEDDING_TOKEN_BUDGET: int = 8192
+
+    # Finished OCR and transcription results are indexed into
+    # INDEXING_COLLECTION in the background, in batches of up to
+    # INDEXING_BATCH_SIZE documents collected over INDEXING_DEBOUNCE_SECONDS
+    INDEXING_COLLECTION: str = "text"
+    INDEXING_BATCH_SIZE: int = 64
+    INDEXING_DEBOUNCE_SECONDS: float = 2.0
+    INDEXING_QUEUE_SIZE: int = 10000
+
+    # Chunking Settings
+    CHUNK_WINDOW_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 32
+    CHUNK_SENTENCE_AWARE: bool = True
+    # Chunk hits fetched per requested document before collapsing by parent
+    CHUNK_SEARCH_OVERSAMPLING: int = 4
+
+    # Hybrid Search Settings
+    HYBRID_RRF_K: int = 60
+    # Lexical prefiltering only applies when a query matches at most this many
+    LEXICAL_PREFILTER_MAX_CANDIDATES: int = 1000
+    # Collections with a BM25 index. Each worker builds it from Qdrant at
+    # startup and polls for new chunks every LEXICAL_REFRESH_SECONDS; past
+    # LEXICAL_MAX_DOCUMENTS documents lexical search is disabled.
+    LEXICAL_COLLECTIONS: List[str] = ["text"]
+    LEXICAL_MAX_DOCUMENTS: int = 200000
+    LEXICAL_REFRESH_SECONDS: float = 30.0
 
     class Config:
         case_sensitive = True
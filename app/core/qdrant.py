@@ -0,0 +1,233 @@
+"""
+Shared, resilient async Qdrant client.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# gRPC status codes worth retrying
+_TRANSIENT_GRPC_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED"}
+
+
+class CircuitOpenError(Exception):
+    """Raised when calls are short-circuited because Qdrant keeps failing."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive transient failures the circuit
+    opens and calls fail fast for ``reset_timeout`` seconds. The first call
+    after that is let through as a probe, and others keep failing fast until
+    it finishes: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """closed, open or half-open"""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Fail fast while the circuit is open or a probe is in flight."""
+        state = self.state
+        if state == "open" or (state == "half-open" and self._probing):
+            raise CircuitOpenError("Qdrant circuit breaker is open")
+        if state == "half-open":
+            self._probing = True
+
+    def record_success(self):
+        """Close the circuit."""
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        """Count a failure and open the circuit once the threshold is hit."""
+        self._failures += 1
+        if self.state == "half-open" or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon(self):
+        """Let another call probe when this one ended without an outcome."""
+        self._probing = False
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed call may succeed if retried."""
+    if isinstance(
+        error,
+        (asyncio.TimeoutError, ConnectionError, httpx.TransportError),
+    ):
+        return True
+    if isinstance(error, ResponseHandlingException):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 429 or error.status_code >= 500
+    code = getattr(error, "code", None)
+    if callable(code):
+        # grpc.aio.AioRpcError
+        return getattr(code(), "name", None) in _TRANSIENT_GRPC_CODES
+    return False
+
+
+class ResilientQdrantClient:
+    """AsyncQdrantClient proxy adding deadlines, retries and a circuit breaker.
+
+    Every coroutine method of the wrapped client is available under the same
+    name. Each attempt is bounded by ``timeout`` seconds; transient failures
+    are retried up to ``retries`` times with full-jitter exponential backoff.
+    Calls that need another deadline go through ``with_timeout``.
+    """
+
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        timeout: float = 5.0,
+        retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        connect: Optional[Callable[[float], AsyncQdrantClient]] = None,
+    ):
+        self.client = client
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        # Builds a client whose own transport timeout allows longer calls
+        self.connect = connect
+        self._variants: Dict[Tuple[float, int], "ResilientQdrantClient"] = {}
+
+    def with_timeout(
+        self, timeout: float, retries: Optional[int] = None
+    ) -> "ResilientQdrantClient":
+        """This client with another deadline and retry count
+
+        For bulk and admin calls (exact counts, reindex copies, snapshots)
+        that outlast the default deadline. The circuit breaker is shared.
+        A longer deadline gets its own connection from ``connect``, because
+        the wrapped client enforces its timeout as well.
+        """
+        retries = self.retries if retries is None else retries
+        key = (timeout, retries)
+        if key not in self._variants:
+            client = self.client
+            if self.connect is not None and timeout > self.timeout:
+                client = self.connect(timeout)
+            self._variants[key] = ResilientQdrantClient(
+                client,
+                timeout=timeout,
+                retries=retries,
+                backoff=self.backoff,
+                max_backoff=self.max_backoff,
+                breaker=self.breaker,
+            )
+        return self._variants[key]
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.client, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._call(attribute, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    async def _call(self, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run one client call under the deadline, retry and breaker policy."""
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await asyncio.wait_for(
+                    method(*args, **kwargs), timeout=self.timeout
+                )
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    # Qdrant answered, so it is up
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retries:
+                    raise
+                delay = random.uniform(
+                    0, min(self.max_backoff, self.backoff * 2**attempt)
+                )
+                attempt += 1
+                logger.warning(
+                    f"Qdrant call {method.__name__} failed ({str(e) or type(e)}), "
+                    f"retry {attempt}/{self.retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+
+_client: Optional[ResilientQdrantClient] = None
+
+
+def get_qdrant_client(settings: Optional[Settings] = None) -> ResilientQdrantClient:
+    """Return the process-wide Qdrant client, creating it on first use.
+
+    One pooled client is shared by every module so connections (HTTP
+    keep-alive or a single gRPC channel) are reused across requests.
+    """
+    global _client
+    if _client is None:
+        settings = settings or Settings()
+
+        def connect(timeout: float) -> AsyncQdrantClient:
+            return AsyncQdrantClient(
+                host=settings.QDRANT_CLUSTER,
+                port=settings.QDRANT_PORT,
+                grpc_port=settings.QDRANT_GRPC_PORT,
+                prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                timeout=int(timeout) or 1,
+                limits=httpx.Limits(
+                    max_connections=settings.QDRANT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.QDRANT_MAX_CONNECTIONS,
+                ),
+                grpc_options={"grpc.keepalive_time_ms": 30000},
+            )
+
+        _client = ResilientQdrantClient(
+            connect(settings.QDRANT_TIMEOUT),
+            timeout=settings.QDRANT_TIMEOUT,
+            retries=settings.QDRANT_RETRIES,
+            backoff=settings.QDRANT_RETRY_BACKOFF,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.QDRANT_BREAKER_THRESHOLD,
+                reset_timeout=settings.QDRANT_BREAKER_RESET_TIMEOUT,
+            ),
+            connect=connect,
+        )
+    return _client
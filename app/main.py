@@ -1,10 +1,12 @@
 """
 Main FastAPI application.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.endpoints import facial_recognition, ocr, semantic_search, transcription
+from app.core.metrics import render
+from app.services.semantic_search_service import get_semantic_search_service
 
 app = FastAPI(
     title="Air Applied AI Challenge",
@@ -28,6 +30,23 @@ app.include_router(facial_recognition.router, prefix="/api/v1/facial-recognition
 app.include_router(semantic_search.router, prefix="/api/v1/semantic-search", tags=["Semantic Search"])
 
 
+@app.on_event("startup")
+async def startup():
+    """Create Qdrant collections and payload indexes, start background indexing."""
+    service = get_semantic_search_service()
+    await service.startup()
+    await facial_recognition.face_gallery.initialize()
+    await service.indexer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Index results still queued before exiting."""
+    service = get_semantic_search_service()
+    await service.indexer.stop()
+    await service.shutdown()
+
+
 @app.get("/")
 async def read_root():
     """Root endpoint."""
@@ -37,6 +56,13 @@ async def read_root():
         "redoc": "/redoc",
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: per-stage latency, batch sizes and cache hits."""
+    content, content_type = render()
+    return Response(content=content, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
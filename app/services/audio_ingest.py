@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import io
+from collections import OrderedDict
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from app.core.config import Settings
+from app.core.exceptions import APIException
+from app.core.metrics import StageTimer
+from app.services.image_ingest import to_bytes
+
+_base64_timer = StageTimer("transcription", "base64_decode")
+
+
+@dataclass(frozen=True)
+class AudioBuffer:
+    """Normalized mono PCM shared without copying
+
+    ``view`` is a read-only memoryview over float32 samples held by the
+    cache; ``samples`` wraps it in a NumPy array without copying.
+    """
+
+    view: memoryview
+    sample_rate: int
+    content_hash: str
+
+    @property
+    def samples(self) -> np.ndarray:
+        return np.frombuffer(self.view, dtype=np.float32)
+
+    @property
+    def duration(self) -> float:
+        return len(self.view) / self.sample_rate
+
+
+def decode_audio(data: bytes, audio_format: Optional[str] = None):
+    """Decode audio bytes into mono float32 samples and their sample rate
+
+    soundfile (libsndfile) decodes wav, flac, ogg and mp3 straight to
+    float32; other formats go through pydub and ffmpeg, whose integer
+    samples are reinterpreted in place before scaling.
+    """
+    try:
+        samples, rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        return samples.mean(axis=1, dtype=np.float32), rate
+    except Exception:
+        pass
+    try:
+        from pydub import AudioSegment
+
+        segment = AudioSegment.from_file(io.BytesIO(data), format=audio_format)
+    except Exception as e:
+        raise APIException(status_code=400, detail=f"Cannot decode audio: {str(e)}")
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[segment.sample_width]
+    samples = np.frombuffer(segment.raw_data, dtype=dtype).reshape(
+        -1, segment.channels
+    )
+    scale = float(np.iinfo(dtype).max) + 1
+    return samples.mean(axis=1, dtype=np.float32) / scale, segment.frame_rate
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Polyphase resampling to ``target_rate``, as contiguous float32"""
+    if rate != target_rate:
+        ratio = Fraction(target_rate, rate)
+        samples = resample_poly(samples, ratio.numerator, ratio.denominator)
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+class PCMCache:
+    """LRU cache of normalized PCM by content hash, bounded in bytes"""
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+
+    def get(self, key: Tuple[str, int]) -> Optional[np.ndarray]:
+        samples = self._entries.get(key)
+        if samples is not None:
+            self._entries.move_to_end(key)
+        return samples
+
+    def put(self, key: Tuple[str, int], samples: np.ndarray):
+        if samples.nbytes > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = samples
+        self.size += samples.nbytes
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.nbytes
+
+
+class AudioIngest:
+    """Decode and resample uploads once, then share the PCM
+
+    Normalized audio is cached by the hash of the uploaded bytes and the
+    target rate, so re-processing the same file with other settings
+    (language, diarization, model) skips decoding entirely. Concurrent
+    requests for the same file share one decode.
+    """
+
+    def __init__(
+        self, target_rate: int = 16000, max_cache_bytes: int = 512 * 1024 * 1024
+    ):
+        self.target_rate = target_rate
+        self.cache = PCMCache(max_cache_bytes)
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AudioIngest":
+        """An ingest configured by the ``AUDIO_*`` settings"""
+        return cls(
+            target_rate=settings.AUDIO_TARGET_SAMPLE_RATE,
+            max_cache_bytes=settings.AUDIO_PCM_CACHE_BYTES,
+        )
+
+    def _decode(self, data: bytes, audio_format: Optional[str], rate: int):
+        samples, source_rate = decode_audio(data, audio_format)
+        samples = resample(samples, source_rate, rate)
+        # Cached buffers are shared, so nobody may write to them
+        samples.flags.writeable = False
+        return samples
+
+    async def load(
+        self,
+        data: Union[str, bytes],
+        audio_format: Optional[str] = None,
+        target_rate: Optional[int] = None,
+    ) -> AudioBuffer:
+        """Normalized mono PCM for raw or base64-encoded audio"""
+        data = to_bytes(data, _base64_timer)
+        rate = target_rate or self.target_rate
+        content_hash = hashlib.sha256(data).hexdigest()
+        key = (content_hash, rate)
+
+        samples = self.cache.get(key)
+        if samples is None:
+            if key not in self._inflight:
+                loop = asyncio.get_running_loop()
+                self._inflight[key] = loop.run_in_executor(
+                    None, self._decode, data, audio_format, rate
+                )
+            try:
+                samples = await self._inflight[key]
+            finally:
+                self._inflight.pop(key, None)
+            self.cache.put(key, samples)
+        return AudioBuffer(memoryview(samples), rate, content_hash)
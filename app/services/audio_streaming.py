@@ -0,0 +1,346 @@
+import asyncio
+import io
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from app.core.cache import RedisCache
+from app.core.config import Settings
+
+# transcribe(samples, sample_rate) -> words with start/end seconds relative
+# to the chunk: {"word", "start", "end", "confidence"}
+Transcriber = Callable[[np.ndarray, int], Awaitable[List[Dict[str, Any]]]]
+PartialCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+SENTENCE_END = re.compile(r"[.!?]$")
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as HH:MM:SS.mmm"""
+    milliseconds = int(round(max(seconds, 0.0) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds / 1000:06.3f}"
+
+
+async def iter_audio_blocks(
+    data: bytes, block_seconds: float = 5.0
+) -> AsyncIterator[Tuple[np.ndarray, int]]:
+    """Decode audio incrementally as (mono float32 block, sample rate)
+
+    Only one block is decoded at a time; reads run in the default executor
+    so a long file never blocks the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    with sf.SoundFile(io.BytesIO(data)) as audio:
+        frames = max(int(audio.samplerate * block_seconds), 1)
+        while True:
+            block = await loop.run_in_executor(
+                None, lambda: audio.read(frames, dtype="float32", always_2d=True)
+            )
+            if len(block) == 0:
+                break
+            yield block.mean(axis=1), audio.samplerate
+
+
+def frame_energy(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames"""
+    n_frames = len(samples) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[: n_frames * frame_length].reshape(n_frames, frame_length)
+    return np.sqrt(np.mean(frames**2, axis=1))
+
+
+def speech_frames(
+    samples: np.ndarray, sample_rate: int, frame_ms: int = 30, ratio: float = 0.1
+) -> np.ndarray:
+    """Energy voice activity: frames louder than ``ratio`` of the loud frames"""
+    energy = frame_energy(samples, max(int(sample_rate * frame_ms / 1000), 1))
+    if energy.size == 0:
+        return np.zeros(0, dtype=bool)
+    reference = np.percentile(energy, 95)
+    return energy > max(reference * ratio, 1e-4)
+
+
+def quietest_cut(
+    samples: np.ndarray, sample_rate: int, earliest: int, latest: int
+) -> int:
+    """Sample index of the quietest 30 ms frame between two positions"""
+    frame_length = max(int(sample_rate * 0.03), 1)
+    window = samples[earliest:latest]
+    energy = frame_energy(window, frame_length)
+    if energy.size == 0:
+        return latest
+    return earliest + int(np.argmin(energy)) * frame_length + frame_length // 2
+
+
+class ChunkPlanner:
+    """Cut a stream of audio blocks into overlapping, pause-aligned chunks
+
+    A chunk is emitted once ``chunk_seconds`` of audio is buffered, ending
+    at the quietest point of its last ``search_seconds`` so cuts fall in
+    pauses rather than mid-word. The next chunk starts ``overlap_seconds``
+    before that cut. Only the current chunk is held in memory.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        chunk_seconds: float = 30.0,
+        overlap_seconds: float = 2.0,
+        search_seconds: float = 5.0,
+    ):
+        self.sample_rate = sample_rate
+        self.chunk = int(chunk_seconds * sample_rate)
+        self.overlap = int(overlap_seconds * sample_rate)
+        self.search = min(int(search_seconds * sample_rate), self.chunk // 2)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        # Absolute sample index of the buffer's first sample
+        self._offset = 0
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[float, np.ndarray]]:
+        """Add samples; return the chunks completed as (start seconds, audio)"""
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32)])
+        chunks = []
+        while len(self._buffer) >= self.chunk:
+            cut = quietest_cut(
+                self._buffer, self.sample_rate, self.chunk - self.search, self.chunk
+            )
+            chunks.append((self._offset / self.sample_rate, self._buffer[:cut]))
+            advance = max(cut - self.overlap, 1)
+            self._buffer = self._buffer[advance:]
+            self._offset += advance
+        return chunks
+
+    def flush(self) -> List[Tuple[float, np.ndarray]]:
+        """Return the remaining audio as a final chunk"""
+        if len(self._buffer) <= self.overlap and self._offset > 0:
+            return []
+        chunk = (self._offset / self.sample_rate, self._buffer)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        return [chunk] if len(chunk[1]) else []
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_words(
+    committed: List[Dict[str, Any]],
+    incoming: List[Dict[str, Any]],
+    overlap_start: float,
+    overlap_end: float,
+) -> List[Dict[str, Any]]:
+    """Join two chunks' words (absolute times) across their shared overlap
+
+    Within the overlap the first word heard by both chunks at nearly the
+    same time anchors the join: earlier words come from the committed
+    chunk, that word and later ones from the incoming chunk, whose context
+    for them is better. Without an anchor the overlap is split at its
+    midpoint.
+    """
+    if not committed:
+        return list(incoming)
+    cut = (overlap_start + overlap_end) / 2
+    tail = [w for w in committed if w["end"] > overlap_start]
+    head = [w for w in incoming if w["start"] < overlap_end]
+    for old in tail:
+        match = next(
+            (
+                new
+                for new in head
+                if _normalize(new["word"]) == _normalize(old["word"])
+                and abs(new["start"] - old["start"]) < 0.3
+            ),
+            None,
+        )
+        if match is not None:
+            cut = min(old["start"], match["start"])
+            break
+    kept = [w for w in committed if w["start"] < cut]
+    return kept + [w for w in incoming if w["start"] >= cut]
+
+
+def words_to_segments(
+    words: List[Dict[str, Any]], max_pause: float = 0.8, max_words: int = 40
+) -> List[Dict[str, Any]]:
+    """Group words into segments at pauses, sentence ends and speaker turns"""
+    segments: List[Dict[str, Any]] = []
+    current: List[Dict[str, Any]] = []
+    for word in words:
+        if current and (
+            word["start"] - current[-1]["end"] > max_pause
+            or SENTENCE_END.search(current[-1]["word"])
+            or word.get("speakerId") != current[-1].get("speakerId")
+            or len(current) >= max_words
+        ):
+            segments.append(_segment(current))
+            current = []
+        current.append(word)
+    if current:
+        segments.append(_segment(current))
+    return segments
+
+
+def _segment(words: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "speakerId": words[0].get("speakerId"),
+        "text": " ".join(w["word"] for w in words),
+        "startTime": format_timestamp(words[0]["start"]),
+        "endTime": format_timestamp(words[-1]["end"]),
+        "confidence": float(np.mean([w.get("confidence", 0.0) for w in words])),
+    }
+
+
+def format_words(words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Words in the ``Word`` response shape"""
+    return [
+        {
+            "word": w["word"],
+            "startTime": format_timestamp(w["start"]),
+            "endTime": format_timestamp(w["end"]),
+            "confidence": float(w.get("confidence", 0.0)),
+            "speakerId": w.get("speakerId"),
+        }
+        for w in words
+    ]
+
+
+class StreamingTranscriber:
+    """Transcribe long audio as parallel, overlapping chunks
+
+    Audio is decoded block by block and cut into pause-aligned chunks that
+    are transcribed concurrently. At most ``max_concurrency`` chunks are in
+    flight, which bounds memory. Finished chunks are stitched in order and
+    reported through ``on_partial`` as soon as every earlier chunk is done.
+    """
+
+    def __init__(
+        self,
+        transcribe: Transcriber,
+        chunk_seconds: float = 30.0,
+        overlap_seconds: float = 2.0,
+        max_concurrency: int = 4,
+    ):
+        self.transcribe = transcribe
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    def from_settings(
+        cls, transcribe: Transcriber, settings: Settings
+    ) -> "StreamingTranscriber":
+        """A transcriber configured by the ``TRANSCRIPTION_CHUNK_*`` settings"""
+        return cls(
+            transcribe,
+            chunk_seconds=settings.TRANSCRIPTION_CHUNK_SECONDS,
+            overlap_seconds=settings.TRANSCRIPTION_CHUNK_OVERLAP,
+            max_concurrency=settings.TRANSCRIPTION_MAX_CONCURRENCY,
+        )
+
+    async def _transcribe_chunk(
+        self, start: float, samples: np.ndarray, sample_rate: int
+    ) -> List[Dict[str, Any]]:
+        words = await self.transcribe(samples, sample_rate)
+        return [
+            {**w, "start": w["start"] + start, "end": w["end"] + start}
+            for w in words
+        ]
+
+    async def process(
+        self,
+        data: bytes,
+        on_partial: Optional[PartialCallback] = None,
+        block_seconds: float = 5.0,
+    ) -> Dict[str, Any]:
+        """Transcribe encoded audio, returning transcript, segments and words"""
+        slots = asyncio.Semaphore(self.max_concurrency)
+        tasks: List[asyncio.Task] = []
+        spans: List[Tuple[float, float]] = []
+        planner: Optional[ChunkPlanner] = None
+        duration = 0.0
+
+        def submit(start: float, samples: np.ndarray, sample_rate: int):
+            async def run():
+                try:
+                    return await self._transcribe_chunk(start, samples, sample_rate)
+                finally:
+                    slots.release()
+
+            spans.append((start, start + len(samples) / sample_rate))
+            tasks.append(asyncio.ensure_future(run()))
+
+        words: List[Dict[str, Any]] = []
+        stitched = 0
+
+        async def stitch_ready():
+            nonlocal words, stitched
+            while stitched < len(tasks) and tasks[stitched].done():
+                overlap_start = spans[stitched][0]
+                overlap_end = spans[stitched - 1][1] if stitched else overlap_start
+                words = stitch_words(
+                    words, tasks[stitched].result(), overlap_start, overlap_end
+                )
+                stitched += 1
+                if on_partial is not None:
+                    await on_partial(self._result(words, spans[stitched - 1][1]))
+
+        async for samples, sample_rate in iter_audio_blocks(data, block_seconds):
+            if planner is None:
+                planner = ChunkPlanner(
+                    sample_rate, self.chunk_seconds, self.overlap_seconds
+                )
+            duration += len(samples) / sample_rate
+            for start, chunk in planner.feed(samples):
+                # Wait for a free slot before decoding further
+                await slots.acquire()
+                submit(start, chunk, sample_rate)
+                await stitch_ready()
+        if planner is not None:
+            for start, chunk in planner.flush():
+                await slots.acquire()
+                submit(start, chunk, sample_rate)
+
+        for task in tasks:
+            await task
+            await stitch_ready()
+        return self._result(words, duration)
+
+    @staticmethod
+    def _result(words: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+        segments = words_to_segments(words)
+        confidences = [segment["confidence"] for segment in segments]
+        return {
+            "duration": format_timestamp(duration),
+            "transcript": " ".join(w["word"] for w in words),
+            "confidence": float(np.mean(confidences)) if confidences else 0.0,
+            "segments": segments,
+            "words": format_words(words),
+        }
+
+
+class PartialTranscripts:
+    """Partial transcription results of running requests, kept in Redis"""
+
+    def __init__(self, cache: RedisCache, expire: int = 3600):
+        self.cache = cache
+        self.expire = expire
+
+    @staticmethod
+    def _key(request_id: str) -> str:
+        return f"transcription:partial:{request_id}"
+
+    async def publish(self, request_id: str, result: Dict[str, Any], done: bool):
+        """Store the transcript so far"""
+        status = "completed" if done else "processing"
+        await self.cache.set(
+            self._key(request_id), {**result, "status": status}, self.expire
+        )
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """The latest transcript of a request, or None if unknown"""
+        return await self.cache.get(self._key(request_id))
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from app.core.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+COPYING = "copying"
+SWITCHING = "switching"
+
+
+class ChangeLog:
+    """Writes to collections under reindex, shared by every worker in Redis
+
+    A reindex takes the per-alias state key (so only one runs at a time)
+    and sets it to ``copying``. Writers then record each write to the alias
+    in a Redis list, which the reindex replays into the new collection.
+    During ``switching`` writers wait until the alias points at the new
+    collection, so the final replay and the switch see no new writes.
+
+    Writers read the state at most every ``poll_seconds``; the reindex waits
+    that long after every state change before relying on it.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        poll_seconds: float = 1.0,
+        lock_ttl: int = 600,
+        max_pause_seconds: float = 30.0,
+    ):
+        self.redis = redis_client
+        self.poll_seconds = poll_seconds
+        self.lock_ttl = lock_ttl
+        self.max_pause_seconds = max_pause_seconds
+        self._states: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    @staticmethod
+    def _state_key(alias: str) -> str:
+        return f"reindex:state:{alias}"
+
+    @staticmethod
+    def _log_key(alias: str) -> str:
+        return f"reindex:changes:{alias}"
+
+    def acquire(self, alias: str) -> bool:
+        """Start logging writes to an alias; False if a reindex already runs"""
+        acquired = self.redis.set(
+            self._state_key(alias), COPYING, nx=True, ex=self.lock_ttl
+        )
+        if acquired:
+            self.redis.delete(self._log_key(alias))
+        return bool(acquired)
+
+    def refresh(self, alias: str, state: Optional[str] = None):
+        """Extend the lock of a running reindex, optionally changing its state"""
+        if state is None:
+            self.redis.expire(self._state_key(alias), self.lock_ttl)
+        else:
+            self.redis.set(self._state_key(alias), state, ex=self.lock_ttl)
+
+    def release(self, alias: str):
+        """Stop logging writes to an alias and drop its log"""
+        self.redis.delete(self._state_key(alias), self._log_key(alias))
+
+    def pop(self, alias: str, count: int) -> List[Dict[str, Any]]:
+        """Take up to ``count`` of the oldest logged changes"""
+        raw = self.redis.lpop(self._log_key(alias), count) or []
+        return [json.loads(change) for change in raw]
+
+    def pending(self, alias: str) -> int:
+        return int(self.redis.llen(self._log_key(alias)))
+
+    def _state(self, alias: str) -> Optional[str]:
+        cached = self._states.get(alias)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.poll_seconds:
+            return cached[1]
+        state = self.redis.get(self._state_key(alias))
+        state = state.decode() if isinstance(state, bytes) else state
+        self._states[alias] = (now, state)
+        return state
+
+    async def record(self, alias: str, change: Dict[str, Any]):
+        """Log a write about to be made to ``alias`` if it is being reindexed
+
+        Waits while the alias is being switched to its new collection.
+        """
+        deadline = time.monotonic() + self.max_pause_seconds
+        state = self._state(alias)
+        while state == SWITCHING:
+            if time.monotonic() >= deadline:
+                raise APIException(
+                    status_code=503, detail=f"Collection {alias} is being switched"
+                )
+            await asyncio.sleep(self.poll_seconds / 10)
+            self._states.pop(alias, None)
+            state = self._state(alias)
+        if state == COPYING:
+            self.redis.rpush(self._log_key(alias), json.dumps(change, default=str))
@@ -0,0 +1,126 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+AGGREGATIONS = ("max", "sum")
+
+
+@dataclass
+class TextChunk:
+    """A window of a longer text, located by character offsets"""
+
+    index: int
+    text: str
+    start_char: int
+    end_char: int
+    token_count: int
+
+
+def _sentence_starts(text: str, token_starts: np.ndarray) -> np.ndarray:
+    """Token indices at which a new sentence begins"""
+    char_starts = [match.end() for match in SENTENCE_BOUNDARY.finditer(text)]
+    if not char_starts:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.searchsorted(token_starts, char_starts, side="left"))
+
+
+def chunk_text(
+    text: str,
+    tokenizer: Any,
+    window_tokens: int = 256,
+    overlap_tokens: int = 32,
+    sentence_aware: bool = True,
+) -> List[TextChunk]:
+    """Split text into overlapping token windows
+
+    ``window_tokens`` includes the special tokens the encoder adds, so every
+    chunk fits the model without truncation. With ``sentence_aware`` a window
+    ends, and the next one starts, on a sentence boundary when one falls in
+    the second half of the window; otherwise windows are cut at the token
+    limit.
+    """
+    encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = np.asarray(encoded["offset_mapping"], dtype=np.int64).reshape(-1, 2)
+    n_tokens = len(offsets)
+    if n_tokens == 0:
+        return []
+
+    window = max(window_tokens - tokenizer.num_special_tokens_to_add(), 1)
+    overlap = min(max(overlap_tokens, 0), window - 1)
+    boundaries = (
+        _sentence_starts(text, offsets[:, 0])
+        if sentence_aware
+        else np.zeros(0, dtype=np.int64)
+    )
+
+    chunks: List[TextChunk] = []
+    start = 0
+    while True:
+        end = min(start + window, n_tokens)
+        if end < n_tokens and boundaries.size:
+            lo = np.searchsorted(boundaries, start + window // 2, side="left")
+            hi = np.searchsorted(boundaries, end, side="right")
+            if hi > lo:
+                end = int(boundaries[hi - 1])
+
+        start_char = int(offsets[start, 0])
+        end_char = int(offsets[end - 1, 1])
+        chunks.append(
+            TextChunk(
+                index=len(chunks),
+                text=text[start_char:end_char],
+                start_char=start_char,
+                end_char=end_char,
+                token_count=end - start,
+            )
+        )
+        if end >= n_tokens:
+            return chunks
+
+        next_start = end - overlap
+        if boundaries.size:
+            # Prefer starting the overlap at a sentence start
+            i = np.searchsorted(boundaries, next_start, side="left")
+            if i < boundaries.size and boundaries[i] < end:
+                next_start = int(boundaries[i])
+        start = max(next_start, start + 1)
+
+
+def collapse_by_parent(
+    hits: List[Dict[str, Any]], aggregation: str = "max", limit: int = 10
+) -> List[Dict[str, Any]]:
+    """Collapse chunk-level hits into one hit per parent document
+
+    The parent score is the best (``max``) or total (``sum``) chunk score,
+    and the best-scoring chunk represents the parent. Hits are expected in
+    descending score order, as Qdrant returns them. Hits without a parent
+    are treated as their own parent.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(
+            f"Unknown aggregation '{aggregation}', expected one of {AGGREGATIONS}"
+        )
+
+    parents: Dict[str, Dict[str, Any]] = {}
+    for hit in hits:
+        parent_id = str(hit.get("parent_id") or hit["id"])
+        parent = parents.get(parent_id)
+        if parent is None:
+            parents[parent_id] = {**hit, "id": parent_id, "matched_chunks": 1}
+            continue
+        parent["matched_chunks"] += 1
+        if aggregation == "sum":
+            parent["score"] += hit["score"]
+        elif hit["score"] > parent["score"]:
+            parents[parent_id] = {
+                **hit,
+                "id": parent_id,
+                "matched_chunks": parent["matched_chunks"],
+            }
+
+    ranked = sorted(parents.values(), key=lambda hit: hit["score"], reverse=True)
+    return ranked[:limit]
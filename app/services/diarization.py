@@ -0,0 +1,266 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import Settings
+from app.core.metrics import StageTimer
+
+# embed(windows, sample_rate) -> one speaker embedding per row of windows
+SpeakerEmbedder = Callable[[np.ndarray, int], Awaitable[np.ndarray]]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, leaving zero rows at zero"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def sliding_windows(
+    samples: np.ndarray,
+    sample_rate: int,
+    window_seconds: float = 1.5,
+    hop_seconds: float = 0.75,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Overlapping analysis windows and their center times in seconds
+
+    The windows are a strided view of ``samples``; no audio is copied.
+    Audio shorter than one window yields a single window.
+    """
+    window = max(int(window_seconds * sample_rate), 1)
+    hop = max(int(hop_seconds * sample_rate), 1)
+    if len(samples) < window:
+        windows = samples[np.newaxis, :]
+    else:
+        windows = np.lib.stride_tricks.sliding_window_view(samples, window)[::hop]
+    centers = (np.arange(len(windows)) * hop + windows.shape[1] / 2) / sample_rate
+    return windows, centers
+
+
+def agglomerate(
+    sums: np.ndarray,
+    counts: np.ndarray,
+    threshold: float,
+    max_clusters: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Centroid-linkage agglomerative clustering on cosine similarity
+
+    Each input row is a cluster given by the sum of its members' unit
+    embeddings and its member count. The two most similar clusters are
+    merged until no pair reaches ``threshold`` and at most
+    ``max_clusters`` remain. Memory is quadratic in the number of rows, so
+    callers bound it (see ``cluster_blocks``).
+
+    Returns each row's cluster label and the sums and counts of the
+    resulting clusters.
+    """
+    n = len(sums)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), sums, counts
+    sums = np.array(sums, dtype=np.float64)
+    counts = np.array(counts, dtype=np.float64)
+    centroids = normalize_rows(sums).astype(np.float64)
+    similarity = centroids @ centroids.T
+    np.fill_diagonal(similarity, -np.inf)
+    active = np.ones(n, dtype=bool)
+    labels = np.arange(n)
+
+    clusters = n
+    while clusters > 1:
+        i, j = divmod(int(np.argmax(similarity)), n)
+        if similarity[i, j] < threshold and (
+            max_clusters is None or clusters <= max_clusters
+        ):
+            break
+        # Merge j into i, then refresh i's similarities to every survivor
+        sums[i] += sums[j]
+        counts[i] += counts[j]
+        labels[labels == j] = i
+        active[j] = False
+        similarity[j, :] = similarity[:, j] = -np.inf
+        centroids[i] = sums[i] / max(np.linalg.norm(sums[i]), 1e-12)
+        row = centroids @ centroids[i]
+        row[~active] = -np.inf
+        row[i] = -np.inf
+        similarity[i, :] = similarity[:, i] = row
+        clusters -= 1
+
+    # Labels are surviving row indices; renumber them 0..k-1
+    _, labels = np.unique(labels, return_inverse=True)
+    return labels, sums[active], counts[active]
+
+
+def cluster_blocks(
+    sums: np.ndarray,
+    counts: np.ndarray,
+    threshold: float,
+    max_clusters: Optional[int] = None,
+    block_size: int = 500,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Agglomerative clustering of any number of rows in bounded memory
+
+    Rows are clustered in consecutive blocks of ``block_size``, each block
+    reduced to at most half its size, and the block clusters are then
+    clustered the same way until they fit in one block. Memory stays at
+    O(block_size²) rather than O(n²).
+    """
+    n = len(sums)
+    block_size = max(block_size, 2)
+    if n <= block_size:
+        return agglomerate(sums, counts, threshold, max_clusters)
+
+    labels = np.empty(n, dtype=np.int64)
+    block_sums, block_counts = [], []
+    offset = 0
+    for start in range(0, n, block_size):
+        block = slice(start, start + block_size)
+        block_labels, merged_sums, merged_counts = agglomerate(
+            sums[block], counts[block], threshold, max(block_size // 2, 1)
+        )
+        labels[block] = block_labels + offset
+        offset += len(merged_sums)
+        block_sums.append(merged_sums)
+        block_counts.append(merged_counts)
+
+    top_labels, sums, counts = cluster_blocks(
+        np.concatenate(block_sums),
+        np.concatenate(block_counts),
+        threshold,
+        max_clusters,
+        block_size,
+    )
+    return top_labels[labels], sums, counts
+
+
+def order_by_appearance(labels: np.ndarray) -> np.ndarray:
+    """Renumber labels 0, 1, ... in order of first appearance; -1 is kept"""
+    voiced = labels >= 0
+    if not voiced.any():
+        return labels
+    unique, first = np.unique(labels[voiced], return_index=True)
+    rank = np.empty(int(unique.max()) + 1, dtype=np.int64)
+    rank[unique[np.argsort(first)]] = np.arange(len(unique))
+    result = labels.copy()
+    result[voiced] = rank[labels[voiced]]
+    return result
+
+
+def assign_speakers(
+    words: List[Dict[str, Any]], centers: np.ndarray, labels: np.ndarray
+) -> List[Dict[str, Any]]:
+    """Give each word the speaker of the voiced window nearest its midpoint
+
+    Words carry start/end seconds; speaker ids start at 1.
+    """
+    voiced = labels >= 0
+    if not words or not voiced.any():
+        return words
+    centers, labels = centers[voiced], labels[voiced]
+    midpoints = np.array([(w["start"] + w["end"]) / 2 for w in words])
+    right = np.clip(np.searchsorted(centers, midpoints), 0, len(centers) - 1)
+    left = np.clip(right - 1, 0, len(centers) - 1)
+    nearest = np.where(
+        np.abs(centers[right] - midpoints) < np.abs(midpoints - centers[left]),
+        right,
+        left,
+    )
+    return [
+        {**word, "speakerId": int(labels[k]) + 1} for word, k in zip(words, nearest)
+    ]
+
+
+class Diarizer:
+    """Label who speaks when from sliding-window speaker embeddings
+
+    Silent windows are skipped; the rest are embedded ``batch_size`` at a
+    time and clustered blockwise (see ``cluster_blocks``). Every window is
+    finally assigned to its nearest speaker centroid, which also repairs
+    merges made within a single block. ``max_speakers`` caps the speakers
+    of requests that set no cap of their own.
+    """
+
+    def __init__(
+        self,
+        embed: SpeakerEmbedder,
+        window_seconds: float = 1.5,
+        hop_seconds: float = 0.75,
+        batch_size: int = 64,
+        block_size: int = 500,
+        threshold: float = 0.5,
+        max_speakers: int = 10,
+    ):
+        self.embed = embed
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+
+    @classmethod
+    def from_settings(cls, embed: SpeakerEmbedder, settings: Settings) -> "Diarizer":
+        """A diarizer configured by the ``DIARIZATION_*`` settings"""
+        return cls(
+            embed,
+            window_seconds=settings.DIARIZATION_WINDOW_SECONDS,
+            hop_seconds=settings.DIARIZATION_HOP_SECONDS,
+            batch_size=settings.DIARIZATION_BATCH_SIZE,
+            block_size=settings.DIARIZATION_BLOCK_SIZE,
+            threshold=settings.DIARIZATION_THRESHOLD,
+            max_speakers=settings.DIARIZATION_MAX_SPEAKERS,
+        )
+
+    def _voiced(self, windows: np.ndarray, ratio: float = 0.1) -> np.ndarray:
+        """Windows louder than ``ratio`` of the loud windows, batch by batch"""
+        rms = np.concatenate(
+            [
+                np.sqrt(np.mean(windows[i : i + self.batch_size] ** 2, axis=1))
+                for i in range(0, len(windows), self.batch_size)
+            ]
+        )
+        reference = np.percentile(rms, 95)
+        return rms > max(reference * ratio, 1e-4)
+
+    @StageTimer("transcription", "diarize")
+    async def diarize(
+        self,
+        samples: np.ndarray,
+        sample_rate: int,
+        max_speakers: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Window center times and speaker labels (-1 for silence)"""
+        windows, centers = sliding_windows(
+            samples, sample_rate, self.window_seconds, self.hop_seconds
+        )
+        labels = np.full(len(windows), -1, dtype=np.int64)
+        voiced = np.flatnonzero(self._voiced(windows))
+        if len(voiced) == 0:
+            return centers, labels
+
+        embeddings = []
+        for i in range(0, len(voiced), self.batch_size):
+            batch = windows[voiced[i : i + self.batch_size]]
+            embeddings.append(await self.embed(batch, sample_rate))
+        embeddings = normalize_rows(np.concatenate(embeddings))
+
+        _, sums, _ = cluster_blocks(
+            embeddings,
+            np.ones(len(embeddings)),
+            self.threshold,
+            max_speakers or self.max_speakers,
+            self.block_size,
+        )
+        similarity = embeddings @ normalize_rows(sums).T
+        labels[voiced] = np.argmax(similarity, axis=1)
+        return centers, order_by_appearance(labels)
+
+    async def label_words(
+        self,
+        words: List[Dict[str, Any]],
+        samples: np.ndarray,
+        sample_rate: int,
+        max_speakers: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Words (start/end seconds) with a ``speakerId`` added"""
+        centers, labels = await self.diarize(samples, sample_rate, max_speakers)
+        return assign_speakers(words, centers, labels)
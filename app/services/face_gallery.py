@@ -0,0 +1,217 @@
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from qdrant_client.http import models
+from qdrant_client.models import Distance, VectorParams
+
+from app.core.exceptions import APIException
+from app.core.metrics import StageTimer
+from app.core.qdrant import get_qdrant_client
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_embeddings(embeddings: Any) -> np.ndarray:
+    """L2-normalize face embeddings row by row into a float32 (n, dim) array"""
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def best_match_per_face(
+    hits_per_face: List[List[Any]], threshold: float
+) -> List[Dict[str, Any]]:
+    """Pick the best identity above ``threshold`` for each face's hit list
+
+    Hits are Qdrant scored points whose payload carries ``person_id`` and
+    ``name``. Faces without a hit above the threshold are reported as
+    unmatched.
+    """
+    results = []
+    for hits in hits_per_face:
+        best = next((hit for hit in hits if hit.score >= threshold), None)
+        if best is None:
+            results.append({"matched": False})
+            continue
+        results.append(
+            {
+                "matched": True,
+                "personId": best.payload["person_id"],
+                "score": best.score,
+                "name": best.payload.get("name"),
+            }
+        )
+    return results
+
+
+class FaceGallery:
+    """Reference face embeddings per gallery (``databaseId``) in Qdrant
+
+    All galleries share one collection, partitioned by a ``database_id``
+    payload index. The HNSW graph is built per gallery (``payload_m``)
+    instead of globally (``m=0``), so a match only walks the graph of its
+    own gallery and latency tracks the gallery size's logarithm rather than
+    the total number of enrolled faces.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        collection_name: str = "faces",
+        dimension: int = 512,
+        payload_m: int = 16,
+    ):
+        self.client = client or get_qdrant_client()
+        self.collection_name = collection_name
+        self.dimension = dimension
+        self.payload_m = payload_m
+
+    async def initialize(self):
+        """Create the gallery collection and any missing payload indexes"""
+        try:
+            response = await self.client.get_collections()
+            if self.collection_name in {c.name for c in response.collections}:
+                info = await self.client.get_collection(self.collection_name)
+                existing = set(info.payload_schema or {})
+            else:
+                await self.client.create_collection(
+                    collection_name=self.collection_name,
+                    # Embeddings are normalized on write and query, so dot
+                    # product equals cosine similarity
+                    vectors_config=VectorParams(
+                        size=self.dimension, distance=Distance.DOT
+                    ),
+                    hnsw_config=models.HnswConfigDiff(m=0, payload_m=self.payload_m),
+                )
+                existing = set()
+                logger.info(f"Created face gallery collection {self.collection_name}")
+            # Per-gallery HNSW graphs are only built for indexed payload fields
+            for field_name in ("database_id", "person_id"):
+                if field_name in existing:
+                    continue
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+                logger.info(f"Created payload index {field_name} on face galleries")
+        except Exception as e:
+            logger.warning(f"Could not initialize face gallery collection: {str(e)}")
+
+    @staticmethod
+    def _gallery_filter(database_id: str, person_id: Optional[str] = None):
+        conditions = [
+            models.FieldCondition(
+                key="database_id", match=models.MatchValue(value=database_id)
+            )
+        ]
+        if person_id is not None:
+            conditions.append(
+                models.FieldCondition(
+                    key="person_id", match=models.MatchValue(value=person_id)
+                )
+            )
+        return models.Filter(must=conditions)
+
+    def _vectors(self, embeddings: Any) -> np.ndarray:
+        """Normalized embeddings, rejected unless they match the collection"""
+        vectors = normalize_embeddings(embeddings)
+        if vectors.shape[1] != self.dimension:
+            raise APIException(
+                status_code=400,
+                detail=f"Face embeddings must have {self.dimension} dimensions",
+            )
+        return vectors
+
+    @staticmethod
+    def _point_id(database_id: str, person_id: str, index: int) -> str:
+        """Deterministic id so re-enrolling a person overwrites their faces"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{database_id}/{person_id}/{index}"))
+
+    async def enroll(
+        self,
+        database_id: str,
+        person_id: str,
+        embeddings: Any,
+        name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Enroll (or re-enroll) one identity with one or more face embeddings"""
+        vectors = self._vectors(embeddings)
+        ids = [self._point_id(database_id, person_id, i) for i in range(len(vectors))]
+        payload = {
+            "database_id": database_id,
+            "person_id": person_id,
+            "name": name,
+            "metadata": metadata or {},
+        }
+        await self.client.upsert(
+            collection_name=self.collection_name,
+            points=models.Batch(
+                ids=ids,
+                vectors=vectors.tolist(),
+                payloads=[payload] * len(vectors),
+            ),
+        )
+        # Only once the new faces are in, drop those left over from a
+        # previous, larger enrollment, so the identity never goes missing
+        stale = models.Filter(
+            must=self._gallery_filter(database_id, person_id).must,
+            must_not=[models.HasIdCondition(has_id=ids)],
+        )
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=stale),
+        )
+        return {"databaseId": database_id, "personId": person_id, "faces": len(vectors)}
+
+    async def delete_identity(self, database_id: str, person_id: str):
+        """Remove every face enrolled for an identity"""
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(
+                filter=self._gallery_filter(database_id, person_id)
+            ),
+        )
+
+    async def delete_gallery(self, database_id: str):
+        """Remove a whole gallery"""
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(
+                filter=self._gallery_filter(database_id)
+            ),
+        )
+
+    @StageTimer("facial_recognition", "match")
+    async def match(
+        self,
+        database_id: str,
+        embeddings: Any,
+        threshold: float = 0.8,
+        candidates: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """Match every face of an image against a gallery in one request
+
+        Returns one matching result per embedding, in input order.
+        """
+        if len(embeddings) == 0:
+            return []
+        vectors = self._vectors(embeddings)
+        gallery_filter = self._gallery_filter(database_id)
+        hits_per_face = await self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                models.SearchRequest(
+                    vector=vector,
+                    filter=gallery_filter,
+                    limit=candidates,
+                    with_payload=["person_id", "name"],
+                    score_threshold=threshold,
+                )
+                for vector in vectors.tolist()
+            ],
+        )
+        return best_match_per_face(hits_per_face, threshold)
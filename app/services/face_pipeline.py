@@ -0,0 +1,294 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.metrics import StageTimer
+
+LANDMARK_NAMES = ("leftEye", "rightEye", "nose", "leftMouth", "rightMouth")
+
+# detector(images) -> one (boxes (n, 4) as x1, y1, x2, y2; scores (n,)) per image
+Detector = Callable[[List[np.ndarray]], List[Tuple[np.ndarray, np.ndarray]]]
+# Batched crop models take an (n, size, size, 3) float32 array
+CropModel = Callable[[np.ndarray], Any]
+
+
+@dataclass
+class FaceBatch:
+    """Face crops pooled across a batch of images
+
+    Row ``i`` of ``crops`` came from image ``owners[i]`` at ``boxes[i]``.
+    """
+
+    crops: np.ndarray
+    owners: np.ndarray
+    boxes: np.ndarray
+    scores: np.ndarray
+
+
+def crop_faces(image: np.ndarray, boxes: np.ndarray, size: int = 112) -> np.ndarray:
+    """Cut square, resized face crops out of an RGB image
+
+    Each box is expanded to a square around its center, so faces keep their
+    aspect ratio, and clipped to the image. Returns an (n, size, size, 3)
+    float32 array scaled to [0, 1].
+    """
+    crops = np.empty((len(boxes), size, size, 3), dtype=np.float32)
+    height, width = image.shape[:2]
+    for i, (x1, y1, x2, y2) in enumerate(np.asarray(boxes, dtype=np.float32)):
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        half = max(x2 - x1, y2 - y1, 1) / 2
+        left, top = int(max(cx - half, 0)), int(max(cy - half, 0))
+        right, bottom = int(min(cx + half, width)), int(min(cy + half, height))
+        face = image[top : max(bottom, top + 1), left : max(right, left + 1)]
+        crops[i] = cv2.resize(face, (size, size), interpolation=cv2.INTER_LINEAR)
+    return crops / 255.0
+
+
+def square_boxes(boxes: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+    """The clipped square regions ``crop_faces`` cuts for each box"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    half = np.maximum((boxes[:, 2:] - boxes[:, :2]).max(axis=1), 1)[:, None] / 2
+    upper = np.array([shape[1], shape[0]], dtype=np.float32)
+    return np.hstack(
+        [np.clip(centers - half, 0, upper), np.clip(centers + half, 0, upper)]
+    )
+
+
+def haar_detector(scale_factor: float = 1.1, min_neighbors: int = 5) -> Detector:
+    """Detector over OpenCV's bundled frontal-face Haar cascade
+
+    Scores are the cascade's level weights squashed into (0, 1).
+    """
+    cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    )
+
+    def detect(images: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        detections = []
+        for image in images:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            rects, _, weights = cascade.detectMultiScale3(
+                gray,
+                scaleFactor=scale_factor,
+                minNeighbors=min_neighbors,
+                outputRejectLevels=True,
+            )
+            rects = np.asarray(rects, dtype=np.float32).reshape(-1, 4)
+            boxes = np.hstack([rects[:, :2], rects[:, :2] + rects[:, 2:]])
+            weights = np.asarray(weights, dtype=np.float32).reshape(-1)
+            detections.append((boxes, 1 / (1 + np.exp(-weights))))
+        return detections
+
+    return detect
+
+
+class OnnxFaceEmbedder:
+    """Embedding model over an ONNX face recognition network
+
+    The network takes (n, 3, size, size) crops scaled to [-1, 1], as ArcFace
+    exports do, and its first output is one embedding per crop. Embeddings
+    are returned as unit vectors. The session is created on first use.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self._session = None
+
+    def __call__(self, crops: np.ndarray) -> np.ndarray:
+        if self._session is None:
+            import onnxruntime as ort
+
+            self._session = ort.InferenceSession(
+                self.model_path, providers=["CPUExecutionProvider"]
+            )
+        inputs = np.ascontiguousarray(
+            np.transpose(crops * 2.0 - 1.0, (0, 3, 1, 2)), dtype=np.float32
+        )
+        name = self._session.get_inputs()[0].name
+        embeddings = self._session.run(None, {name: inputs})[0]
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+
+def run_batched(model: CropModel, crops: np.ndarray, batch_size: int) -> List[Any]:
+    """Run a model over crops in fixed-size batches, one output per crop"""
+    outputs: List[Any] = []
+    for start in range(0, len(crops), batch_size):
+        outputs.extend(list(model(crops[start : start + batch_size])))
+    return outputs
+
+
+class FacePipeline:
+    """Two-stage face analysis across a batch of images
+
+    Faces are first detected in every image; their crops are then pooled
+    into one array and each enabled model (landmarks, attributes,
+    embedding) runs over it in large batches. Results are scattered back to
+    their images, so model calls grow with ``ceil(faces / batch_size)``
+    instead of with the face count.
+    """
+
+    def __init__(
+        self,
+        detector: Detector,
+        landmark_model: Optional[CropModel] = None,
+        attribute_model: Optional[CropModel] = None,
+        embedding_model: Optional[CropModel] = None,
+        crop_size: int = 112,
+        batch_size: int = 64,
+    ):
+        self.detector = detector
+        self.landmark_model = landmark_model
+        self.attribute_model = attribute_model
+        self.embedding_model = embedding_model
+        self.crop_size = crop_size
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "FacePipeline":
+        """Pipeline of the models available in this deployment
+
+        Faces are found with the OpenCV Haar cascade. Embeddings for gallery
+        matching come from ``FACE_EMBEDDING_MODEL_PATH`` when it is set;
+        there are no landmark or attribute models yet.
+        """
+        embedding_model = None
+        if settings.FACE_EMBEDDING_MODEL_PATH:
+            embedding_model = OnnxFaceEmbedder(settings.FACE_EMBEDDING_MODEL_PATH)
+        return cls(
+            haar_detector(),
+            embedding_model=embedding_model,
+            batch_size=settings.FACE_BATCH_SIZE,
+        )
+
+    def detect(
+        self, images: List[np.ndarray], max_results: Sequence[int]
+    ) -> FaceBatch:
+        """Detect faces in all images and pool their crops"""
+        crops, owners, boxes, scores = [], [], [], []
+        for index, (image, (image_boxes, image_scores)) in enumerate(
+            zip(images, self.detector(images))
+        ):
+            order = np.argsort(-np.asarray(image_scores))[: max_results[index]]
+            image_boxes = np.asarray(image_boxes, dtype=np.float32).reshape(-1, 4)
+            image_boxes = image_boxes[order]
+            crops.append(crop_faces(image, image_boxes, self.crop_size))
+            owners.append(np.full(len(order), index, dtype=np.int64))
+            boxes.append(image_boxes)
+            scores.append(np.asarray(image_scores, dtype=np.float32)[order])
+        if not crops:
+            size = self.crop_size
+            return FaceBatch(
+                np.zeros((0, size, size, 3), np.float32),
+                np.zeros(0, np.int64),
+                np.zeros((0, 4), np.float32),
+                np.zeros(0, np.float32),
+            )
+        return FaceBatch(
+            np.concatenate(crops),
+            np.concatenate(owners),
+            np.concatenate(boxes),
+            np.concatenate(scores),
+        )
+
+    def _run_selected(
+        self, model: Optional[CropModel], batch: FaceBatch, selected: np.ndarray
+    ) -> Dict[int, Any]:
+        """Run a model on the faces whose image asked for it, keyed by face"""
+        if model is None or not selected.any():
+            return {}
+        rows = np.flatnonzero(selected)
+        outputs = run_batched(model, batch.crops[rows], self.batch_size)
+        return dict(zip(rows.tolist(), outputs))
+
+    def _landmarks_to_image(
+        self, batch: FaceBatch, landmarks: Dict[int, Any], shapes: List[Tuple]
+    ) -> Dict[int, Dict[str, Dict[str, int]]]:
+        """Map crop-relative landmarks, in [0, 1], to image pixel coordinates"""
+        mapped = {}
+        for row, points in landmarks.items():
+            region = square_boxes(batch.boxes[row], shapes[batch.owners[row]])[0]
+            scale = region[2:] - region[:2]
+            pixels = np.rint(region[:2] + np.asarray(points) * scale).astype(int)
+            mapped[row] = {
+                name: {"x": int(x), "y": int(y)}
+                for name, (x, y) in zip(LANDMARK_NAMES, pixels)
+            }
+        return mapped
+
+    @StageTimer("facial_recognition", "pipeline")
+    async def process(
+        self,
+        images: List[np.ndarray],
+        features: List[Dict[str, Any]],
+        max_results: Sequence[int],
+        match: Optional[
+            Callable[[str, np.ndarray, float], Awaitable[List[Dict[str, Any]]]]
+        ] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Detect and analyze faces in every image of a batch
+
+        ``features`` holds one facial recognition features dict per image.
+        ``match(database_id, embeddings, threshold)`` matches embeddings
+        against a gallery; it is called once per gallery used in the batch.
+
+        Returns one list of face dicts per image, in input order.
+        """
+        loop = asyncio.get_running_loop()
+        batch = await loop.run_in_executor(None, self.detect, images, max_results)
+
+        def wanted(name: str) -> np.ndarray:
+            flags = np.array([bool(f.get(name)) for f in features], dtype=bool)
+            return flags[batch.owners]
+
+        matching = [f.get("matching") or {} for f in features]
+        match_flags = np.array([bool(m.get("enabled")) for m in matching], dtype=bool)
+        wants_match = match_flags[batch.owners]
+
+        landmarks = await loop.run_in_executor(
+            None, self._run_selected, self.landmark_model, batch, wanted("landmarks")
+        )
+        attributes = await loop.run_in_executor(
+            None, self._run_selected, self.attribute_model, batch, wanted("attributes")
+        )
+        embeddings = await loop.run_in_executor(
+            None, self._run_selected, self.embedding_model, batch, wants_match
+        )
+        landmarks = self._landmarks_to_image(
+            batch, landmarks, [image.shape for image in images]
+        )
+
+        # One gallery query per databaseId covers every face matched against it
+        matches: Dict[int, Dict[str, Any]] = {}
+        if match is not None and embeddings:
+            by_gallery: Dict[Tuple[str, float], List[int]] = {}
+            for row in embeddings:
+                config = matching[batch.owners[row]]
+                if config.get("databaseId"):
+                    key = (config["databaseId"], config.get("threshold", 0.8))
+                    by_gallery.setdefault(key, []).append(row)
+            for (database_id, threshold), rows in by_gallery.items():
+                vectors = np.stack([embeddings[row] for row in rows])
+                results = await match(database_id, vectors, threshold)
+                matches.update(zip(rows, results))
+
+        faces: List[List[Dict[str, Any]]] = [[] for _ in images]
+        for row, owner in enumerate(batch.owners.tolist()):
+            x1, y1, x2, y2 = np.rint(batch.boxes[row]).astype(int).tolist()
+            faces[owner].append(
+                {
+                    "boundingBox": {
+                        "topLeft": {"x": x1, "y": y1},
+                        "bottomRight": {"x": x2, "y": y2},
+                    },
+                    "confidence": float(batch.scores[row]),
+                    "landmarks": landmarks.get(row),
+                    "attributes": attributes.get(row),
+                    "matching": matches.get(row),
+                }
+            )
+        return faces
@@ -0,0 +1,62 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+NORMALIZATIONS = ("minmax", "zscore", "none")
+
+
+def normalize_scores(scores: np.ndarray, method: str = "minmax") -> np.ndarray:
+    """Put one collection's scores on a common scale
+
+    ``minmax`` maps scores to [0, 1], ``zscore`` centers them on the mean in
+    units of standard deviation and ``none`` keeps raw scores. A collection
+    whose hits all score the same maps them to 1 (minmax) or 0 (zscore).
+    """
+    if method not in NORMALIZATIONS:
+        raise ValueError(
+            f"Unknown normalization '{method}', expected one of {NORMALIZATIONS}"
+        )
+    scores = np.asarray(scores, dtype=np.float64)
+    if method == "none" or scores.size == 0:
+        return scores
+    if method == "minmax":
+        spread = scores.max() - scores.min()
+        if spread == 0:
+            return np.ones_like(scores)
+        return (scores - scores.min()) / spread
+    std = scores.std()
+    if std == 0:
+        return np.zeros_like(scores)
+    return (scores - scores.mean()) / std
+
+
+def merge_collections(
+    hits_by_collection: Dict[str, List[Dict[str, Any]]],
+    weights: Optional[Dict[str, float]] = None,
+    method: str = "minmax",
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """Merge per-collection ranked hits into one weighted ranking
+
+    Each hit keeps its original score as ``raw_score`` and is tagged with
+    the collection it came from. Collections missing from ``weights`` get a
+    weight of 1.
+    """
+    weights = weights or {}
+    merged: List[Dict[str, Any]] = []
+    for collection, hits in hits_by_collection.items():
+        if not hits:
+            continue
+        normalized = normalize_scores(np.array([hit["score"] for hit in hits]), method)
+        weight = weights.get(collection, 1.0)
+        for hit, score in zip(hits, normalized.tolist()):
+            merged.append(
+                {
+                    **hit,
+                    "collection": collection,
+                    "raw_score": hit["score"],
+                    "score": weight * score,
+                }
+            )
+    merged.sort(key=lambda hit: hit["score"], reverse=True)
+    return merged[:limit]
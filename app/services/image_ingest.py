@@ -0,0 +1,201 @@
+import base64
+import io
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.core.exceptions import APIException
+from app.core.metrics import StageTimer
+
+_base64_timer = StageTimer("ingest", "base64_decode")
+
+
+def to_bytes(data: Union[str, bytes], timer: StageTimer = _base64_timer) -> bytes:
+    """Raw file bytes from bytes or a base64 string, as sent by clients
+
+    Decoding is timed by ``timer``, so each ingest path can report its own
+    base64 cost.
+    """
+    if isinstance(data, bytes):
+        return data
+    start = perf_counter()
+    try:
+        return base64.b64decode(data, validate=True)
+    except ValueError:
+        raise APIException(status_code=400, detail="Content is not base64")
+    finally:
+        timer.since(start)
+
+
+def decode_image(data: Union[str, bytes], max_side: Optional[int] = None) -> np.ndarray:
+    """Decode an image into an RGB uint8 array, at most ``max_side`` pixels wide
+
+    For JPEGs the reduction happens inside the decoder (draft mode decodes at
+    1/2, 1/4 or 1/8 scale), so a 24 MP photo needed at 640 px never exists in
+    memory at full resolution. EXIF orientation is applied.
+    """
+    try:
+        image = Image.open(io.BytesIO(to_bytes(data)))
+        if max_side:
+            # Picks the smallest DCT scale that still covers the requested size
+            image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except APIException:
+        raise
+    except Exception as e:
+        raise APIException(status_code=400, detail=f"Cannot decode image: {str(e)}")
+    if max_side and max(image.size) > max_side:
+        factor = max(image.size) // max_side
+        if factor >= 2:
+            # Integer box reduction is much cheaper than a full resample
+            image = image.reduce(factor)
+        image.thumbnail((max_side, max_side), Image.BILINEAR)
+    return np.asarray(image)
+
+
+def resize_to_max_side(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale an array so its longest side is at most ``max_side``"""
+    height, width = image.shape[:2]
+    if max(height, width) <= max_side:
+        return image
+    scale = max_side / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def scale_image(image: np.ndarray, scale: float) -> np.ndarray:
+    """Resize by a factor, area-averaging down and cubic up"""
+    if scale == 1.0:
+        return image
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    """Single-channel view of an RGB or grayscale array"""
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+def _alignment_scores(xs: np.ndarray, ys: np.ndarray, angles: np.ndarray):
+    """Projection-profile sharpness of ink points rotated by each angle
+
+    All angles are scored at once: points are projected onto every rotated
+    vertical axis and binned into rows, and the sum of squared row counts is
+    largest when text lines collapse into few rows.
+    """
+    radians = np.deg2rad(angles)
+    projected = np.outer(ys, np.cos(radians)) - np.outer(xs, np.sin(radians))
+    rows = np.rint(projected - projected.min(axis=0)).astype(np.int64)
+    width = int(rows.max()) + 1
+    counts = np.bincount(
+        (rows + np.arange(len(angles)) * width).ravel(), minlength=len(angles) * width
+    ).reshape(len(angles), width)
+    return (counts.astype(np.float64) ** 2).sum(axis=1)
+
+
+def estimate_skew(
+    image: np.ndarray, max_angle: float = 15.0, max_points: int = 50000
+) -> float:
+    """Counter-clockwise skew, in degrees, of the text lines in a page image
+
+    Ink is separated with Otsu's threshold on a reduced copy of the page,
+    then the rotation that best aligns it into rows is searched in 1 degree
+    steps and refined in 0.1 degree steps.
+    """
+    gray = resize_to_max_side(to_grayscale(image), 1024)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(ink)
+    if len(xs) < 10:
+        return 0.0
+    if len(xs) > max_points:
+        keep = np.linspace(0, len(xs) - 1, max_points).astype(np.int64)
+        xs, ys = xs[keep], ys[keep]
+    xs = xs - xs.mean()
+    ys = ys - ys.mean()
+
+    coarse = np.arange(-max_angle, max_angle + 0.5, 1.0)
+    best = coarse[np.argmax(_alignment_scores(xs, ys, coarse))]
+    fine = np.arange(best - 1.0, best + 1.05, 0.1)
+    best = fine[np.argmax(_alignment_scores(xs, ys, fine))]
+    # The aligning rotation undoes the skew
+    return float(-best)
+
+
+def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
+    """Rotate counter-clockwise about the center, filling corners from the edge"""
+    if abs(angle) < 0.1:
+        return image
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(
+        image,
+        matrix,
+        (width, height),
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_REPLICATE,
+    )
+
+
+def deskew(image: np.ndarray) -> np.ndarray:
+    """Rotate a page image so its text lines are horizontal"""
+    return rotate_image(image, -estimate_skew(image))
+
+
+def enhance_contrast(image: np.ndarray, clip_limit: float = 2.0) -> np.ndarray:
+    """Local contrast enhancement (CLAHE) on the lightness channel"""
+    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 8))
+    if image.ndim == 2:
+        return clahe.apply(image)
+    lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
+    lab[..., 0] = clahe.apply(lab[..., 0])
+    return cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+
+
+def preprocess_for_ocr(image: np.ndarray, options: Dict[str, Any]) -> np.ndarray:
+    """Apply the OCR ``scale``, ``deskew`` and ``enhanceContrast`` options"""
+    image = to_grayscale(image)
+    if options.get("enhanceContrast"):
+        image = enhance_contrast(image)
+    if options.get("deskew", True):
+        image = deskew(image)
+    return scale_image(image, options.get("scale", 1.0))
+
+
+class ImageIngest:
+    """One uploaded image, decoded once and shared by every feature
+
+    Arrays are cached per request: each requested resolution is decoded (or
+    derived from a larger decode already held) only once, and each distinct
+    set of OCR options is preprocessed only once.
+    """
+
+    def __init__(self, data: Union[str, bytes], max_side: int = 8192):
+        self._data = to_bytes(data)
+        self.max_side = max_side
+        self._arrays: Dict[int, np.ndarray] = {}
+        self._ocr: Dict[Tuple, np.ndarray] = {}
+
+    def array(self, max_side: Optional[int] = None) -> np.ndarray:
+        """RGB array with its longest side at most ``max_side`` pixels"""
+        max_side = min(max_side or self.max_side, self.max_side)
+        if max_side in self._arrays:
+            return self._arrays[max_side]
+        larger = [side for side in self._arrays if side > max_side]
+        if larger:
+            image = resize_to_max_side(self._arrays[min(larger)], max_side)
+        else:
+            image = decode_image(self._data, max_side)
+        self._arrays[max_side] = image
+        return image
+
+    def ocr_input(
+        self, options: Dict[str, Any], max_side: Optional[int] = None
+    ) -> np.ndarray:
+        """Grayscale array preprocessed for OCR with the given options"""
+        key = (max_side, tuple(sorted(options.items())))
+        if key not in self._ocr:
+            self._ocr[key] = preprocess_for_ocr(self.array(max_side), options)
+        return self._ocr[key]
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.ocr_tiling import annotation_bounds
+from app.services.table_extraction import merge_intervals
+
+logger = logging.getLogger(__name__)
+
+# index(documents) embeds and upserts documents as chunks
+Indexer = Callable[[List[Dict[str, Any]]], Awaitable[Any]]
+
+
+def ocr_document(
+    result: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """A text document of an OCR result, one line of text per text line
+
+    Each line is anchored to its character range and bounding box, so chunk
+    hits can point back to the region of the image they came from.
+    """
+    words = [
+        annotation
+        for annotation in result.get("textAnnotations") or []
+        if annotation.get("description", "").strip()
+    ]
+    # Drop page-level aggregates when word annotations are present
+    words = [w for w in words if "\n" not in w["description"]] or words
+    if not words:
+        return None
+
+    bounds = annotation_bounds(words)
+    lines, _, _ = merge_intervals(bounds[:, 1], bounds[:, 3])
+    # Words ordered top to bottom by line, then left to right
+    order = np.lexsort((bounds[:, 0], lines))
+    splits = np.flatnonzero(np.diff(lines[order])) + 1
+    parts: List[str] = []
+    anchors: List[Dict[str, Any]] = []
+    position = 0
+    for members in np.split(order, splits):
+        text = " ".join(words[i]["description"] for i in members)
+        box = bounds[members]
+        anchors.append(
+            {
+                "start_char": position,
+                "end_char": position + len(text),
+                "boundingBox": [
+                    int(box[:, 0].min()),
+                    int(box[:, 1].min()),
+                    int(box[:, 2].max()),
+                    int(box[:, 3].max()),
+                ],
+            }
+        )
+        parts.append(text)
+        position += len(text) + 1
+    return {
+        "id": f"ocr:{result['requestId']}",
+        "content": "\n".join(parts),
+        "source_type": "ocr",
+        "source_id": result["requestId"],
+        "anchors": anchors,
+        "metadata": metadata or {},
+    }
+
+
+def transcript_document(
+    result: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """A text document of a transcription result, anchored by segment times"""
+    segments = [s for s in result.get("segments") or [] if s.get("text", "").strip()]
+    if not segments:
+        return None
+    parts: List[str] = []
+    anchors: List[Dict[str, Any]] = []
+    position = 0
+    for segment in segments:
+        text = segment["text"].strip()
+        anchors.append(
+            {
+                "start_char": position,
+                "end_char": position + len(text),
+                "startTime": segment["startTime"],
+                "endTime": segment["endTime"],
+                "speakerId": segment.get("speakerId"),
+            }
+        )
+        parts.append(text)
+        position += len(text) + 1
+    return {
+        "id": f"transcription:{result['requestId']}",
+        "content": " ".join(parts),
+        "source_type": "transcription",
+        "source_id": result["requestId"],
+        "anchors": anchors,
+        "metadata": metadata or {},
+    }
+
+
+class IndexingPipeline:
+    """Debounced, batched background indexing of finished results
+
+    Endpoints ``submit`` documents from background tasks, off the request
+    path, and never wait for indexing. A single worker takes the first
+    queued document, keeps collecting for up to ``debounce_seconds`` or
+    ``max_batch_size`` documents, and indexes them in one call, so chunks of
+    many jobs share embedding batches and upsert requests. A document
+    submitted again before its batch is indexed replaces the earlier
+    version.
+    """
+
+    def __init__(
+        self,
+        index: Indexer,
+        max_batch_size: int = 64,
+        debounce_seconds: float = 2.0,
+        max_queue_size: int = 10000,
+    ):
+        self.index = index
+        self.max_batch_size = max_batch_size
+        self.debounce_seconds = debounce_seconds
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the worker; call from the running event loop"""
+        if self._worker is None:
+            self._queue = asyncio.Queue(self.max_queue_size)
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Index whatever is queued, then stop the worker"""
+        if self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+    async def submit(self, documents: List[Optional[Dict[str, Any]]]) -> int:
+        """Queue documents for indexing; returns how many were accepted
+
+        Never waits for queue space: when the queue is full the documents
+        are dropped and logged rather than slowing the caller down.
+        """
+        if self._worker is None:
+            logger.warning("Indexing pipeline is not running; documents dropped")
+            return 0
+        accepted = 0
+        for document in documents:
+            if document is None:
+                continue
+            try:
+                self._queue.put_nowait(document)
+                accepted += 1
+            except asyncio.QueueFull:
+                logger.warning(f"Indexing queue full; dropped {document['id']}")
+        return accepted
+
+    async def submit_ocr(
+        self, results: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Queue finished OCR results"""
+        return await self.submit([ocr_document(result, metadata) for result in results])
+
+    async def submit_transcriptions(
+        self, results: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Queue finished transcription results"""
+        return await self.submit(
+            [transcript_document(result, metadata) for result in results]
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            document = await self._queue.get()
+            if document is None:
+                return
+            batch = {document["id"]: document}
+            deadline = loop.time() + self.debounce_seconds
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    document = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if document is None:
+                    stopping = True
+                    break
+                batch[document["id"]] = document
+            await self._flush(list(batch.values()))
+
+    async def _flush(self, documents: List[Dict[str, Any]]):
+        try:
+            await self.index(documents)
+            logger.info(f"Indexed {len(documents)} result documents")
+        except Exception as e:
+            # A failed batch must not stop the worker
+            logger.error(f"Error indexing {len(documents)} documents: {str(e)}")
@@ -0,0 +1,261 @@
+import asyncio
+import heapq
+import logging
+import math
+import re
+from collections import Counter
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+# scroll(collection, filter) -> every chunk payload matching the filter
+ChunkScroller = Callable[[str, Optional[Dict[str, Any]]], AsyncIterator[Dict[str, Any]]]
+
+# Keeps identifiers such as "INV-4471.b" or "covid-19" as single terms
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a text and split it into lexical terms"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-process inverted index with Okapi BM25 scoring
+
+    Documents are added and removed incrementally; re-adding a document id
+    replaces its previous postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any earlier version of it"""
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def candidates(self, query: str) -> Set[str]:
+        """Ids of documents containing at least one query term"""
+        matched: Set[str] = set()
+        for term in set(tokenize(query)):
+            matched.update(self._postings.get(term, ()))
+        return matched
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return the ``limit`` best (doc_id, score) pairs for a query"""
+        n_docs = len(self._doc_terms)
+        if not n_docs:
+            return []
+        avg_length = self._total_length / n_docs
+
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, frequency in postings.items():
+                length = self._doc_lengths[doc_id]
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                    frequency * (self.k1 + 1) / (frequency + norm)
+                )
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class LexicalIndexUnavailable(Exception):
+    """A collection's lexical index is still loading or was disabled"""
+
+
+def stitch_chunks(chunks: Sequence[Dict[str, Any]]) -> str:
+    """Rebuild a document's text from its overlapping chunk payloads"""
+    parts: List[str] = []
+    end = 0
+    for chunk in sorted(chunks, key=lambda chunk: chunk["chunk_index"]):
+        text = chunk["data"]["content"]
+        start = chunk["start_char"]
+        if start < end:
+            # Skip the part already covered by the previous chunk
+            text = text[end - start :]
+        elif start > end and parts:
+            parts.append(" ")
+        parts.append(text)
+        end = max(end, chunk["end_char"])
+    return "".join(parts)
+
+
+class LexicalIndexes:
+    """BM25 index per collection, rebuilt from and kept in sync with Qdrant
+
+    Every worker builds its indexes from the chunk payloads stored in
+    Qdrant, then polls for chunks written (by any worker) since its last
+    sync, so restarts and multi-worker deployments search the same corpus.
+    Chunks are matched by their ``indexed_at`` payload; each poll re-reads
+    one extra ``refresh_seconds`` to tolerate clock skew between workers.
+
+    A collection whose corpus outgrows ``max_documents`` is dropped from
+    lexical search rather than served from a partial index.
+    """
+
+    def __init__(
+        self,
+        scroll: ChunkScroller,
+        collections: Sequence[str],
+        max_documents: int = 200000,
+        refresh_seconds: float = 30.0,
+    ):
+        self.scroll = scroll
+        self.collections = tuple(collections)
+        self.max_documents = max_documents
+        self.refresh_seconds = refresh_seconds
+        self._indexes: Dict[str, BM25Index] = {}
+        self._watermarks: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, collection: str) -> BM25Index:
+        """The index of a collection
+
+        Raises ``ValueError`` for a collection without lexical search and
+        ``LexicalIndexUnavailable`` while it loads or once it was disabled.
+        """
+        if collection not in self.collections:
+            raise ValueError(
+                f"Lexical search is not enabled for collection '{collection}'"
+            )
+        index = self._indexes.get(collection)
+        if index is None:
+            raise LexicalIndexUnavailable(
+                self._errors.get(
+                    collection, f"Lexical index of '{collection}' is still loading"
+                )
+            )
+        return index
+
+    def add(self, collection: str, doc_id: str, text: str):
+        """Index a document written by this worker without waiting for a sync"""
+        index = self._indexes.get(collection)
+        if index is None:
+            # Not built yet; the build reads the document from Qdrant
+            return
+        if doc_id not in index and len(index) >= self.max_documents:
+            self._disable(collection)
+            return
+        index.add(doc_id, text)
+
+    async def sync(self, collection: str):
+        """Index chunks written since the last sync; the first sync builds all"""
+        since = self._watermarks.get(collection)
+        scroll_filter = None
+        if since is not None:
+            scroll_filter = {
+                "must": [
+                    {
+                        "key": "indexed_at",
+                        "range": {"gte": since - self.refresh_seconds},
+                    }
+                ]
+            }
+        chunks: Dict[str, List[Dict[str, Any]]] = {}
+        watermark = since or 0.0
+        async for point in self.scroll(collection, scroll_filter):
+            if point.get("parent_id") is None or "chunk_index" not in point:
+                continue
+            chunks.setdefault(point["parent_id"], []).append(point)
+            watermark = max(watermark, point.get("indexed_at") or 0.0)
+
+        index = self._indexes.get(collection) if since is not None else BM25Index()
+        for doc_id, parts in chunks.items():
+            if doc_id not in index and len(index) >= self.max_documents:
+                self._disable(collection)
+                return
+            index.add(doc_id, stitch_chunks(parts))
+        self._indexes[collection] = index
+        self._watermarks[collection] = watermark
+
+    def _disable(self, collection: str):
+        self._indexes.pop(collection, None)
+        self._errors[collection] = (
+            f"Lexical index of '{collection}' exceeds {self.max_documents} "
+            "documents and is disabled"
+        )
+        logger.error(self._errors[collection])
+
+    async def start(self):
+        """Build the indexes in the background, then keep them in sync"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            for collection in self.collections:
+                if collection in self._errors:
+                    continue
+                try:
+                    await self.sync(collection)
+                except Exception as e:
+                    # Keep the last good index and retry on the next poll
+                    logger.error(f"Error syncing lexical index of {collection}: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists by reciprocal rank fusion, best first"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,207 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.metrics import StageTimer
+from app.services.audio_streaming import Transcriber, format_timestamp, frame_energy
+
+# Bytes per sample of each supported raw PCM encoding
+SAMPLE_WIDTHS = {"pcm_s16le": 2, "pcm_f32le": 4}
+ENCODINGS = tuple(SAMPLE_WIDTHS)
+
+
+def decode_pcm(frame: bytes, encoding: str = "pcm_s16le", channels: int = 1):
+    """Raw little-endian PCM bytes to mono float32 samples in [-1, 1]
+
+    ``frame`` must hold whole samples of every channel; ``PcmDecoder`` keeps
+    the remainder of arbitrarily split messages. Raises ValueError on
+    anything that is not valid PCM of the given layout.
+    """
+    if encoding not in SAMPLE_WIDTHS:
+        raise ValueError(f"Unknown encoding '{encoding}', expected one of {ENCODINGS}")
+    if channels < 1:
+        raise ValueError("audioChannels must be at least 1")
+    if len(frame) % (SAMPLE_WIDTHS[encoding] * channels):
+        raise ValueError("PCM data must hold whole samples of every channel")
+    if encoding == "pcm_s16le":
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+    else:
+        # Already float32: view the frame's bytes instead of copying them
+        samples = np.frombuffer(frame, dtype="<f4")
+        if not np.isfinite(samples).all():
+            raise ValueError("pcm_f32le samples must be finite")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+class PcmDecoder:
+    """Decodes one stream's PCM messages, however they split the samples
+
+    Clients may cut a message anywhere, even inside a sample or between the
+    channels of one frame; the trailing partial frame is kept and prefixed
+    to the next message instead of being dropped or misaligning the rest of
+    the stream.
+    """
+
+    def __init__(self, encoding: str = "pcm_s16le", channels: int = 1):
+        # Validates the layout up front, before any audio arrives
+        decode_pcm(b"", encoding, channels)
+        self.encoding = encoding
+        self.channels = channels
+        self.frame_bytes = SAMPLE_WIDTHS[encoding] * channels
+        self._leftover = b""
+
+    def decode(self, message: bytes) -> np.ndarray:
+        """Samples of every whole frame received so far and not yet returned"""
+        data = self._leftover + message
+        whole = len(data) - len(data) % self.frame_bytes
+        self._leftover = data[whole:]
+        return decode_pcm(data[:whole], self.encoding, self.channels)
+
+
+class LiveTranscriptionSession:
+    """Rolling-buffer transcription of one live audio stream
+
+    Incoming audio is split into 30 ms frames and classified by energy
+    against an adaptive noise floor. Speech accumulates in the utterance
+    buffer; every ``interim_seconds`` of new speech yields an interim
+    segment, and ``silence_seconds`` of trailing silence (or an utterance
+    reaching ``max_utterance_seconds``) yields a final one and clears the
+    buffer. Only the current utterance is kept in memory.
+    """
+
+    def __init__(
+        self,
+        transcribe: Transcriber,
+        sample_rate: int = 16000,
+        interim_seconds: float = 1.0,
+        silence_seconds: float = 0.6,
+        max_utterance_seconds: float = 15.0,
+        frame_ms: int = 30,
+    ):
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.frame_length = max(int(sample_rate * frame_ms / 1000), 1)
+        self.interim_frames = max(int(interim_seconds * 1000 / frame_ms), 1)
+        self.silence_frames = max(int(silence_seconds * 1000 / frame_ms), 1)
+        self.max_frames = max(int(max_utterance_seconds * 1000 / frame_ms), 1)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._utterance: List[np.ndarray] = []
+        self._utterance_start = 0
+        self._frames_seen = 0
+        self._silent_run = 0
+        self._since_interim = 0
+        self._noise_floor = 1e-3
+        self._interim: Optional[asyncio.Task] = None
+
+    def _is_speech(self, energy: np.ndarray) -> np.ndarray:
+        """Classify frames, adapting the noise floor on quiet ones"""
+        speech = np.zeros(len(energy), dtype=bool)
+        for i, value in enumerate(energy.tolist()):
+            speech[i] = value > max(3.0 * self._noise_floor, 1e-3)
+            if not speech[i]:
+                self._noise_floor = 0.95 * self._noise_floor + 0.05 * value
+        return speech
+
+    @StageTimer("transcription", "segment")
+    async def _segment(
+        self, audio: np.ndarray, start: float, final: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Transcribe utterance audio into a segment event"""
+        words = await self.transcribe(audio, self.sample_rate)
+        if not words:
+            return None
+        confidence = float(np.mean([w.get("confidence", 0.0) for w in words]))
+        return {
+            "type": "final" if final else "interim",
+            "segment": {
+                "text": " ".join(w["word"] for w in words),
+                "startTime": format_timestamp(start),
+                "endTime": format_timestamp(start + len(audio) / self.sample_rate),
+                "confidence": confidence,
+            },
+        }
+
+    async def feed(self, samples: np.ndarray) -> List[Dict[str, Any]]:
+        """Add audio; return the final segments it completed
+
+        Interim segments are produced in the background; collect them with
+        ``interim``.
+        """
+        samples = np.concatenate([self._pending, samples])
+        n_frames = len(samples) // self.frame_length
+        self._pending = samples[n_frames * self.frame_length :]
+        frames = samples[: n_frames * self.frame_length]
+        speech = self._is_speech(frame_energy(frames, self.frame_length))
+
+        events = []
+        for i, is_speech in enumerate(speech.tolist()):
+            frame = frames[i * self.frame_length : (i + 1) * self.frame_length]
+            position = (self._frames_seen + i) * self.frame_length
+            if not self._utterance:
+                if not is_speech:
+                    continue
+                self._utterance_start = position
+            self._utterance.append(frame)
+            self._silent_run = 0 if is_speech else self._silent_run + 1
+            self._since_interim += 1
+
+            if (
+                self._silent_run >= self.silence_frames
+                or len(self._utterance) >= self.max_frames
+            ):
+                event = await self._finalize()
+                if event is not None:
+                    events.append(event)
+            elif self._since_interim >= self.interim_frames and (
+                self._interim is None or self._interim.done()
+            ):
+                # At most one interim transcription in flight per stream
+                self._since_interim = 0
+                self._interim = asyncio.ensure_future(
+                    self._segment(*self._snapshot(), final=False)
+                )
+        self._frames_seen += n_frames
+        return events
+
+    def _snapshot(self):
+        """Audio and start time, in seconds, of the current utterance"""
+        return (
+            np.concatenate(self._utterance),
+            self._utterance_start / self.sample_rate,
+        )
+
+    async def _finalize(self) -> Optional[Dict[str, Any]]:
+        """Emit the final segment of the current utterance and reset"""
+        if self._interim is not None and not self._interim.done():
+            self._interim.cancel()
+        self._interim = None
+        # Drop the trailing silence
+        if self._silent_run:
+            self._utterance = self._utterance[: -self._silent_run] or []
+        event = (
+            await self._segment(*self._snapshot(), final=True)
+            if self._utterance
+            else None
+        )
+        self._utterance = []
+        self._silent_run = 0
+        self._since_interim = 0
+        return event
+
+    def interim(self) -> Optional[Dict[str, Any]]:
+        """The finished interim segment, if one is ready"""
+        if self._interim is None or not self._interim.done():
+            return None
+        task, self._interim = self._interim, None
+        if task.cancelled() or task.exception() is not None:
+            return None
+        return task.result()
+
+    async def close(self) -> List[Dict[str, Any]]:
+        """Flush the stream, finalizing any utterance in progress"""
+        event = await self._finalize()
+        return [event] if event is not None else []
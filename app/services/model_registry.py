@@ -0,0 +1,321 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+from qdrant_client.models import Distance
+from transformers import AutoConfig
+
+from app.core.metrics import StageTimer, batch_size_observer
+from app.services.audio_ingest import AudioBuffer, decode_audio, resample
+from app.services.image_ingest import decode_image, to_bytes
+from app.services.text_encoder import DEFAULT_TEXT_MODEL, TextEncoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_MODEL = "openai/clip-vit-base-patch32"
+DEFAULT_AUDIO_MODEL = "laion/clap-htsat-unfused"
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class Encoder(ABC):
+    """Batched encoder for one modality, loaded on first use
+
+    Subclasses implement ``_load`` and ``_encode_batch``. ``encode`` splits
+    its input into micro-batches of at most ``max_batch_size`` items, so
+    decoded inputs and activations are bounded by the batch rather than the
+    call, and returns one L2-normalized float32 row per item.
+    """
+
+    # Collections of this modality are created with this distance
+    distance = Distance.COSINE
+    # Label of this encoder's batch size metrics
+    modality = "generic"
+
+    def __init__(self, model_name: str, max_batch_size: int = 32):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self._observe_batch = batch_size_observer(self.modality)
+        self._dimension: Optional[int] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        """Vector size, read from the model config without loading weights"""
+        if self._dimension is None:
+            self._dimension = self._config_dimension()
+        return self._dimension
+
+    def _config_dimension(self) -> int:
+        return AutoConfig.from_pretrained(self.model_name).projection_dim
+
+    def load(self):
+        """Load the model weights once, even when called from several threads"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+                logger.info(f"Loaded {type(self).__name__}: {self.model_name}")
+
+    @abstractmethod
+    def _load(self):
+        """Load the model weights"""
+
+    @abstractmethod
+    def _encode_batch(self, items: Sequence[Any]) -> np.ndarray:
+        """Encode one micro-batch into an (n, dimension) array"""
+
+    def encode(self, items: Sequence[Any]) -> np.ndarray:
+        """Encode items into an (n, dimension) array of unit vectors"""
+        self.load()
+        embeddings = np.empty((len(items), self.dimension), dtype=np.float32)
+        for start in range(0, len(items), self.max_batch_size):
+            batch = items[start : start + self.max_batch_size]
+            self._observe_batch(len(batch))
+            embeddings[start : start + len(batch)] = self._encode_batch(batch)
+        return normalize(embeddings)
+
+    def encode_text(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed text queries into this encoder's vector space"""
+        raise ValueError(f"{type(self).__name__} cannot embed text queries")
+
+
+class TextModelEncoder(Encoder):
+    """Sentence embeddings from ``TextEncoder``
+
+    ``TextEncoder`` already schedules token-budgeted, length-bucketed
+    batches, so ``encode`` hands it the whole input.
+    """
+
+    # Vectors are L2-normalized, so a dot product ranks exactly like cosine
+    # without the per-comparison norm math
+    distance = Distance.DOT
+    modality = "text"
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_TEXT_MODEL,
+        backend: str = "eager",
+        token_budget: int = 8192,
+        max_batch_size: int = 64,
+        model_dir: str = "models",
+    ):
+        super().__init__(model_name, max_batch_size)
+        self.backend = backend
+        self.token_budget = token_budget
+        self.model_dir = model_dir
+        self.model: Optional[TextEncoder] = None
+
+    def _config_dimension(self) -> int:
+        return AutoConfig.from_pretrained(self.model_name).hidden_size
+
+    def _load(self):
+        self.model = TextEncoder(
+            self.model_name,
+            backend=self.backend,
+            token_budget=self.token_budget,
+            max_batch_size=self.max_batch_size,
+            model_dir=self.model_dir,
+        )
+
+    def _encode_batch(self, items: Sequence[Any]) -> np.ndarray:
+        return self.model.encode(list(items))
+
+    def encode(self, items: Sequence[Any]) -> np.ndarray:
+        self.load()
+        return self._encode_batch(items)
+
+    def encode_text(self, texts: Sequence[str]) -> np.ndarray:
+        return self.encode(texts)
+
+
+class ClipImageEncoder(Encoder):
+    """CLIP image embeddings
+
+    Items may be raw or base64-encoded image files, which are decoded at no
+    more than ``max_side`` pixels, or RGB arrays (uint8, or float in [0, 1]
+    such as video frames).
+    """
+
+    modality = "image"
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_IMAGE_MODEL,
+        max_batch_size: int = 32,
+        max_side: int = 448,
+    ):
+        super().__init__(model_name, max_batch_size)
+        self.max_side = max_side
+
+    def _load(self):
+        from transformers import CLIPModel, CLIPProcessor
+
+        self.processor = CLIPProcessor.from_pretrained(self.model_name)
+        self.model = CLIPModel.from_pretrained(self.model_name).eval()
+
+    def _image(self, item: Any) -> np.ndarray:
+        if not isinstance(item, np.ndarray):
+            return decode_image(item, self.max_side)
+        if item.dtype != np.uint8:
+            return (np.clip(item, 0.0, 1.0) * 255).astype(np.uint8)
+        return item
+
+    def _encode_batch(self, items: Sequence[Any]) -> np.ndarray:
+        images = [self._image(item) for item in items]
+        inputs = self.processor(images=images, return_tensors="pt")
+        with torch.inference_mode():
+            return self.model.get_image_features(**inputs).numpy()
+
+    def encode_text(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts with the CLIP text tower, into the image space"""
+        self.load()
+        inputs = self.processor(
+            text=list(texts), return_tensors="pt", padding=True, truncation=True
+        )
+        with torch.inference_mode():
+            return normalize(self.model.get_text_features(**inputs).numpy())
+
+
+class ClapAudioEncoder(Encoder):
+    """CLAP audio embeddings
+
+    Items may be raw or base64-encoded audio files, ``AudioBuffer``s, or
+    mono float32 arrays already at the model's sample rate.
+    """
+
+    modality = "audio"
+
+    def __init__(self, model_name: str = DEFAULT_AUDIO_MODEL, max_batch_size: int = 32):
+        super().__init__(model_name, max_batch_size)
+        self.sample_rate = 48000
+
+    def _load(self):
+        from transformers import ClapModel, ClapProcessor
+
+        self.processor = ClapProcessor.from_pretrained(self.model_name)
+        self.model = ClapModel.from_pretrained(self.model_name).eval()
+        self.sample_rate = self.processor.feature_extractor.sampling_rate
+
+    def _samples(self, item: Any) -> np.ndarray:
+        if isinstance(item, np.ndarray):
+            return item
+        if isinstance(item, AudioBuffer):
+            return resample(item.samples, item.sample_rate, self.sample_rate)
+        samples, rate = decode_audio(to_bytes(item))
+        return resample(samples, rate, self.sample_rate)
+
+    def _encode_batch(self, items: Sequence[Any]) -> np.ndarray:
+        inputs = self.processor(
+            audios=[self._samples(item) for item in items],
+            sampling_rate=self.sample_rate,
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            return self.model.get_audio_features(**inputs).numpy()
+
+    def encode_text(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts with the CLAP text tower, into the audio space"""
+        self.load()
+        inputs = self.processor(
+            text=list(texts), return_tensors="pt", padding=True, truncation=True
+        )
+        with torch.inference_mode():
+            return normalize(self.model.get_text_features(**inputs).numpy())
+
+
+class ModelRegistry:
+    """Modality -> encoder, each loading its weights on first use
+
+    Supporting a new modality means registering an ``Encoder`` for it; its
+    collection, vector size and batched encoding follow from the registry.
+    """
+
+    def __init__(self, encoders: Optional[Dict[str, Encoder]] = None):
+        self._encoders: Dict[str, Encoder] = {}
+        self._timers: Dict[str, StageTimer] = {}
+        for modality, encoder in (encoders or {}).items():
+            self.register(modality, encoder)
+
+    @classmethod
+    def default(
+        cls,
+        text_encoder_backend: str = "eager",
+        embedding_token_budget: int = 8192,
+        image_model: str = DEFAULT_IMAGE_MODEL,
+        audio_model: str = DEFAULT_AUDIO_MODEL,
+        max_batch_size: int = 32,
+        text_model: str = DEFAULT_TEXT_MODEL,
+        model_dir: str = "models",
+    ) -> "ModelRegistry":
+        """Text, CLIP image and CLAP audio encoders; video uses CLIP frames"""
+        image = ClipImageEncoder(image_model, max_batch_size)
+        return cls(
+            {
+                "text": TextModelEncoder(
+                    text_model,
+                    backend=text_encoder_backend,
+                    token_budget=embedding_token_budget,
+                    model_dir=model_dir,
+                ),
+                "image": image,
+                "audio": ClapAudioEncoder(audio_model, max_batch_size),
+                "video": image,
+            }
+        )
+
+    @property
+    def modalities(self) -> List[str]:
+        return list(self._encoders)
+
+    def register(self, modality: str, encoder: Encoder):
+        """Add or replace the encoder of a modality"""
+        self._encoders[modality] = encoder
+        self._timers[modality] = StageTimer("embedding", modality)
+
+    def get(self, modality: str) -> Encoder:
+        try:
+            return self._encoders[modality]
+        except KeyError:
+            raise ValueError(f"No encoder registered for modality '{modality}'")
+
+    def encode(self, modality: str, items: Sequence[Any]) -> np.ndarray:
+        """Encode a batch of items of one modality"""
+        encoder = self.get(modality)
+        timer = self._timers[modality]
+        start = perf_counter()
+        try:
+            return encoder.encode(items)
+        except Exception:
+            timer.error()
+            raise
+        finally:
+            timer.since(start)
+
+    def encode_text(self, modality: str, texts: Sequence[str]) -> np.ndarray:
+        """Embed text queries into the vector space of a modality"""
+        encoder = self.get(modality)
+        timer = self._timers[modality]
+        start = perf_counter()
+        try:
+            return encoder.encode_text(texts)
+        except Exception:
+            timer.error()
+            raise
+        finally:
+            timer.since(start)
+
+    def dimensions(self) -> Dict[str, int]:
+        """Vector size of every modality"""
+        return {
+            modality: encoder.dimension for modality, encoder in self._encoders.items()
+        }
@@ -0,0 +1,333 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from app.core.cache import RedisCache
+from app.core.metrics import StageTimer
+from app.services.image_ingest import resize_to_max_side, to_bytes
+
+_base64_timer = StageTimer("ocr", "base64_decode")
+
+# recognize(image) -> TextAnnotation dicts in the image's pixel coordinates
+Recognizer = Callable[[np.ndarray], List[Dict[str, Any]]]
+PageCallback = Callable[[int, List[Dict[str, Any]]], Awaitable[None]]
+
+
+@dataclass
+class Tile:
+    """A region of a page, and which of its edges border another tile"""
+
+    x: int
+    y: int
+    width: int
+    height: int
+    # left, top, right, bottom
+    inner_edges: tuple
+
+
+def _starts(length: int, tile: int, overlap: int) -> List[int]:
+    """Tile offsets along one axis, the last one flush with the end"""
+    if length <= tile:
+        return [0]
+    step = tile - overlap
+    starts = list(range(0, length - tile, step))
+    return starts + [length - tile]
+
+
+def plan_tiles(height: int, width: int, tile_size: int, overlap: int) -> List[Tile]:
+    """Cover a page with ``tile_size`` squares overlapping by ``overlap`` px
+
+    The overlap must exceed the largest word or line expected, so that
+    anything cut by one tile's edge lies whole inside its neighbour.
+    """
+    overlap = min(overlap, tile_size // 2)
+    xs = _starts(width, tile_size, overlap)
+    ys = _starts(height, tile_size, overlap)
+    tiles = []
+    for y in ys:
+        for x in xs:
+            tiles.append(
+                Tile(
+                    x=x,
+                    y=y,
+                    width=min(tile_size, width - x),
+                    height=min(tile_size, height - y),
+                    inner_edges=(x > 0, y > 0, x < xs[-1], y < ys[-1]),
+                )
+            )
+    return tiles
+
+
+def count_pages(data: Union[str, bytes]) -> int:
+    """Number of pages (frames) of an image file, read from its header"""
+    with Image.open(io.BytesIO(to_bytes(data, _base64_timer))) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def load_pages(data: Union[str, bytes], max_side: int = 8192) -> Iterator[np.ndarray]:
+    """Decode the pages (frames) of a multi-page TIFF, GIF or single image
+
+    Pages are decoded one at a time as the iterator advances, so only the
+    pages being worked on are held in memory.
+    """
+    with Image.open(io.BytesIO(to_bytes(data, _base64_timer))) as image:
+        for frame in ImageSequence.Iterator(image):
+            yield resize_to_max_side(np.asarray(frame.convert("L")), max_side)
+
+
+def annotation_bounds(annotations: List[Dict[str, Any]]) -> np.ndarray:
+    """Axis-aligned (x1, y1, x2, y2) bounds of each annotation's polygon"""
+    bounds = np.zeros((len(annotations), 4), dtype=np.float64)
+    for i, annotation in enumerate(annotations):
+        vertices = annotation["boundingPoly"]["vertices"]
+        xs = [vertex["x"] for vertex in vertices]
+        ys = [vertex["y"] for vertex in vertices]
+        bounds[i] = (min(xs), min(ys), max(xs), max(ys))
+    return bounds
+
+
+def recognize_tile(
+    recognize: Recognizer, image: np.ndarray, tile: Tile, margin: int = 2
+) -> List[Dict[str, Any]]:
+    """Run OCR on one tile and return annotations in page coordinates
+
+    Annotations touching an edge shared with another tile are dropped: the
+    text there was cut by the tile boundary and the neighbouring tile sees it
+    whole inside the overlap.
+    """
+    annotations = recognize(image)
+    if not annotations:
+        return []
+    bounds = annotation_bounds(annotations)
+    left, top, right, bottom = tile.inner_edges
+    cut = (
+        (left & (bounds[:, 0] <= margin))
+        | (top & (bounds[:, 1] <= margin))
+        | (right & (bounds[:, 2] >= tile.width - 1 - margin))
+        | (bottom & (bounds[:, 3] >= tile.height - 1 - margin))
+    )
+    kept = []
+    for annotation, is_cut in zip(annotations, cut.tolist()):
+        if is_cut:
+            continue
+        vertices = [
+            {"x": vertex["x"] + tile.x, "y": vertex["y"] + tile.y}
+            for vertex in annotation["boundingPoly"]["vertices"]
+        ]
+        kept.append({**annotation, "boundingPoly": {"vertices": vertices}})
+    return kept
+
+
+def deduplicate(
+    annotations: List[Dict[str, Any]],
+    tiles: Optional[List[int]] = None,
+    containment: float = 0.6,
+) -> List[Dict[str, Any]]:
+    """Drop annotations read twice where tiles overlap
+
+    Annotations are visited by descending confidence; one is dropped when an
+    already kept annotation from another tile covers at least
+    ``containment`` of its area. ``tiles`` gives each annotation's tile;
+    without it every annotation counts as its own tile.
+    """
+    if len(annotations) < 2:
+        return annotations
+    sources = np.asarray(tiles if tiles is not None else range(len(annotations)))
+    bounds = annotation_bounds(annotations)
+    areas = np.maximum(bounds[:, 2] - bounds[:, 0], 1) * np.maximum(
+        bounds[:, 3] - bounds[:, 1], 1
+    )
+    confidence = np.array([a.get("confidence") or 0.0 for a in annotations])
+    order = np.lexsort((-areas, -confidence))
+
+    kept: List[int] = []
+    for i in order.tolist():
+        if kept:
+            other = bounds[kept]
+            width = np.minimum(other[:, 2], bounds[i, 2]) - np.maximum(
+                other[:, 0], bounds[i, 0]
+            )
+            height = np.minimum(other[:, 3], bounds[i, 3]) - np.maximum(
+                other[:, 1], bounds[i, 1]
+            )
+            overlap = np.clip(width, 0, None) * np.clip(height, 0, None)
+            duplicate = (overlap >= containment * areas[i]) & (
+                sources[kept] != sources[i]
+            )
+            if duplicate.any():
+                continue
+        kept.append(i)
+    # Reading order: top to bottom, then left to right
+    kept.sort(key=lambda i: (bounds[i, 1], bounds[i, 0]))
+    return [annotations[i] for i in kept]
+
+
+class TiledOCR:
+    """Page- and tile-parallel OCR for large and multi-page documents
+
+    Every tile of every page is recognized in a process pool; tiles of a
+    page are merged back into page coordinates and de-duplicated along the
+    seams. ``recognize`` must be a picklable, module-level function.
+
+    At most ``max_pages`` pages are decoded or in flight at once, so memory
+    stays bounded however many pages a document has.
+    """
+
+    def __init__(
+        self,
+        recognize: Recognizer,
+        tile_size: int = 2048,
+        overlap: int = 128,
+        max_workers: Optional[int] = None,
+        max_pages: int = 4,
+    ):
+        self.recognize = recognize
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Worker processes, started on first use"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    @StageTimer("ocr", "page")
+    async def _process_page(self, page: np.ndarray) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        tiles = plan_tiles(page.shape[0], page.shape[1], self.tile_size, self.overlap)
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self.pool,
+                    recognize_tile,
+                    self.recognize,
+                    np.ascontiguousarray(
+                        page[
+                            tile.y : tile.y + tile.height,
+                            tile.x : tile.x + tile.width,
+                        ]
+                    ),
+                    tile,
+                )
+                for tile in tiles
+            )
+        )
+        merged = [annotation for result in results for annotation in result]
+        if len(tiles) == 1:
+            return merged
+        sources = [i for i, result in enumerate(results) for _ in result]
+        return deduplicate(merged, sources)
+
+    async def process(
+        self, pages: Iterable[np.ndarray], on_page: Optional[PageCallback] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Recognize pages in parallel, returning annotations per page
+
+        ``pages`` may be a lazy iterator such as ``load_pages``; the next page
+        is only decoded, off the event loop, once one of the ``max_pages``
+        slots is free. ``on_page(index, annotations)`` is awaited as each page
+        finishes, in completion order, so partial results can be published
+        early.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = iter(pages)
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        running: Dict[asyncio.Future, int] = {}
+        try:
+            index = 0
+            exhausted = False
+            while running or not exhausted:
+                while not exhausted and len(running) < self.max_pages:
+                    page = await loop.run_in_executor(None, next, iterator, None)
+                    if page is None:
+                        exhausted = True
+                        break
+                    running[asyncio.ensure_future(self._process_page(page))] = index
+                    index += 1
+                if not running:
+                    break
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    page_index = running.pop(task)
+                    results[page_index] = task.result()
+                    if on_page is not None:
+                        await on_page(page_index, results[page_index])
+        finally:
+            for task in running:
+                task.cancel()
+        return [results[i] for i in range(len(results))]
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class PageProgress:
+    """Per-page OCR results of a request, published for the status endpoint
+
+    A request is one Redis hash: its page count plus one field per finished
+    page, so publishing a page writes only that page.
+    """
+
+    def __init__(self, cache: RedisCache, expire: int = 3600):
+        self.cache = cache
+        self.expire = expire
+
+    @staticmethod
+    def _key(request_id: str) -> str:
+        return f"ocr:pages:{request_id}"
+
+    async def start(self, request_id: str, page_count: int):
+        """Record a new request with no finished pages"""
+        await self.cache.hset(
+            self._key(request_id), "pageCount", page_count, self.expire
+        )
+
+    async def add_page(
+        self, request_id: str, index: int, annotations: List[Dict[str, Any]]
+    ):
+        """Publish one finished page"""
+        await self.cache.hset(
+            self._key(request_id), f"page:{index}", annotations, self.expire
+        )
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Status, progress in [0, 1] and the finished pages of a request"""
+        fields = await self.cache.hgetall(self._key(request_id))
+        if fields is None:
+            return None
+        pages = {
+            field.split(":", 1)[1]: annotations
+            for field, annotations in fields.items()
+            if field.startswith("page:")
+        }
+        page_count = fields.get("pageCount", len(pages))
+        return {
+            "status": "completed" if len(pages) >= page_count else "processing",
+            "pageCount": page_count,
+            "pages": pages,
+            "progress": len(pages) / max(page_count, 1),
+        }
@@ -1,14 +1,22 @@
+import asyncio
 import base64
+import functools
 import io
 import logging
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 
 import numpy as np
 from PIL import Image
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from qdrant_client.models import Distance, VectorParams
-from transformers import AutoModel, AutoTokenizer
+from qdrant_client.models import VectorParams
+
+from app.core.metrics import StageTimer
+from app.core.qdrant import get_qdrant_client
+from app.services.change_log import ChangeLog
+from app.services.model_registry import ModelRegistry
+from app.services.query_planner import QueryPlanner
+from app.services.text_encoder import TextEncoder
+from app.services.video_ingest import VideoEmbedding, VideoIngest, shot_points
 
 logger = logging.getLogger(__name__)
 
@@ -16,76 +24,273 @@ logger = logging.getLogger(__name__)
 class QdrantHandler:
     """Handler for multimodal data vectorization and storage in Qdrant"""
 
-    def __init__(self, qdrant_url: str = "http://localhost:6333"):
-        self.client = QdrantClient(url=qdrant_url)
-        self._initialize_models()
-        self._create_collections()
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        text_encoder_backend: str = "eager",
+        embedding_token_budget: int = 8192,
+        payload_indexes: Optional[Dict[str, Dict[str, str]]] = None,
+        exact_search_threshold: int = 10000,
+        retired_payload_indexes: Optional[Dict[str, List[str]]] = None,
+        video_ingest: Optional[VideoIngest] = None,
+        registry: Optional[ModelRegistry] = None,
+        change_log: Optional[ChangeLog] = None,
+    ):
+        # Shared async client; collections are created by ``initialize``
+        self.client = client or get_qdrant_client()
+        registry = registry or ModelRegistry.default(
+            text_encoder_backend, embedding_token_budget
+        )
+        self._initialize_models(registry)
+        if video_ingest is None and "video" in self.registry.modalities:
+            video_ingest = VideoIngest(self.registry.get("video").encode)
+        self.video_ingest = video_ingest
+        self.payload_indexes = payload_indexes or {}
+        self.retired_payload_indexes = retired_payload_indexes or {}
+        # Writes are logged here while their collection is being reindexed
+        self.change_log = change_log
+        self.planner = QueryPlanner(
+            self.client, self.payload_indexes, exact_search_threshold
+        )
+
+    async def initialize(self):
+        """Create collections and payload indexes"""
+        await self._create_collections()
 
-    def _initialize_models(self):
-        """Initialize all required models"""
-        # Text embedding model
-        self.text_model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-        self.text_tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+    def _initialize_models(self, registry: ModelRegistry):
+        """Initialize the per-modality encoders; weights load on first use"""
+        self.registry = registry
 
-    def _create_collections(self):
+    @property
+    def text_encoder(self) -> TextEncoder:
+        """The sentence encoder behind the text modality"""
+        encoder = self.registry.get("text")
+        encoder.load()
+        return encoder.model
+
+    @property
+    def text_tokenizer(self):
+        return self.text_encoder.tokenizer
+
+    async def _create_collections(self):
         """Create collections for each data type if they don't exist"""
+        # One collection per registered modality, sized by its encoder
         collections = {
-            "text": VectorParams(size=384, distance=Distance.COSINE),
-            "image": VectorParams(size=384, distance=Distance.COSINE),
-            "audio": VectorParams(size=384, distance=Distance.COSINE),
-            "video": VectorParams(size=384, distance=Distance.COSINE),
+            modality: VectorParams(
+                size=self.registry.get(modality).dimension,
+                distance=self.registry.get(modality).distance,
+            )
+            for modality in self.registry.modalities
         }
 
+        try:
+            response = await self.client.get_collections()
+            existing = {collection.name for collection in response.collections}
+            aliases = await self.client.get_aliases()
+            existing |= {alias.alias_name for alias in aliases.aliases}
+        except Exception as e:
+            logger.warning(f"Could not list collections: {str(e)}")
+            existing = set()
+
         for collection_name, params in collections.items():
+            if collection_name in existing:
+                await self._check_vector_size(collection_name, params.size)
+                continue
+            # Each logical collection is an alias over a versioned physical
+            # collection, so a reindex can switch versions without downtime.
+            physical_name = f"{collection_name}_v1"
             try:
-                self.client.create_collection(
-                    collection_name=collection_name, vectors_config=params
+                await self.client.create_collection(
+                    collection_name=physical_name, vectors_config=params
+                )
+                await self.client.update_collection_aliases(
+                    change_aliases_operations=[
+                        models.CreateAliasOperation(
+                            create_alias=models.CreateAlias(
+                                collection_name=physical_name,
+                                alias_name=collection_name,
+                            )
+                        )
+                    ]
+                )
+                logger.info(
+                    f"Created collection: {physical_name} as {collection_name}"
                 )
-                logger.info(f"Created collection: {collection_name}")
             except Exception as e:
                 logger.warning(
                     f"Collection {collection_name} may already exist: {str(e)}"
                 )
 
+        for collection_name, fields in self.payload_indexes.items():
+            await self._migrate_payload_indexes(
+                collection_name,
+                fields,
+                self.retired_payload_indexes.get(collection_name, ()),
+            )
+
+    async def _check_vector_size(self, collection_name: str, size: int):
+        """Report an existing collection sized for a different encoder
+
+        Searches and writes against it would fail on every request, typically
+        after the model of its modality was changed without a migration.
+        """
+        try:
+            current = await self.vector_size(collection_name)
+        except Exception as e:
+            logger.warning(f"Could not read vector size of {collection_name}: {e}")
+            return
+        if current != size:
+            logger.error(
+                f"Collection {collection_name} holds {current}-dimensional vectors "
+                f"but its encoder produces {size}; requests to it will fail until "
+                f"it is migrated (see ReindexService.reindex)"
+            )
+
+    async def _migrate_payload_indexes(
+        self,
+        collection_name: str,
+        fields: Dict[str, str],
+        retired: Sequence[str] = (),
+    ):
+        """Bring a collection's payload indexes in line with their definitions
+
+        Missing indexes are created, indexes whose type changed are rebuilt
+        and ``retired`` indexes are dropped. Indexes this code never declared,
+        such as ones created by other services or by hand, are left alone.
+        """
+        try:
+            info = await self.client.get_collection(collection_name)
+            existing = info.payload_schema
+        except Exception as e:
+            logger.warning(f"Could not read payload schema of {collection_name}: {e}")
+            existing = {}
+
+        for field_name in set(existing) & (set(retired) - set(fields)):
+            try:
+                await self.client.delete_payload_index(collection_name, field_name)
+                logger.info(f"Dropped payload index {collection_name}.{field_name}")
+            except Exception as e:
+                logger.warning(f"Could not drop payload index {field_name}: {e}")
+
+        for field_name, schema in fields.items():
+            field_schema = models.PayloadSchemaType(schema)
+            current = existing.get(field_name)
+            if current is not None and current.data_type == field_schema:
+                continue
+            try:
+                if current is not None:
+                    await self.client.delete_payload_index(collection_name, field_name)
+                await self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
+                logger.info(
+                    f"Created {schema} payload index {collection_name}.{field_name}"
+                )
+            except Exception as e:
+                logger.warning(f"Could not create payload index {field_name}: {e}")
+
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode a batch of texts into L2-normalized sentence embeddings"""
+        return self.registry.encode("text", texts)
+
+    @staticmethod
+    async def _off_loop(func, *args) -> Any:
+        """Run blocking model inference in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    async def vectorize_texts(self, texts: List[str]) -> List[List[float]]:
+        """Vectorize a batch of texts using the model"""
+        try:
+            return (await self._off_loop(self.encode_texts, texts)).tolist()
+        except Exception as e:
+            logger.error(f"Error vectorizing texts: {str(e)}")
+            raise
+
     async def vectorize_text(self, text: str) -> List[float]:
         """Vectorize text using the model"""
+        return (await self.vectorize_texts([text]))[0]
+
+    async def vectorize(self, modality: str, items: List[Any]) -> List[List[float]]:
+        """Vectorize a batch of items with the encoder of their modality"""
+        try:
+            encoded = await self._off_loop(self.registry.encode, modality, items)
+            return encoded.tolist()
+        except Exception as e:
+            logger.error(f"Error vectorizing {modality}: {str(e)}")
+            raise
+
+    async def vectorize_query(self, modality: str, text: str) -> List[float]:
+        """Embed a text query into the vector space of a modality"""
         try:
-            inputs = self.text_tokenizer(text, return_tensors="pt", padding=True, truncation=True)
-            outputs = self.text_model(**inputs)
-            return outputs.last_hidden_state.mean(dim=1).detach().numpy().tolist()[0]
+            encoded = await self._off_loop(self.registry.encode_text, modality, [text])
+            return encoded[0].tolist()
         except Exception as e:
-            logger.error(f"Error vectorizing text: {str(e)}")
+            logger.error(f"Error vectorizing {modality} query: {str(e)}")
             raise
 
+    async def vector_size(self, collection_name: str) -> int:
+        """Vector size of a collection or alias"""
+        info = await self.client.get_collection(collection_name)
+        return info.config.params.vectors.size
+
     async def vectorize_image(
         self, image_data: Union[str, bytes], description: Optional[str] = None
     ) -> List[float]:
         """Vectorize image"""
-        try:
-            # For testing, return a simple vector
-            return [0.1] * 384
-        except Exception as e:
-            logger.error(f"Error vectorizing image: {str(e)}")
-            raise
+        return (await self.vectorize("image", [image_data]))[0]
 
     async def vectorize_audio(self, audio_data: Union[str, bytes]) -> List[float]:
         """Vectorize audio"""
-        try:
-            # For testing, return a simple vector
-            return [0.1] * 384
-        except Exception as e:
-            logger.error(f"Error vectorizing audio: {str(e)}")
-            raise
+        return (await self.vectorize("audio", [audio_data]))[0]
 
     async def vectorize_video(self, video_data: Union[str, bytes]) -> List[float]:
-        """Vectorize video"""
+        """Vectorize video from its keyframes"""
         try:
-            # For testing, return a simple vector
-            return [0.1] * 384
+            if self.video_ingest is None:
+                raise ValueError("No frame embedder is configured for video")
+            video = await self.video_ingest.process(video_data)
+            return video.vector.tolist()
         except Exception as e:
             logger.error(f"Error vectorizing video: {str(e)}")
             raise
 
+    async def index_video(
+        self,
+        video_id: str,
+        video_data: Union[str, bytes],
+        metadata: Optional[Dict[str, Any]] = None,
+        video_format: str = "mp4",
+        collection_name: str = "video",
+    ) -> VideoEmbedding:
+        """Embed a video's shots and upsert them with the video vector
+
+        Shots left over from an earlier indexing of the same video, which
+        found more shots, are deleted once the new points are written.
+        """
+        if self.video_ingest is None:
+            raise ValueError("No frame embedder is configured for video")
+        video = await self.video_ingest.process(video_data, video_format)
+        points = shot_points(video_id, video, metadata)
+        await self.upsert_points(collection_name, **points)
+        await self.delete_by_filter(
+            collection_name,
+            {
+                "must": [{"key": "parent_id", "match": {"value": video_id}}],
+                "must_not": [{"has_id": points["ids"]}],
+            },
+        )
+        logger.info(f"Indexed video {video_id} as {len(video.shots)} shots")
+        return video
+
+    async def _record_write(self, collection_name: str, change: Dict[str, Any]):
+        """Log a write for a reindex of the collection, if one is running"""
+        if self.change_log is not None:
+            await self.change_log.record(collection_name, change)
+
+    @StageTimer("qdrant", "upsert")
     async def upsert_data(
         self,
         collection_name: str,
@@ -94,12 +299,14 @@ class QdrantHandler:
         metadata: Optional[Dict[str, Any]] = None,
     ):
         """Upsert data into Qdrant collection"""
+        point_id = data.get("id", str(hash(str(data))))
+        await self._record_write(collection_name, {"op": "upsert", "ids": [point_id]})
         try:
-            self.client.upsert(
+            await self.client.upsert(
                 collection_name=collection_name,
                 points=[
                     models.PointStruct(
-                        id=data.get("id", str(hash(str(data)))),
+                        id=point_id,
                         vector=vector,
                         payload={"data": data, "metadata": metadata or {}},
                     )
@@ -110,6 +317,65 @@ class QdrantHandler:
             logger.error(f"Error upserting data: {str(e)}")
             raise
 
+    async def upsert_batch(
+        self,
+        collection_name: str,
+        data: List[Dict[str, Any]],
+        vectors: List[List[float]],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Upsert a batch of data into Qdrant collection in one request"""
+        metadata = metadata or [{}] * len(data)
+        await self.upsert_points(
+            collection_name=collection_name,
+            ids=[item.get("id", str(hash(str(item)))) for item in data],
+            vectors=vectors,
+            payloads=[
+                {"data": item, "metadata": meta or {}}
+                for item, meta in zip(data, metadata)
+            ],
+        )
+
+    @StageTimer("qdrant", "upsert")
+    async def upsert_points(
+        self,
+        collection_name: str,
+        ids: List[Union[int, str]],
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+    ):
+        """Upsert prebuilt points into Qdrant collection in one request"""
+        await self._record_write(collection_name, {"op": "upsert", "ids": list(ids)})
+        try:
+            await self.client.upsert(
+                collection_name=collection_name,
+                points=[
+                    models.PointStruct(id=point_id, vector=vector, payload=payload)
+                    for point_id, vector, payload in zip(ids, vectors, payloads)
+                ],
+            )
+            logger.info(
+                f"Successfully upserted {len(ids)} points to collection: "
+                f"{collection_name}"
+            )
+        except Exception as e:
+            logger.error(f"Error upserting points: {str(e)}")
+            raise
+
+    @StageTimer("qdrant", "delete")
+    async def delete_by_filter(self, collection_name: str, filter: Dict[str, Any]):
+        """Delete every point matching a filter in one request"""
+        await self._record_write(collection_name, {"op": "delete", "filter": filter})
+        try:
+            await self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=models.Filter(**filter)),
+            )
+        except Exception as e:
+            logger.error(f"Error deleting points: {str(e)}")
+            raise
+
+    @StageTimer("qdrant", "search")
     async def search(
         self,
         collection_name: str,
@@ -117,15 +383,23 @@ class QdrantHandler:
         limit: int = 10,
         score_threshold: float = 0.7,
         filter: Optional[Dict[str, Any]] = None,
+        search_params: Optional[models.SearchParams] = None,
     ) -> List[Dict[str, Any]]:
-        """Search for similar vectors in the collection"""
+        """Search for similar vectors in the collection
+
+        Without explicit ``search_params`` the query planner picks exact
+        search for selective filters and filtered HNSW otherwise.
+        """
         try:
-            results = self.client.search(
+            if search_params is None:
+                search_params = await self.planner.plan(collection_name, filter)
+            results = await self.client.search(
                 collection_name=collection_name,
                 query_vector=query_vector,
                 limit=limit,
                 score_threshold=score_threshold,
                 query_filter=models.Filter(**filter) if filter else None,
+                search_params=search_params,
             )
             return [
                 {
@@ -133,9 +407,64 @@ class QdrantHandler:
                     "score": hit.score,
                     "data": hit.payload["data"],
                     "metadata": hit.payload["metadata"],
+                    "parent_id": hit.payload.get("parent_id"),
                 }
                 for hit in results
             ]
         except Exception as e:
             logger.error(f"Error searching collection: {str(e)}")
             raise
+
+    async def scroll_payloads(
+        self,
+        collection_name: str,
+        filter: Dict[str, Any],
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Fetch payloads of points matching a filter, without vectors"""
+        try:
+            points, _ = await self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=models.Filter(**filter),
+                limit=limit,
+                with_payload=True,
+                with_vectors=False,
+            )
+            return [
+                {
+                    "id": point.id,
+                    "data": point.payload["data"],
+                    "metadata": point.payload["metadata"],
+                    "parent_id": point.payload.get("parent_id"),
+                }
+                for point in points
+            ]
+        except Exception as e:
+            logger.error(f"Error scrolling collection: {str(e)}")
+            raise
+
+    async def scroll_points(
+        self,
+        collection_name: str,
+        filter: Optional[Dict[str, Any]] = None,
+        batch_size: int = 256,
+        with_vectors: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over every point matching a filter, one page at a time"""
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=models.Filter(**filter) if filter else None,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors,
+            )
+            for point in points:
+                item = {"id": point.id, **(point.payload or {})}
+                if with_vectors:
+                    item["vector"] = point.vector
+                yield item
+            if offset is None:
+                return
@@ -1,23 +1,29 @@
-from typing import List, Optional
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
 
-from qdrant_client import QdrantClient
+import numpy as np
+from qdrant_client.http import models
 from qdrant_client.http.models import Distance, VectorParams
 
 from app.core.config import Settings
+from app.core.qdrant import get_qdrant_client
 
 settings = Settings()
 
+PointId = Union[int, str]
+
 
 class QdrantService:
     def __init__(self):
-        self.client = QdrantClient(
-            host=settings.QDRANT_CLUSTER, port=settings.QDRANT_PORT
-        )
+        self.client = get_qdrant_client(settings)
 
     async def create_collection(self, collection_name: str, vector_size: int) -> None:
         """Create a new collection in Qdrant."""
         try:
-            self.client.create_collection(
+            await self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
             )
@@ -27,7 +33,7 @@ class QdrantService:
     async def delete_collection(self, collection_name: str) -> None:
         """Delete a collection from Qdrant."""
         try:
-            self.client.delete_collection(collection_name=collection_name)
+            await self.client.delete_collection(collection_name=collection_name)
         except Exception as e:
             raise QdrantException(f"Failed to delete collection: {str(e)}")
 
@@ -37,20 +43,156 @@ class QdrantService:
         vectors: List[List[float]],
         payload: Optional[List[dict]] = None,
     ) -> None:
-        """Insert or update points in a collection."""
-        try:
-            self.client.upsert(
-                collection_name=collection_name, points=vectors, payload=payload
+        """Insert points with generated ids into a collection."""
+        await self.upsert_many(
+            collection_name,
+            ids=[str(uuid.uuid4()) for _ in vectors],
+            vectors=np.asarray(vectors, dtype=np.float32),
+            payloads=payload,
+        )
+
+    def _rows_per_batch(
+        self, vectors: np.ndarray, payloads: Optional[List[dict]], batch_size: int
+    ) -> int:
+        """Rows per upsert request, bounded by count and estimated request size."""
+        row_bytes = vectors.shape[1] * vectors.itemsize if vectors.ndim == 2 else 0
+        if payloads:
+            sample = [len(json.dumps(p, default=str)) for p in payloads[:16]]
+            row_bytes += sum(sample) // len(sample)
+        by_size = settings.QDRANT_MAX_BATCH_BYTES // max(row_bytes, 1)
+        return max(1, min(batch_size, by_size))
+
+    async def _run_batches(
+        self, operations: List[Callable[[], Awaitable[Any]]], sizes: List[int]
+    ) -> List[dict]:
+        """Run batch operations concurrently and time each one."""
+        semaphore = asyncio.Semaphore(settings.QDRANT_WRITE_CONCURRENCY)
+
+        async def timed(index: int, operation: Callable[[], Awaitable[Any]]) -> dict:
+            async with semaphore:
+                start = time.perf_counter()
+                await operation()
+                return {
+                    "batch": index,
+                    "points": sizes[index],
+                    "seconds": time.perf_counter() - start,
+                }
+
+        return list(
+            await asyncio.gather(
+                *(timed(i, operation) for i, operation in enumerate(operations))
+            )
+        )
+
+    async def upsert_many(
+        self,
+        collection_name: str,
+        ids: Sequence[PointId],
+        vectors: np.ndarray,
+        payloads: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+    ) -> List[dict]:
+        """Insert or update points in size-bounded batches sent in parallel.
+
+        ``vectors`` is an (n, dim) array. Requests are split by point count
+        and by estimated request size, sent with bounded concurrency, and
+        timed individually.
+
+        Returns one ``{"batch", "points", "seconds"}`` dict per request.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(ids) != len(vectors) or (
+            payloads is not None and len(payloads) != len(ids)
+        ):
+            raise QdrantException("ids, vectors and payloads must be the same length")
+        rows = self._rows_per_batch(
+            vectors, payloads, batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+        )
+
+        operations = []
+        sizes = []
+        for start in range(0, len(ids), rows):
+            end = min(start + rows, len(ids))
+            batch = models.Batch(
+                ids=list(ids[start:end]),
+                vectors=vectors[start:end].tolist(),
+                payloads=payloads[start:end] if payloads is not None else None,
+            )
+            operations.append(
+                lambda batch=batch: self.client.upsert(
+                    collection_name=collection_name, points=batch
+                )
             )
+            sizes.append(end - start)
+        try:
+            return await self._run_batches(operations, sizes)
         except Exception as e:
             raise QdrantException(f"Failed to upsert points: {str(e)}")
 
+    async def set_payload_many(
+        self,
+        collection_name: str,
+        payloads: Dict[PointId, dict],
+        batch_size: Optional[int] = None,
+    ) -> List[dict]:
+        """Set a separate payload on each of many points.
+
+        Updates are grouped into batched update requests, each carrying many
+        set-payload operations, and sent in parallel.
+
+        Returns one ``{"batch", "points", "seconds"}`` dict per request.
+        """
+        items = list(payloads.items())
+        rows = batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+
+        operations = []
+        sizes = []
+        for start in range(0, len(items), rows):
+            chunk = items[start : start + rows]
+            update_operations = [
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(payload=payload, points=[point_id])
+                )
+                for point_id, payload in chunk
+            ]
+            operations.append(
+                lambda update_operations=update_operations: (
+                    self.client.batch_update_points(
+                        collection_name=collection_name,
+                        update_operations=update_operations,
+                    )
+                )
+            )
+            sizes.append(len(chunk))
+        try:
+            return await self._run_batches(operations, sizes)
+        except Exception as e:
+            raise QdrantException(f"Failed to set payloads: {str(e)}")
+
+    async def delete_by_filter(self, collection_name: str, filter: dict) -> dict:
+        """Delete every point matching a filter in one request.
+
+        Returns a ``{"seconds"}`` dict. Points are not counted first: an
+        exact count costs a full filtered scan and can be stale by the time
+        the delete runs.
+        """
+        try:
+            qdrant_filter = models.Filter(**filter)
+            start = time.perf_counter()
+            await self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=qdrant_filter),
+            )
+            return {"seconds": time.perf_counter() - start}
+        except Exception as e:
+            raise QdrantException(f"Failed to delete points: {str(e)}")
+
     async def search_points(
         self, collection_name: str, query_vector: List[float], limit: int = 10
     ) -> List[dict]:
         """Search for similar vectors in a collection."""
         try:
-            results = self.client.search(
+            results = await self.client.search(
                 collection_name=collection_name, query_vector=query_vector, limit=limit
             )
             return [
@@ -63,7 +205,7 @@ class QdrantService:
     async def delete_points(self, collection_name: str, points_selector: dict) -> None:
         """Delete points from a collection based on a selector."""
         try:
-            self.client.delete(
+            await self.client.delete(
                 collection_name=collection_name, points_selector=points_selector
             )
         except Exception as e:
@@ -72,7 +214,7 @@ class QdrantService:
     async def get_collection_info(self, collection_name: str) -> dict:
         """Get information about a collection."""
         try:
-            return self.client.get_collection(collection_name=collection_name)
+            return await self.client.get_collection(collection_name=collection_name)
         except Exception as e:
             raise QdrantException(f"Failed to get collection info: {str(e)}")
 
@@ -0,0 +1,117 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+
+def build_search_params(options: Dict[str, Any]) -> Optional[models.SearchParams]:
+    """Build Qdrant search params from hnsw_ef/exact/rescore/oversampling
+
+    Returns None when no option is set, leaving the choice to the planner.
+    """
+    options = {key: value for key, value in options.items() if value is not None}
+    if not options:
+        return None
+    quantization = None
+    if "rescore" in options or "oversampling" in options:
+        quantization = models.QuantizationSearchParams(
+            rescore=options.get("rescore"), oversampling=options.get("oversampling")
+        )
+    return models.SearchParams(
+        hnsw_ef=options.get("hnsw_ef"),
+        exact=options.get("exact", False),
+        quantization=quantization,
+    )
+
+
+def filter_fields(filter: Dict[str, Any]) -> Set[str]:
+    """Collect the payload keys a filter dict conditions on"""
+    fields: Set[str] = set()
+    for clause in ("must", "should", "must_not"):
+        for condition in filter.get(clause) or []:
+            if "key" in condition:
+                fields.add(condition["key"])
+            else:
+                # Nested filter
+                fields |= filter_fields(condition)
+    return fields
+
+
+class QueryPlanner:
+    """Chooses between filtered HNSW and exact search for a filtered query
+
+    A filter that matches few points is cheaper, and exact, to answer by
+    brute-force scoring the filtered subset than by walking an HNSW graph
+    that most points are filtered out of. Matching cardinalities come from
+    Qdrant's approximate count and are cached per filter for ``cache_ttl``
+    seconds, keeping at most ``cache_size`` filters (least recently used are
+    evicted first).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        payload_indexes: Optional[Dict[str, Dict[str, str]]] = None,
+        exact_search_threshold: int = 10000,
+        cache_ttl: float = 60.0,
+        cache_size: int = 1024,
+    ):
+        self.client = client
+        self.payload_indexes = payload_indexes or {}
+        self.exact_search_threshold = exact_search_threshold
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cardinalities: "OrderedDict[Tuple[str, str], Tuple[float, int]]" = (
+            OrderedDict()
+        )
+
+    async def estimate_cardinality(
+        self, collection_name: str, filter: Dict[str, Any]
+    ) -> Optional[int]:
+        """Approximate number of points matching a filter, or None if unknown"""
+        key = (collection_name, json.dumps(filter, sort_keys=True, default=str))
+        cached = self._cardinalities.get(key)
+        now = time.monotonic()
+        if cached is not None:
+            if now - cached[0] < self.cache_ttl:
+                self._cardinalities.move_to_end(key)
+                return cached[1]
+            del self._cardinalities[key]
+        try:
+            result = await self.client.count(
+                collection_name=collection_name,
+                count_filter=models.Filter(**filter),
+                exact=False,
+            )
+        except Exception as e:
+            logger.warning(f"Could not estimate filter cardinality: {str(e)}")
+            return None
+        self._cardinalities[key] = (now, result.count)
+        while len(self._cardinalities) > self.cache_size:
+            self._cardinalities.popitem(last=False)
+        return result.count
+
+    async def plan(
+        self, collection_name: str, filter: Optional[Dict[str, Any]]
+    ) -> Optional[models.SearchParams]:
+        """Search params for a query; None keeps Qdrant's default HNSW search"""
+        if not filter:
+            return None
+
+        indexed = self.payload_indexes.get(collection_name, {})
+        unindexed = filter_fields(filter) - set(indexed)
+        if unindexed:
+            logger.warning(
+                f"Filter on unindexed payload fields {sorted(unindexed)} in "
+                f"collection {collection_name} will scan payloads"
+            )
+
+        cardinality = await self.estimate_cardinality(collection_name, filter)
+        if cardinality is not None and cardinality <= self.exact_search_threshold:
+            return models.SearchParams(exact=True)
+        return None
@@ -0,0 +1,459 @@
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+from qdrant_client.http import models
+
+from app.core.config import Settings
+from app.services.change_log import SWITCHING
+from app.services.qdrant_handler import QdrantHandler
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
+
+# Collections whose points keep their source in the payload, as alias ->
+# (modality encoding it, field of the point's ``data``)
+REEMBED_SOURCES = {"text": ("text", "content")}
+
+
+class ReindexException(Exception):
+    """Raised when a reindex fails verification or cannot run."""
+
+    pass
+
+
+class ReindexService:
+    """Blue-green reindexing of aliased collections, plus snapshots
+
+    A reindex builds a new versioned collection (``text_v3`` behind the
+    ``text`` alias), copies points into it, verifies point counts and sample
+    recall, and only then switches the alias in one atomic request. Readers
+    keep using the old version until the switch.
+    """
+
+    def __init__(self, handler: QdrantHandler):
+        self.handler = handler
+        self.client = handler.client.with_timeout(settings.QDRANT_BULK_TIMEOUT)
+        self.admin_client = handler.client.with_timeout(
+            settings.QDRANT_ADMIN_TIMEOUT, retries=0
+        )
+        # Shared with the handler, whose writes it records during a reindex
+        self.changes = handler.change_log
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def resolve_alias(self, alias: str) -> Optional[str]:
+        """Physical collection an alias points at, or None if it is no alias"""
+        response = await self.client.get_aliases()
+        for description in response.aliases:
+            if description.alias_name == alias:
+                return description.collection_name
+        return None
+
+    async def _next_version(self, alias: str) -> str:
+        """Name for the next versioned collection behind an alias"""
+        response = await self.client.get_collections()
+        pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+        versions = [
+            int(match.group(1))
+            for collection in response.collections
+            if (match := pattern.match(collection.name))
+        ]
+        return f"{alias}_v{max(versions, default=0) + 1}"
+
+    def start(self, alias: str, **options: Any) -> str:
+        """Register a reindex job and return its id; run it with ``run_job``"""
+        for job in self.jobs.values():
+            if job["alias"] == alias and job["status"] in ("pending", "running"):
+                raise ReindexException(f"A reindex of {alias} is already running")
+        job_id = str(uuid.uuid4())
+        self.jobs[job_id] = {"job_id": job_id, "alias": alias, "status": "pending"}
+        self.jobs[job_id]["options"] = options
+        return job_id
+
+    async def run_job(self, job_id: str):
+        """Run a registered reindex job, recording its report or error"""
+        job = self.jobs[job_id]
+        job["status"] = "running"
+        try:
+            job.update(await self.reindex(job["alias"], **job["options"]))
+            job["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Reindex of {job['alias']} failed: {str(e)}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+
+    def _lock(self, alias: str):
+        """Take the cluster-wide reindex lock of an alias"""
+        if self.changes is None:
+            raise ReindexException("Reindexing needs a change log")
+        if not self.changes.acquire(alias):
+            raise ReindexException(f"A reindex of {alias} is already running")
+
+    async def reindex(
+        self,
+        alias: str,
+        vector_size: Optional[int] = None,
+        distance: Optional[str] = None,
+        hnsw_config: Optional[Dict[str, Any]] = None,
+        reembed: bool = False,
+        drop_previous: bool = False,
+    ) -> Dict[str, Any]:
+        """Rebuild ``alias`` into a new collection and switch to it
+
+        Vectors are copied as-is unless ``reembed`` is set (the embedding
+        model changed), in which case text chunks are re-encoded from their
+        payload. Vector size, distance and HNSW settings default to the
+        current collection's.
+
+        Only text points keep their source, so image, audio and video
+        collections cannot be re-embedded here; ``reembed`` is rejected for
+        them. To move one of those to a new model, create the next version
+        (``<name>_vN``) sized for the new encoder, re-ingest the original
+        media into it, then point the alias at it with ``_switch_alias``.
+
+        Writes made to the alias while points are copied are logged by every
+        worker and replayed into the new collection. For the final replay,
+        count check and alias switch, writes to the alias are paused (for
+        about ``poll_seconds`` plus the replay), so none are lost. If any
+        step fails, the new collection is dropped and the alias is left as
+        it was.
+        """
+        start_time = time.perf_counter()
+        if reembed and alias not in REEMBED_SOURCES:
+            raise ReindexException(
+                f"{alias} points keep no source to re-embed; create a new "
+                f"version and re-ingest the original media instead"
+            )
+        self._lock(alias)
+        target = None
+        switched = False
+        try:
+            source = await self.resolve_alias(alias) or alias
+            target = await self._next_version(alias)
+
+            info = await self.client.get_collection(source)
+            vectors_config = info.config.params.vectors
+            if vector_size is not None or distance is not None:
+                vectors_config = models.VectorParams(
+                    size=vector_size or vectors_config.size,
+                    distance=(
+                        models.Distance(distance)
+                        if distance
+                        else vectors_config.distance
+                    ),
+                )
+            if vectors_config.size != info.config.params.vectors.size and not reembed:
+                raise ReindexException("Changing the vector size requires reembed")
+
+            await self.client.create_collection(
+                collection_name=target,
+                vectors_config=vectors_config,
+                hnsw_config=models.HnswConfigDiff(
+                    **{**info.config.hnsw_config.dict(), **(hnsw_config or {})}
+                ),
+            )
+            await self.handler._migrate_payload_indexes(
+                target, self.handler.payload_indexes.get(alias, {})
+            )
+            logger.info(f"Reindexing {alias}: {source} -> {target}")
+            # Every worker is logging writes to the alias once it has polled
+            await asyncio.sleep(self.changes.poll_seconds)
+
+            copied = await self._copy_points(alias, source, target, reembed)
+            replayed = await self._replay(alias, source, target, reembed)
+            recall = await self._sample_recall(target)
+            if recall < settings.REINDEX_MIN_RECALL:
+                raise ReindexException(
+                    f"Sample recall {recall:.3f} of {target} is below "
+                    f"{settings.REINDEX_MIN_RECALL}"
+                )
+
+            self.changes.refresh(alias, SWITCHING)
+            await asyncio.sleep(self.changes.poll_seconds)
+            replayed += await self._replay(alias, source, target, reembed)
+            await self._verify_counts(source, target)
+            await self._switch_alias(alias, source, target)
+            switched = True
+        except Exception:
+            if target is not None and not switched:
+                await self._drop(target)
+            raise
+        finally:
+            self.changes.release(alias)
+
+        if drop_previous and source != alias:
+            await self.client.delete_collection(source)
+
+        return {
+            "source": source,
+            "target": target,
+            "points": copied,
+            "replayed": replayed,
+            "recall": recall,
+            "seconds": time.perf_counter() - start_time,
+        }
+
+    async def _drop(self, collection: str):
+        """Remove a collection left behind by a failed reindex or restore"""
+        try:
+            await self.client.delete_collection(collection)
+            logger.info(f"Dropped unfinished collection {collection}")
+        except Exception as e:
+            logger.error(f"Could not drop unfinished collection {collection}: {e}")
+
+    async def _verify_counts(self, source: str, target: str):
+        source_count = (await self.client.count(source, exact=True)).count
+        target_count = (await self.client.count(target, exact=True)).count
+        if source_count != target_count:
+            raise ReindexException(
+                f"Point count mismatch: {source} has {source_count}, "
+                f"{target} has {target_count}"
+            )
+
+    async def _write_points(
+        self, alias: str, target: str, points: List[Any], reembed: bool
+    ):
+        """Upsert points read from the source into the target collection"""
+        if reembed:
+            modality, field = REEMBED_SOURCES[alias]
+            sources = [point.payload["data"][field] for point in points]
+            vectors = await self.handler.vectorize(modality, sources)
+        else:
+            vectors = [point.vector for point in points]
+        await self.client.upsert(
+            collection_name=target,
+            points=models.Batch(
+                ids=[point.id for point in points],
+                vectors=vectors,
+                payloads=[point.payload for point in points],
+            ),
+        )
+
+    async def _copy_points(
+        self, alias: str, source: str, target: str, reembed: bool
+    ) -> int:
+        """Copy points page by page, overlapping each write with the next read
+
+        Throughput is capped at ``REINDEX_MAX_POINTS_PER_SECOND`` (0 = no cap)
+        so a reindex cannot starve live traffic.
+        """
+        rate = settings.REINDEX_MAX_POINTS_PER_SECOND
+        start_time = time.monotonic()
+        copied = 0
+        pending: Optional[asyncio.Task] = None
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=source,
+                limit=settings.REINDEX_BATCH_SIZE,
+                offset=offset,
+                with_payload=True,
+                with_vectors=not reembed,
+            )
+            if points:
+                if pending is not None:
+                    await pending
+                pending = asyncio.ensure_future(
+                    self._write_points(alias, target, points, reembed)
+                )
+                copied += len(points)
+                self.changes.refresh(alias)
+                if rate:
+                    ahead = copied / rate - (time.monotonic() - start_time)
+                    if ahead > 0:
+                        await asyncio.sleep(ahead)
+            if offset is None:
+                break
+        if pending is not None:
+            await pending
+        return copied
+
+    async def _replay(self, alias: str, source: str, target: str, reembed: bool) -> int:
+        """Apply logged writes to the target, oldest first
+
+        Upserted points are re-read from the source, so the target gets their
+        latest version; points deleted since are deleted from the target.
+        Filter deletes are applied to the target as logged.
+        """
+        replayed = 0
+        while True:
+            changes = self.changes.pop(alias, settings.REINDEX_BATCH_SIZE)
+            if not changes:
+                return replayed
+            ids: List[Any] = []
+            for change in changes:
+                if change["op"] == "upsert":
+                    ids.extend(change["ids"])
+                    continue
+                await self._sync_ids(alias, source, target, ids, reembed)
+                ids = []
+                await self.client.delete(
+                    collection_name=target,
+                    points_selector=models.FilterSelector(
+                        filter=models.Filter(**change["filter"])
+                    ),
+                )
+            await self._sync_ids(alias, source, target, ids, reembed)
+            replayed += len(changes)
+            self.changes.refresh(alias)
+
+    async def _sync_ids(
+        self, alias: str, source: str, target: str, ids: List[Any], reembed: bool
+    ):
+        """Make the given points of the target match the source"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        points = await self.client.retrieve(
+            collection_name=source,
+            ids=ids,
+            with_payload=True,
+            with_vectors=not reembed,
+        )
+        if points:
+            await self._write_points(alias, target, points, reembed)
+        found = {str(point.id) for point in points}
+        deleted = [point_id for point_id in ids if str(point_id) not in found]
+        if deleted:
+            await self.client.delete(
+                collection_name=target,
+                points_selector=models.PointIdsList(points=deleted),
+            )
+
+    async def _sample_recall(self, collection: str) -> float:
+        """Mean recall@k of HNSW against exact search on sampled points"""
+        sample, _ = await self.client.scroll(
+            collection_name=collection,
+            limit=settings.REINDEX_RECALL_SAMPLE_SIZE,
+            with_payload=False,
+            with_vectors=True,
+        )
+        if not sample:
+            return 1.0
+        k = settings.REINDEX_RECALL_K
+
+        def requests(exact: bool) -> List[models.SearchRequest]:
+            return [
+                models.SearchRequest(
+                    vector=point.vector,
+                    limit=k,
+                    params=models.SearchParams(exact=exact),
+                )
+                for point in sample
+            ]
+
+        approximate = await self.client.search_batch(collection, requests(False))
+        exact = await self.client.search_batch(collection, requests(True))
+        recalls = [
+            len({hit.id for hit in a} & {hit.id for hit in e}) / len(e)
+            for a, e in zip(approximate, exact)
+            if e
+        ]
+        return sum(recalls) / len(recalls) if recalls else 1.0
+
+    async def _switch_alias(self, alias: str, source: Optional[str], target: str):
+        """Point ``alias`` at ``target`` in one atomic alias update
+
+        ``source`` is the collection the alias points at now, the alias
+        itself for a concrete legacy collection, or None if neither exists.
+        """
+        operations: List[Any] = []
+        if source is None:
+            pass
+        elif source == alias:
+            # Legacy deployment where the logical name is a real collection.
+            # It must be dropped before the alias can take its name, which is
+            # the only non-atomic step; snapshot it first.
+            logger.warning(f"Replacing concrete collection {alias} with an alias")
+            await self.snapshot(alias)
+            await self.client.delete_collection(alias)
+        else:
+            operations.append(
+                models.DeleteAliasOperation(
+                    delete_alias=models.DeleteAlias(alias_name=alias)
+                )
+            )
+        operations.append(
+            models.CreateAliasOperation(
+                create_alias=models.CreateAlias(
+                    collection_name=target, alias_name=alias
+                )
+            )
+        )
+        await self.client.update_collection_aliases(
+            change_aliases_operations=operations
+        )
+        logger.info(f"Alias {alias} now points at {target}")
+
+    async def snapshot(self, collection: str) -> str:
+        """Snapshot a collection and store it locally or in S3
+
+        Returns the local path, or the ``s3://`` URL when
+        ``SNAPSHOT_S3_BUCKET`` is set.
+        """
+        description = await self.admin_client.create_snapshot(
+            collection_name=collection
+        )
+        os.makedirs(settings.SNAPSHOT_DIR, exist_ok=True)
+        path = os.path.join(settings.SNAPSHOT_DIR, description.name)
+
+        url = (
+            f"http://{settings.QDRANT_CLUSTER}:{settings.QDRANT_PORT}"
+            f"/collections/{collection}/snapshots/{description.name}"
+        )
+        async with httpx.AsyncClient(timeout=None) as http:
+            async with http.stream("GET", url) as response:
+                response.raise_for_status()
+                with open(path, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
+        logger.info(f"Saved snapshot of {collection} to {path}")
+
+        if not settings.SNAPSHOT_S3_BUCKET:
+            return path
+
+        import boto3
+
+        key = f"{settings.SNAPSHOT_S3_PREFIX}{collection}/{description.name}"
+        s3 = boto3.client("s3", endpoint_url=settings.SNAPSHOT_S3_ENDPOINT_URL)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, s3.upload_file, path, settings.SNAPSHOT_S3_BUCKET, key
+        )
+        os.remove(path)
+        return f"s3://{settings.SNAPSHOT_S3_BUCKET}/{key}"
+
+    async def restore(self, alias: str, location: str) -> str:
+        """Restore a snapshot into a new version of ``alias`` and switch to it
+
+        ``location`` is a snapshot URL or server-side file path. The current
+        version stays in place until the restored one is ready. Returns the
+        restored collection's name.
+        """
+        self._lock(alias)
+        target = None
+        try:
+            source = await self.resolve_alias(alias)
+            if source is None:
+                response = await self.client.get_collections()
+                if alias in {collection.name for collection in response.collections}:
+                    source = alias
+            target = await self._next_version(alias)
+            await self.admin_client.recover_snapshot(
+                collection_name=target, location=location
+            )
+            await self._switch_alias(alias, source, target)
+        except Exception:
+            if target is not None:
+                await self._drop(target)
+            raise
+        finally:
+            self.changes.release(alias)
+        logger.info(f"Restored {alias} from {location} into {target}")
+        return target
@@ -0,0 +1,681 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import redis
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from app.core.cache import RedisCache
+from app.core.config import Settings
+from app.core.exceptions import APIException
+from app.core.metrics import StageTimer
+from app.core.qdrant import CircuitOpenError, is_transient
+from app.services.change_log import ChangeLog
+from app.services.chunking import chunk_text, collapse_by_parent
+from app.services.federation import merge_collections
+from app.services.indexing_pipeline import IndexingPipeline
+from app.services.lexical_index import (
+    LexicalIndexes,
+    LexicalIndexUnavailable,
+    reciprocal_rank_fusion,
+)
+from app.services.model_registry import ModelRegistry
+from app.services.qdrant_handler import QdrantHandler
+from app.services.query_planner import build_search_params
+from app.services.reindex_service import ReindexService
+from app.services.video_ingest import VideoIngest
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+
+class SemanticSearchService:
+    """Semantic search and indexing over the Qdrant collections"""
+
+    def __init__(self, default_collection: str = "text"):
+        self.default_collection = default_collection
+        self._handler: Optional[QdrantHandler] = None
+        self._reindexer: Optional[ReindexService] = None
+        self._indexer: Optional[IndexingPipeline] = None
+        # One BM25 index per collection, keyed by parent document id
+        self._lexical = LexicalIndexes(
+            self._scroll_chunks,
+            settings.LEXICAL_COLLECTIONS,
+            max_documents=settings.LEXICAL_MAX_DOCUMENTS,
+            refresh_seconds=settings.LEXICAL_REFRESH_SECONDS,
+        )
+        self.cache = RedisCache(
+            redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+        )
+
+    @property
+    def handler(self) -> QdrantHandler:
+        """Lazily create the Qdrant handler so models load on first use"""
+        if self._handler is None:
+            registry = ModelRegistry.default(
+                text_encoder_backend=settings.TEXT_ENCODER_BACKEND,
+                embedding_token_budget=settings.EMBEDDING_TOKEN_BUDGET,
+                image_model=settings.IMAGE_MODEL_NAME,
+                audio_model=settings.AUDIO_MODEL_NAME,
+                max_batch_size=settings.BATCH_SIZE,
+                text_model=settings.TEXT_MODEL_NAME,
+                model_dir=settings.MODEL_PATH,
+            )
+            self._handler = QdrantHandler(
+                payload_indexes=settings.PAYLOAD_INDEXES,
+                retired_payload_indexes=settings.RETIRED_PAYLOAD_INDEXES,
+                exact_search_threshold=settings.QUERY_PLANNER_EXACT_THRESHOLD,
+                video_ingest=VideoIngest(
+                    registry.get("video").encode,
+                    sample_fps=settings.VIDEO_SAMPLE_FPS,
+                    scene_threshold=settings.VIDEO_SCENE_THRESHOLD,
+                    max_keyframe_gap=settings.VIDEO_MAX_KEYFRAME_GAP,
+                    frame_size=settings.VIDEO_FRAME_SIZE,
+                    batch_size=settings.VIDEO_EMBED_BATCH_SIZE,
+                    queue_size=settings.VIDEO_QUEUE_SIZE,
+                ),
+                registry=registry,
+                change_log=ChangeLog(
+                    self.cache.redis,
+                    poll_seconds=settings.REINDEX_POLL_SECONDS,
+                    lock_ttl=settings.REINDEX_LOCK_TTL,
+                    max_pause_seconds=settings.REINDEX_WRITE_PAUSE_SECONDS,
+                ),
+            )
+        return self._handler
+
+    @property
+    def indexer(self) -> IndexingPipeline:
+        """Background indexing of OCR and transcription results"""
+        if self._indexer is None:
+            self._indexer = IndexingPipeline(
+                functools.partial(
+                    self.index_documents, collection=settings.INDEXING_COLLECTION
+                ),
+                max_batch_size=settings.INDEXING_BATCH_SIZE,
+                debounce_seconds=settings.INDEXING_DEBOUNCE_SECONDS,
+                max_queue_size=settings.INDEXING_QUEUE_SIZE,
+            )
+        return self._indexer
+
+    @property
+    def reindexer(self) -> ReindexService:
+        """Blue-green reindexing over this service's collections"""
+        if self._reindexer is None:
+            self._reindexer = ReindexService(self.handler)
+        return self._reindexer
+
+    async def startup(self):
+        """Create collections and payload indexes before serving requests
+
+        Lexical indexes are then built from Qdrant in the background.
+        """
+        await self.handler.initialize()
+        await self._lexical.start()
+
+    async def shutdown(self):
+        """Stop syncing lexical indexes"""
+        await self._lexical.stop()
+
+    def _scroll_chunks(
+        self, collection: str, filter: Optional[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Every chunk payload of a collection matching a filter"""
+        return self.handler.scroll_points(
+            collection_name=collection,
+            filter=filter,
+            batch_size=settings.REINDEX_BATCH_SIZE,
+        )
+
+    @staticmethod
+    def _document_text(document: Dict[str, Any]) -> str:
+        """Get the text to embed from a document"""
+        content = document.get("content")
+        if not isinstance(content, str) or not content.strip():
+            raise APIException(
+                status_code=400, detail="Document must have non-empty 'content'"
+            )
+        return content
+
+    @staticmethod
+    def _document_id(document: Dict[str, Any]) -> str:
+        """Get the parent id that links a document's chunks
+
+        Documents without an id are identified by a hash of their content, so
+        the id is the same in every worker and across restarts.
+        """
+        if document.get("id") is not None:
+            return str(document["id"])
+        content = str(document.get("content", ""))
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def _chunk_point_id(parent_id: str, chunk_index: int) -> str:
+        """Deterministic point id for a chunk, so re-indexing overwrites it"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{parent_id}#{chunk_index}"))
+
+    @staticmethod
+    def _search_params(
+        collection: str,
+        profile: Optional[str] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Any]:
+        """Resolve a named profile plus per-request overrides to search params"""
+        options: Dict[str, Any] = {}
+        if profile is not None:
+            if profile not in settings.SEARCH_PROFILES:
+                raise APIException(
+                    status_code=400,
+                    detail=f"Unknown search profile '{profile}', expected one of "
+                    f"{sorted(settings.SEARCH_PROFILES)}",
+                )
+            options.update(settings.SEARCH_PROFILES[profile])
+            collection_profiles = settings.COLLECTION_SEARCH_PROFILES.get(collection)
+            options.update((collection_profiles or {}).get(profile, {}))
+        overrides = overrides or {}
+        options.update({k: v for k, v in overrides.items() if v is not None})
+        return build_search_params(options)
+
+    @staticmethod
+    def _with_condition(
+        filters: Optional[Dict[str, Any]], condition: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Add a required condition to a (possibly empty) filter"""
+        combined = dict(filters or {})
+        combined["must"] = list(combined.get("must") or []) + [condition]
+        return combined
+
+    async def _fetch_parents(
+        self,
+        collection: str,
+        parent_ids: List[str],
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch the first chunk of each parent that also passes the filters"""
+        scroll_filter = self._with_condition(
+            filters, {"key": "parent_id", "match": {"any": parent_ids}}
+        )
+        scroll_filter["must"].append({"key": "chunk_index", "match": {"value": 0}})
+        points = await self.handler.scroll_payloads(
+            collection_name=collection, filter=scroll_filter, limit=len(parent_ids)
+        )
+        return {point["parent_id"]: point for point in points}
+
+    async def _rank(
+        self,
+        query: str,
+        collection: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        score_threshold: float,
+        chunk_aggregation: str,
+        mode: str,
+        lexical_prefilter: bool,
+        search_params: Optional[Any],
+    ) -> List[Dict[str, Any]]:
+        """Rank up to ``limit`` documents for a query, best first"""
+        candidate_limit = limit * settings.CHUNK_SEARCH_OVERSAMPLING
+
+        lexical_hits: List[Any] = []
+        vector_filters = filters
+        if mode != "vector":
+            try:
+                index = self._lexical.get(collection)
+            except ValueError as e:
+                raise APIException(status_code=400, detail=str(e))
+            except LexicalIndexUnavailable as e:
+                raise APIException(status_code=503, detail=str(e))
+            lexical_hits = index.search(query, limit=candidate_limit)
+            if lexical_prefilter:
+                candidates = index.candidates(query)
+                if 0 < len(candidates) <= settings.LEXICAL_PREFILTER_MAX_CANDIDATES:
+                    vector_filters = self._with_condition(
+                        filters,
+                        {"key": "parent_id", "match": {"any": sorted(candidates)}},
+                    )
+
+        vector_hits: List[Dict[str, Any]] = []
+        if mode != "lexical":
+            try:
+                query_vector = await self.handler.vectorize_query(
+                    self._collection_modality(collection), query
+                )
+            except ValueError as e:
+                raise APIException(status_code=400, detail=str(e))
+            hits = await self.handler.search(
+                collection_name=collection,
+                query_vector=query_vector,
+                limit=candidate_limit,
+                score_threshold=score_threshold,
+                filter=vector_filters,
+                search_params=search_params,
+            )
+            try:
+                vector_hits = collapse_by_parent(
+                    hits, aggregation=chunk_aggregation, limit=candidate_limit
+                )
+            except ValueError as e:
+                raise APIException(status_code=400, detail=str(e))
+
+        if mode == "vector":
+            hits = vector_hits[:limit]
+        else:
+            ranked = (
+                lexical_hits
+                if mode == "lexical"
+                else reciprocal_rank_fusion(
+                    [[hit["id"] for hit in vector_hits], [i for i, _ in lexical_hits]],
+                    k=settings.HYBRID_RRF_K,
+                )
+            )
+            by_id = {hit["id"]: hit for hit in vector_hits}
+            missing = [doc_id for doc_id, _ in ranked if doc_id not in by_id]
+            if missing:
+                by_id.update(await self._fetch_parents(collection, missing, filters))
+            # Lexical-only hits that fail the filters are not fetched and drop out
+            hits = [
+                {**by_id[doc_id], "id": doc_id, "score": score}
+                for doc_id, score in ranked
+                if doc_id in by_id
+            ][:limit]
+
+        return [
+            {
+                "id": hit["id"],
+                "score": hit["score"],
+                "content": hit["data"],
+                "metadata": hit["metadata"],
+            }
+            for hit in hits
+        ]
+
+    @staticmethod
+    def _encode_cursor(cache_key: str, offset: int) -> str:
+        """Opaque cursor pointing at an offset in a cached candidate list"""
+        raw = json.dumps({"key": cache_key, "offset": offset}).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, cache_key: str) -> int:
+        """Offset encoded in a cursor issued for the same query"""
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            offset = int(decoded["offset"])
+        except (ValueError, KeyError, TypeError):
+            raise APIException(status_code=400, detail="Invalid cursor")
+        if offset < 0:
+            raise APIException(status_code=400, detail="Invalid cursor")
+        if decoded.get("key") != cache_key:
+            raise APIException(
+                status_code=400,
+                detail="Cursor was issued for a different query, or the "
+                "collection has changed since",
+            )
+        return offset
+
+    @staticmethod
+    def _generation_key(collection: str) -> str:
+        return f"search:generation:{collection}"
+
+    async def _invalidate(self, collection: str):
+        """Retire every cached candidate list (and cursor) of a collection"""
+        await self.cache.incr(self._generation_key(collection))
+
+    @StageTimer("semantic_search", "search")
+    async def search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        score_threshold: float = 0.7,
+        collection: Optional[str] = None,
+        chunk_aggregation: str = "max",
+        mode: str = "vector",
+        lexical_prefilter: bool = False,
+        profile: Optional[str] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Search a collection for documents similar to the query
+
+        Chunk hits are oversampled and collapsed so each document appears
+        once, scored by its best (``max``) or summed (``sum``) chunk scores.
+
+        ``mode`` selects pure ``vector`` similarity, ``lexical`` BM25, or a
+        ``hybrid`` of both fused by reciprocal rank. With
+        ``lexical_prefilter``, a selective query restricts the vector search
+        to documents containing at least one query term.
+
+        ``profile`` names an accuracy/latency profile from settings and
+        ``search_params`` (hnsw_ef, exact, rescore, oversampling) override
+        it per request. With neither, the query planner decides.
+
+        Results are paged by ``offset`` or by the ``next_cursor`` of a
+        previous page. The ranked candidates are computed several pages
+        ahead and cached, so later pages are served without re-scoring.
+        Indexing into the collection retires its cached candidates.
+        """
+        start_time = time.perf_counter()
+        collection = collection or self.default_collection
+        if mode not in SEARCH_MODES:
+            raise APIException(
+                status_code=400,
+                detail=f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}",
+            )
+        if offset < 0:
+            raise APIException(status_code=400, detail="offset must not be negative")
+        qdrant_search_params = self._search_params(collection, profile, search_params)
+
+        generation = await self.cache.get(self._generation_key(collection)) or 0
+        request_key = json.dumps(
+            [query, filters, score_threshold, collection, chunk_aggregation, mode]
+            + [lexical_prefilter, profile, search_params, generation],
+            sort_keys=True,
+            default=str,
+        )
+        cache_key = f"search:{hashlib.sha256(request_key.encode()).hexdigest()}"
+        if cursor is not None:
+            offset = self._decode_cursor(cursor, cache_key)
+        end = offset + top_k
+        if end > settings.SEARCH_MAX_CANDIDATES:
+            raise APIException(
+                status_code=400,
+                detail=f"Cannot page past {settings.SEARCH_MAX_CANDIDATES} results",
+            )
+
+        candidates = await self.cache.get(cache_key)
+        if candidates is None or (
+            len(candidates["results"]) < end and not candidates["exhausted"]
+        ):
+            window = min(
+                max(end, top_k * settings.SEARCH_PREFETCH_PAGES),
+                settings.SEARCH_MAX_CANDIDATES,
+            )
+            ranked = await self._rank(
+                query,
+                collection,
+                window,
+                filters,
+                score_threshold,
+                chunk_aggregation,
+                mode,
+                lexical_prefilter,
+                qdrant_search_params,
+            )
+            candidates = {"results": ranked, "exhausted": len(ranked) < window}
+            await self.cache.set(
+                cache_key, candidates, expire=settings.SEARCH_CANDIDATE_TTL
+            )
+
+        results = candidates["results"][offset:end]
+        has_more = end < len(candidates["results"]) or (
+            not candidates["exhausted"] and end < settings.SEARCH_MAX_CANDIDATES
+        )
+        return {
+            "results": results,
+            "total_results": len(results),
+            "processing_time": time.perf_counter() - start_time,
+            "next_cursor": self._encode_cursor(cache_key, end) if has_more else None,
+        }
+
+    async def federated_search(
+        self,
+        query: str,
+        collections: List[str],
+        weights: Optional[Dict[str, float]] = None,
+        normalization: str = "minmax",
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        score_threshold: float = 0.7,
+    ) -> Dict[str, Any]:
+        """Search several collections concurrently and merge into one ranking
+
+        The query is embedded once per modality, into the vector space of
+        each collection's encoder (the CLIP text tower for image and video,
+        the CLAP text tower for audio), and searched in every collection at
+        the same time, so latency tracks the slowest collection. Scores are
+        normalized per collection, weighted and merged.
+
+        A collection whose vectors do not match its query embedding is a
+        400. A collection Qdrant cannot serve right now (timeouts, open
+        circuit) is left out and listed in ``skipped_collections``; any other
+        error fails the query.
+        """
+        start_time = time.perf_counter()
+        if not collections:
+            raise APIException(status_code=400, detail="No collections to search")
+
+        modalities = {
+            collection: self._collection_modality(collection)
+            for collection in collections
+        }
+        query_vectors = {}
+        for modality in set(modalities.values()):
+            try:
+                query_vectors[modality] = await self.handler.vectorize_query(
+                    modality, query
+                )
+            except ValueError as e:
+                raise APIException(status_code=400, detail=str(e))
+
+        async def search_collection(collection: str) -> List[Dict[str, Any]]:
+            query_vector = query_vectors[modalities[collection]]
+            size, hits = await asyncio.gather(
+                self.handler.vector_size(collection),
+                self.handler.search(
+                    collection_name=collection,
+                    query_vector=query_vector,
+                    limit=top_k * settings.CHUNK_SEARCH_OVERSAMPLING,
+                    score_threshold=score_threshold,
+                    filter=filters,
+                ),
+                return_exceptions=True,
+            )
+            if isinstance(size, int) and size != len(query_vector):
+                raise APIException(
+                    status_code=400,
+                    detail=f"Collection '{collection}' holds {size}-dimensional "
+                    f"vectors, but its {modalities[collection]} query embedding "
+                    f"has {len(query_vector)}",
+                )
+            for result in (size, hits):
+                if isinstance(result, BaseException):
+                    raise result
+            return hits
+
+        responses = await asyncio.gather(
+            *(search_collection(collection) for collection in collections),
+            return_exceptions=True,
+        )
+
+        hits_by_collection: Dict[str, List[Dict[str, Any]]] = {}
+        skipped: List[str] = []
+        for collection, response in zip(collections, responses):
+            if isinstance(response, UnexpectedResponse) and (
+                response.status_code == 404
+            ):
+                raise APIException(
+                    status_code=400, detail=f"Unknown collection '{collection}'"
+                )
+            if isinstance(response, CircuitOpenError) or is_transient(response):
+                logger.warning(f"Federated search skipped {collection}: {response}")
+                skipped.append(collection)
+                continue
+            if isinstance(response, BaseException):
+                raise response
+            hits_by_collection[collection] = collapse_by_parent(response, limit=top_k)
+        try:
+            hits = merge_collections(
+                hits_by_collection, weights=weights, method=normalization, limit=top_k
+            )
+        except ValueError as e:
+            raise APIException(status_code=400, detail=str(e))
+
+        results = [
+            {
+                "id": hit["id"],
+                "score": hit["score"],
+                "content": hit["data"],
+                "metadata": hit["metadata"],
+                "collection": hit["collection"],
+            }
+            for hit in hits
+        ]
+        return {
+            "results": results,
+            "total_results": len(results),
+            "processing_time": time.perf_counter() - start_time,
+            "skipped_collections": skipped,
+        }
+
+    def _collection_modality(self, collection: str) -> str:
+        """Modality of a collection: its name without a version suffix"""
+        modality = re.sub(r"_v\d+$", "", collection)
+        return modality if modality in self.handler.registry.modalities else "text"
+
+    async def export(
+        self,
+        collection: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 256,
+        with_vectors: bool = False,
+    ) -> AsyncIterator[str]:
+        """Stream every point matching the filters as NDJSON lines
+
+        Points are walked page by page with Qdrant scroll, so only one page
+        is held in memory at a time.
+        """
+        async for point in self.handler.scroll_points(
+            collection_name=collection or self.default_collection,
+            filter=filters,
+            batch_size=batch_size,
+            with_vectors=with_vectors,
+        ):
+            yield json.dumps(point, default=str) + "\n"
+
+    async def index_document(
+        self, document: Dict[str, Any], collection: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Index a single document"""
+        return (await self.index_documents([document], collection))[0]
+
+    @StageTimer("semantic_search", "index")
+    async def index_documents(
+        self, documents: List[Dict[str, Any]], collection: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Index documents as chunks, embedding all chunks in shared batches
+
+        Each document is split into overlapping token windows. Every chunk
+        becomes its own point carrying the parent document id, so long texts
+        are searchable past the encoder's sequence limit. A document may
+        carry ``anchors`` (character ranges with source references such as
+        timestamps or bounding boxes); each chunk keeps the ones it overlaps.
+        """
+        collection = collection or self.default_collection
+        tokenizer = self.handler.text_tokenizer
+
+        ids: List[str] = []
+        texts: List[str] = []
+        payloads: List[Dict[str, Any]] = []
+        results: List[Dict[str, Any]] = []
+        # Lets other workers pick these chunks up into their lexical indexes
+        indexed_at = time.time()
+        for document in documents:
+            parent_id = self._document_id(document)
+            chunks = chunk_text(
+                self._document_text(document),
+                tokenizer,
+                window_tokens=settings.CHUNK_WINDOW_TOKENS,
+                overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+                sentence_aware=settings.CHUNK_SENTENCE_AWARE,
+            )
+            anchors = document.get("anchors") or []
+            data = {
+                key: value
+                for key, value in document.items()
+                if key not in ("content", "anchors")
+            }
+            data["id"] = parent_id
+            for chunk in chunks:
+                ids.append(self._chunk_point_id(parent_id, chunk.index))
+                texts.append(chunk.text)
+                payload = {
+                    "data": {**data, "content": chunk.text},
+                    "metadata": document.get("metadata") or {},
+                    "parent_id": parent_id,
+                    "chunk_index": chunk.index,
+                    "chunk_count": len(chunks),
+                    "start_char": chunk.start_char,
+                    "end_char": chunk.end_char,
+                    "indexed_at": indexed_at,
+                }
+                if anchors:
+                    payload["anchors"] = [
+                        anchor
+                        for anchor in anchors
+                        if anchor["start_char"] < chunk.end_char
+                        and anchor["end_char"] > chunk.start_char
+                    ]
+                payloads.append(payload)
+            results.append(
+                {
+                    "id": parent_id,
+                    "collection": collection,
+                    "chunks": len(chunks),
+                    "status": "indexed",
+                }
+            )
+
+        # Chunks are near the window length, so bucketing packs them tightly
+        vectors = await self.handler.vectorize_texts(texts)
+        await self.handler.upsert_points(
+            collection_name=collection, ids=ids, vectors=vectors, payloads=payloads
+        )
+        # A re-indexed document may now have fewer chunks; drop the old tail
+        # once its new chunks are in place, so it is never missing from search
+        await self.handler.delete_by_filter(
+            collection,
+            {
+                "should": [
+                    {
+                        "must": [
+                            {"key": "parent_id", "match": {"value": result["id"]}},
+                            {"key": "chunk_index", "range": {"gte": result["chunks"]}},
+                        ]
+                    }
+                    for result in results
+                ]
+            },
+        )
+
+        if collection in self._lexical.collections:
+            for document, result in zip(documents, results):
+                self._lexical.add(collection, result["id"], document["content"])
+        await self._invalidate(collection)
+        return results
+
+
+_service: Optional[SemanticSearchService] = None
+
+
+def get_semantic_search_service() -> SemanticSearchService:
+    """Return the process-wide search service, creating it on first use.
+
+    The search, OCR and transcription endpoints share it, and with it one
+    indexing pipeline, result cache and set of lexical indexes.
+    """
+    global _service
+    if _service is None:
+        _service = SemanticSearchService()
+    return _service
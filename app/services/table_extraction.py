@@ -0,0 +1,210 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache import RedisCache
+from app.services.ocr_tiling import annotation_bounds
+
+
+def merge_intervals(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    min_gap: float = 0.0,
+    groups: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Merge 1-D intervals separated by less than ``min_gap``
+
+    Intervals of different ``groups`` are never merged. Runs in O(n log n)
+    with one sort and a running maximum.
+
+    Returns each interval's band label, and the start and end of every
+    band. Bands are numbered by group, then by position.
+    """
+    n = len(starts)
+    if n == 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), empty, empty
+    if groups is not None:
+        # Shift each group past the previous one so a single sorted sweep
+        # never merges across groups
+        span = float(np.max(ends) - np.min(starts)) + abs(min_gap) + 1
+        shifted_starts, shifted_ends = starts + span * groups, ends + span * groups
+    else:
+        shifted_starts, shifted_ends = starts, ends
+    order = np.argsort(shifted_starts, kind="stable")
+    running = np.maximum.accumulate(shifted_ends[order])
+    sorted_starts = shifted_starts[order]
+    breaks = np.r_[True, (sorted_starts[1:] - running[:-1]) > min_gap]
+    first = np.flatnonzero(breaks)
+
+    labels = np.empty(n, dtype=np.int64)
+    labels[order] = np.cumsum(breaks) - 1
+    return labels, starts[order][first], np.maximum.reduceat(ends[order], first)
+
+
+def _cells(
+    words: List[Dict[str, Any]],
+    bounds: np.ndarray,
+    rows: np.ndarray,
+    segment_starts: np.ndarray,
+    segment_ends: np.ndarray,
+) -> Optional[Dict[str, Any]]:
+    """Build one table from its words, their row numbers and cell segments"""
+    _, column_starts, _ = merge_intervals(segment_starts, segment_ends)
+    if len(column_starts) < 2 or rows.max() < 1:
+        return None
+    centers = (bounds[:, 0] + bounds[:, 2]) / 2
+    columns = np.searchsorted(column_starts, centers, side="right") - 1
+    columns = np.clip(columns, 0, len(column_starts) - 1)
+
+    n_columns = len(column_starts)
+    cell_ids = rows * n_columns + columns
+    order = np.lexsort((bounds[:, 0], cell_ids))
+    sorted_ids = cell_ids[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    confidence = np.array(
+        [words[i].get("confidence") or 0.0 for i in order], dtype=np.float64
+    )
+    sums = np.add.reduceat(confidence, firsts)
+    counts = np.diff(np.r_[firsts, len(order)])
+
+    cells = []
+    for k, (start, stop) in enumerate(zip(firsts, np.r_[firsts[1:], len(order)])):
+        cell_id = int(sorted_ids[start])
+        cells.append(
+            {
+                "text": " ".join(words[i]["description"] for i in order[start:stop]),
+                "rowIndex": cell_id // n_columns,
+                "columnIndex": cell_id % n_columns,
+                "confidence": float(sums[k] / counts[k]),
+            }
+        )
+    return {"rows": int(rows.max()) + 1, "columns": n_columns, "cells": cells}
+
+
+def extract_tables(
+    words: List[Dict[str, Any]],
+    column_gap: Optional[float] = None,
+    row_gap: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Find tables in a page's word annotations
+
+    Words are grouped into text lines by vertical projection, and each line
+    into segments separated by horizontal whitespace of at least
+    ``column_gap`` (default: twice the median word height). Consecutive
+    lines with two or more segments and at most ``row_gap`` between them
+    (default: one median word height) form a table, whose columns are the
+    whitespace gaps shared by all its lines. Words go to cells by binary
+    search, so a page with many tables costs O(n log n) in its word count.
+
+    Returns ``Table``-shaped dicts in reading order.
+    """
+    if len(words) < 4:
+        return []
+    bounds = annotation_bounds(words)
+    heights = np.maximum(bounds[:, 3] - bounds[:, 1], 1)
+    median_height = float(np.median(heights))
+    column_gap = 2 * median_height if column_gap is None else column_gap
+    row_gap = median_height if row_gap is None else row_gap
+
+    # Text lines: words whose vertical extents overlap
+    lines, line_tops, line_bottoms = merge_intervals(bounds[:, 1], bounds[:, 3])
+    # Segments: runs of words in a line separated by narrow gaps
+    segments, segment_starts, segment_ends = merge_intervals(
+        bounds[:, 0], bounds[:, 2], column_gap, groups=lines
+    )
+    segment_lines = np.zeros(len(segment_starts), dtype=np.int64)
+    segment_lines[segments] = lines
+    segments_per_line = np.bincount(segment_lines, minlength=len(line_tops))
+
+    # Tables: runs of multi-segment lines without large vertical gaps
+    tabular = segments_per_line >= 2
+    gap_before = np.r_[np.inf, line_tops[1:] - line_bottoms[:-1]]
+    starts_run = tabular & (np.r_[True, ~tabular[:-1]] | (gap_before > row_gap))
+    table_of_line = np.where(tabular, np.cumsum(starts_run) - 1, -1)
+    table_of_word = table_of_line[lines]
+    table_of_segment = table_of_line[segment_lines]
+
+    word_order = np.argsort(table_of_word, kind="stable")
+    segment_order = np.argsort(table_of_segment, kind="stable")
+    n_tables = int(table_of_line.max()) + 1
+    word_splits = np.searchsorted(table_of_word[word_order], np.arange(n_tables + 1))
+    segment_splits = np.searchsorted(
+        table_of_segment[segment_order], np.arange(n_tables + 1)
+    )
+
+    tables = []
+    for table in range(n_tables):
+        members = word_order[word_splits[table] : word_splits[table + 1]]
+        table_segments = segment_order[
+            segment_splits[table] : segment_splits[table + 1]
+        ]
+        table_lines = lines[members]
+        rows = table_lines - table_lines.min()
+        result = _cells(
+            [words[i] for i in members],
+            bounds[members],
+            rows,
+            segment_starts[table_segments],
+            segment_ends[table_segments],
+        )
+        if result is not None:
+            tables.append(result)
+    return tables
+
+
+class LayoutCache:
+    """Per-page OCR layout cached by image content
+
+    Word annotations are stored under a hash of the page image and of the
+    OCR options that change what is read, so a repeat request for the same
+    page with the same options, such as one that only turns on
+    ``extractTables``, reuses them instead of running OCR again. Tables are
+    cached alongside once computed.
+    """
+
+    def __init__(self, cache: RedisCache, expire: int = 86400):
+        self.cache = cache
+        self.expire = expire
+
+    @staticmethod
+    def page_key(
+        content: bytes, page: int = 0, options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Cache key of one page of an uploaded document
+
+        ``options`` holds every OCR setting that affects the recognized words,
+        such as language hints, scale, deskew and contrast enhancement.
+        """
+        digest = hashlib.sha256(content)
+        digest.update(json.dumps(options or {}, sort_keys=True).encode())
+        return f"ocr:layout:{digest.hexdigest()}:{page}"
+
+    async def words(
+        self,
+        key: str,
+        recognize: Callable[[], Awaitable[List[Dict[str, Any]]]],
+    ) -> List[Dict[str, Any]]:
+        """Word annotations of a page, running ``recognize`` only on a miss"""
+        layout = await self.cache.get(key)
+        if layout is not None:
+            return layout["words"]
+        words = await recognize()
+        await self.cache.set(key, {"words": words}, self.expire)
+        return words
+
+    async def tables(
+        self,
+        key: str,
+        recognize: Callable[[], Awaitable[List[Dict[str, Any]]]],
+    ) -> List[Dict[str, Any]]:
+        """Tables of a page, computed from cached words when available"""
+        layout = await self.cache.get(key)
+        if layout is not None and "tables" in layout:
+            return layout["tables"]
+        words = layout["words"] if layout is not None else await recognize()
+        tables = extract_tables(words)
+        await self.cache.set(key, {"words": words, "tables": tables}, self.expire)
+        return tables
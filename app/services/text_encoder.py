@@ -0,0 +1,217 @@
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModel, AutoTokenizer
+
+from app.core.metrics import batch_size_observer
+
+logger = logging.getLogger(__name__)
+_observe_batch = batch_size_observer("text")
+
+DEFAULT_TEXT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+BACKENDS = ("eager", "torchscript", "quantized", "onnx")
+
+
+def plan_token_batches(
+    lengths: List[int], token_budget: int, max_batch_size: int
+) -> List[List[int]]:
+    """Group input indices into length-sorted batches bounded by a token budget
+
+    Inputs are sorted by token length so each batch pads to a similar length,
+    and a batch is closed once its padded size (longest length times item
+    count) would exceed ``token_budget`` or it holds ``max_batch_size`` items.
+    An input longer than the budget on its own still gets a batch of one.
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for index in order.tolist():
+        # Sorted ascending, so the incoming item sets the padded length
+        padded = lengths[index] * (len(batch) + 1)
+        if batch and (padded > token_budget or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TextEncoder:
+    """Sentence encoder with a selectable CPU inference backend
+
+    Backends:
+        eager: float32 PyTorch, the reference implementation.
+        torchscript: traced and frozen TorchScript graph.
+        quantized: dynamic int8 quantization of the Linear layers.
+        onnx: ONNX export executed by ONNX Runtime.
+
+    Every backend returns the same masked-mean-pooled, L2-normalized vectors.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_TEXT_MODEL,
+        backend: str = "eager",
+        onnx_path: Optional[str] = None,
+        token_budget: int = 8192,
+        max_batch_size: int = 64,
+        model_dir: str = "models",
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown text encoder backend '{backend}', expected one of {BACKENDS}"
+            )
+        self.model_name = model_name
+        self.backend = backend
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.model_dir = model_dir
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.dimension: int = 0
+        self._model = None
+        self._session = None
+
+        loader = getattr(self, f"_load_{backend}")
+        if backend == "onnx":
+            loader(onnx_path)
+        else:
+            loader()
+        logger.info(f"Loaded text encoder {model_name} with backend: {backend}")
+
+    def _load_eager(self):
+        """Load the float32 reference model"""
+        self._model = AutoModel.from_pretrained(self.model_name).eval()
+        self.dimension = self._model.config.hidden_size
+
+    def _load_torchscript(self):
+        """Trace the model into a frozen TorchScript graph"""
+        model = AutoModel.from_pretrained(self.model_name, torchscript=True).eval()
+        self.dimension = model.config.hidden_size
+        example = self._example_inputs()
+        with torch.inference_mode():
+            traced = torch.jit.trace(
+                model,
+                (example["input_ids"], example["attention_mask"]),
+                strict=False,
+            )
+        self._model = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+    def _load_quantized(self):
+        """Apply dynamic int8 quantization to the Linear layers"""
+        model = AutoModel.from_pretrained(self.model_name).eval()
+        self.dimension = model.config.hidden_size
+        self._model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    def _load_onnx(self, onnx_path: Optional[str] = None):
+        """Open an ONNX Runtime session, exporting the model on first use
+
+        The PyTorch weights are only loaded when no export exists yet.
+        """
+        import onnxruntime as ort
+
+        self.dimension = AutoConfig.from_pretrained(self.model_name).hidden_size
+        onnx_path = onnx_path or os.path.join(
+            self.model_dir, f"{self.model_name.replace('/', '__')}.onnx"
+        )
+        if not os.path.exists(onnx_path):
+            self._export_onnx(onnx_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def _export_onnx(self, onnx_path: str):
+        """Export the PyTorch model to an ONNX file"""
+        model = AutoModel.from_pretrained(self.model_name).eval()
+        os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+        example = self._example_inputs()
+        dynamic_axes = {0: "batch", 1: "sequence"}
+        torch.onnx.export(
+            model,
+            (example["input_ids"], example["attention_mask"]),
+            onnx_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic_axes,
+                "attention_mask": dynamic_axes,
+                "last_hidden_state": dynamic_axes,
+            },
+            opset_version=14,
+        )
+        logger.info(f"Exported text encoder to ONNX: {onnx_path}")
+
+    def _example_inputs(self) -> Dict[str, torch.Tensor]:
+        """Build example inputs used for tracing and export"""
+        return self.tokenizer(
+            ["example input", "a second, longer example input"],
+            return_tensors="pt",
+            padding=True,
+        )
+
+    def _hidden_states(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Run the backend and return the last hidden state"""
+        if self._session is not None:
+            outputs = self._session.run(
+                ["last_hidden_state"],
+                {
+                    "input_ids": inputs["input_ids"].numpy(),
+                    "attention_mask": inputs["attention_mask"].numpy(),
+                },
+            )
+            return torch.from_numpy(outputs[0])
+        if self.backend == "torchscript":
+            return self._model(inputs["input_ids"], inputs["attention_mask"])[0]
+        return self._model(
+            input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]
+        ).last_hidden_state
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalized sentence embeddings
+
+        Texts are tokenized once, scheduled into length-bucketed batches by
+        token budget and returned in their original order.
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        encoded = self.tokenizer(texts, truncation=True)
+        input_ids = encoded["input_ids"]
+        attention_mask = encoded["attention_mask"]
+        lengths = [len(ids) for ids in input_ids]
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for batch in plan_token_batches(
+            lengths, self.token_budget, self.max_batch_size
+        ):
+            _observe_batch(len(batch))
+            inputs = self.tokenizer.pad(
+                {
+                    "input_ids": [input_ids[i] for i in batch],
+                    "attention_mask": [attention_mask[i] for i in batch],
+                },
+                return_tensors="pt",
+            )
+            embeddings[batch] = self._encode_batch(inputs)
+        return embeddings
+
+    def _encode_batch(self, inputs: Dict[str, torch.Tensor]) -> np.ndarray:
+        """Encode one padded batch of token ids"""
+        with torch.inference_mode():
+            hidden = self._hidden_states(inputs)
+            # Masked mean pooling and L2 normalization in one pass, so padding
+            # tokens never leak into the sentence vector.
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            summed = (hidden * mask).sum(dim=1)
+            pooled = summed / mask.sum(dim=1).clamp(min=1e-9)
+            embeddings = torch.nn.functional.normalize(pooled, p=2, dim=1)
+        return embeddings.numpy()
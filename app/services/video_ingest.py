@@ -0,0 +1,315 @@
+import asyncio
+import queue
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from app.core.exceptions import APIException
+from app.core.metrics import StageTimer
+from app.services.image_ingest import to_bytes
+
+_base64_timer = StageTimer("video", "base64_decode")
+
+# embed(frames) -> one vector per (n, size, size, 3) float32 RGB frame
+FrameEmbedder = Callable[[np.ndarray], np.ndarray]
+
+
+@dataclass
+class Keyframe:
+    """A frame selected for embedding, ready for the embedder"""
+
+    shot: int
+    timestamp: float
+    image: np.ndarray
+
+
+@dataclass
+class Shot:
+    """A run of visually continuous frames and its pooled embedding"""
+
+    index: int
+    start: float
+    end: float
+    keyframes: List[float] = field(default_factory=list)
+    vector: Optional[np.ndarray] = None
+
+
+@dataclass
+class VideoEmbedding:
+    """Per-shot and whole-video embeddings of one video"""
+
+    duration: float
+    shots: List[Shot]
+    vector: np.ndarray
+
+
+def frame_signature(frame: np.ndarray) -> np.ndarray:
+    """Normalized hue/saturation histogram of a downscaled BGR frame"""
+    small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [16, 8], [0, 180, 0, 256])
+    return cv2.normalize(hist, hist).flatten()
+
+
+def prepare_frame(frame: np.ndarray, size: int = 224) -> np.ndarray:
+    """Center-cropped, resized RGB frame as float32 in [0, 1]"""
+    height, width = frame.shape[:2]
+    side = min(height, width)
+    top, left = (height - side) // 2, (width - side) // 2
+    square = frame[top : top + side, left : left + side]
+    square = cv2.resize(square, (size, size), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(square, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+
+
+def iter_keyframes(
+    path: str,
+    sample_fps: float = 2.0,
+    scene_threshold: float = 0.35,
+    max_gap: float = 10.0,
+    size: int = 224,
+) -> Iterator[Keyframe]:
+    """Keyframes of a video file at scene changes, returning its duration
+
+    Only ``sample_fps`` frames per second are converted and compared; the
+    others are grabbed without being retrieved, which skips their color
+    conversion and copy. A sampled frame whose histogram differs from the
+    previous one by more than ``scene_threshold`` (Bhattacharyya distance)
+    starts a new shot and becomes its keyframe. Long shots get another
+    keyframe every ``max_gap`` seconds.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise APIException(status_code=400, detail="Cannot decode video")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        step = max(int(round(fps / sample_fps)), 1)
+        previous: Optional[np.ndarray] = None
+        shot, last_keyframe, index = -1, 0.0, 0
+        while True:
+            if index % step:
+                if not capture.grab():
+                    break
+                index += 1
+                continue
+            ok, frame = capture.read()
+            if not ok:
+                break
+            timestamp = index / fps
+            index += 1
+            signature = frame_signature(frame)
+            cut = previous is None or (
+                cv2.compareHist(previous, signature, cv2.HISTCMP_BHATTACHARYYA)
+                > scene_threshold
+            )
+            previous = signature
+            if cut:
+                shot += 1
+            elif timestamp - last_keyframe < max_gap:
+                continue
+            last_keyframe = timestamp
+            yield Keyframe(shot, timestamp, prepare_frame(frame, size))
+        return index / fps
+    finally:
+        capture.release()
+
+
+def pool(vectors: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Unit-length weighted mean of unit-normalized vectors"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+    mean = np.average(vectors, axis=0, weights=weights)
+    return (mean / max(np.linalg.norm(mean), 1e-12)).astype(np.float32)
+
+
+class VideoIngest:
+    """Keyframe-based video embedding with overlapped decode and inference
+
+    A dedicated producer thread decodes the video and selects keyframes (see
+    ``iter_keyframes``) into a bounded queue while the consumer embeds them
+    ``batch_size`` at a time, so decoding the next frames overlaps with
+    inference on the previous ones. OpenCV and the embedding runtimes
+    release the GIL, so both make progress on separate cores. Keyframe
+    vectors are mean-pooled per shot, and shot vectors into a
+    duration-weighted video vector.
+    """
+
+    def __init__(
+        self,
+        embed: FrameEmbedder,
+        sample_fps: float = 2.0,
+        scene_threshold: float = 0.35,
+        max_keyframe_gap: float = 10.0,
+        frame_size: int = 224,
+        batch_size: int = 32,
+        queue_size: int = 64,
+    ):
+        self.embed = embed
+        self.sample_fps = sample_fps
+        self.scene_threshold = scene_threshold
+        self.max_keyframe_gap = max_keyframe_gap
+        self.frame_size = frame_size
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def _produce(self, path: str, frames: queue.Queue, stop: threading.Event):
+        """Decode keyframes into ``frames``, ending with the duration"""
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        keyframes = iter_keyframes(
+            path,
+            self.sample_fps,
+            self.scene_threshold,
+            self.max_keyframe_gap,
+            self.frame_size,
+        )
+        try:
+            while True:
+                try:
+                    keyframe = next(keyframes)
+                except StopIteration as end:
+                    put(float(end.value or 0.0))
+                    return
+                if not put(keyframe):
+                    keyframes.close()
+                    return
+        except Exception as e:
+            put(e)
+
+    def _embed(self, batch: List[Keyframe]) -> np.ndarray:
+        return np.asarray(self.embed(np.stack([k.image for k in batch])))
+
+    async def process(
+        self, data: Union[str, bytes], video_format: str = "mp4"
+    ) -> VideoEmbedding:
+        """Embed raw or base64-encoded video into shot and video vectors"""
+        data = to_bytes(data, _base64_timer)
+        loop = asyncio.get_running_loop()
+        frames: queue.Queue = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        keyframes: List[Keyframe] = []
+        vectors: List[np.ndarray] = []
+        batch: List[Keyframe] = []
+
+        # OpenCV reads from a path, so the upload is spooled to disk
+        with tempfile.NamedTemporaryFile(suffix=f".{video_format}") as file:
+            file.write(data)
+            file.flush()
+            # The producer gets its own thread rather than a default executor
+            # slot: with every slot taken by consumers waiting on their queues,
+            # an executor-run producer would never start
+            producer = threading.Thread(
+                target=self._produce,
+                args=(file.name, frames, stop),
+                name="video-keyframes",
+                daemon=True,
+            )
+            producer.start()
+            try:
+                while True:
+                    item = await loop.run_in_executor(None, frames.get)
+                    if isinstance(item, Exception):
+                        raise item
+                    done = not isinstance(item, Keyframe)
+                    if not done:
+                        batch.append(item)
+                    if batch and (done or len(batch) == self.batch_size):
+                        vectors.append(
+                            await loop.run_in_executor(None, self._embed, batch)
+                        )
+                        keyframes.extend(batch)
+                        batch = []
+                    if done:
+                        duration = item
+                        break
+            finally:
+                stop.set()
+                # The producer notices ``stop`` within one queue timeout
+                await loop.run_in_executor(None, producer.join)
+                try:
+                    # Wake a get left waiting if this task was cancelled
+                    frames.put_nowait(None)
+                except queue.Full:
+                    pass
+
+        if not keyframes:
+            raise APIException(status_code=400, detail="Video has no frames")
+        return self._pool(keyframes, np.concatenate(vectors), duration)
+
+    @staticmethod
+    def _pool(
+        keyframes: List[Keyframe], vectors: np.ndarray, duration: float
+    ) -> VideoEmbedding:
+        shot_ids = np.array([k.shot for k in keyframes])
+        firsts = np.flatnonzero(np.r_[True, shot_ids[1:] != shot_ids[:-1]])
+        bounds = np.r_[firsts, len(keyframes)]
+        starts = [keyframes[i].timestamp for i in firsts]
+        ends = starts[1:] + [max(duration, keyframes[-1].timestamp)]
+
+        shots = [
+            Shot(
+                index=int(shot_ids[first]),
+                start=start,
+                end=end,
+                keyframes=[k.timestamp for k in keyframes[first:stop]],
+                vector=pool(vectors[first:stop]),
+            )
+            for first, stop, start, end in zip(bounds[:-1], bounds[1:], starts, ends)
+        ]
+        lengths = np.array([max(shot.end - shot.start, 1e-3) for shot in shots])
+        video_vector = pool(np.stack([shot.vector for shot in shots]), lengths)
+        return VideoEmbedding(duration=duration, shots=shots, vector=video_vector)
+
+
+def shot_points(
+    video_id: str, video: VideoEmbedding, metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, List[Any]]:
+    """Point ids, vectors and payloads for a video and its shots
+
+    Every point carries the video id as ``parent_id``, so search results
+    can be collapsed to videos and a video's points found again when it is
+    reindexed. Shot points also carry their time range.
+    """
+    metadata = metadata or {}
+    ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, video_id))]
+    vectors = [video.vector.tolist()]
+    payloads = [
+        {
+            "data": {"video_id": video_id, "duration": video.duration},
+            "metadata": metadata,
+            "kind": "video",
+            "parent_id": video_id,
+        }
+    ]
+    for shot in video.shots:
+        shot_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{video_id}#shot{shot.index}")
+        ids.append(str(shot_id))
+        vectors.append(shot.vector.tolist())
+        payloads.append(
+            {
+                "data": {
+                    "video_id": video_id,
+                    "shot": shot.index,
+                    "start_time": shot.start,
+                    "end_time": shot.end,
+                    "keyframes": shot.keyframes,
+                },
+                "metadata": metadata,
+                "kind": "shot",
+                "parent_id": video_id,
+            }
+        )
+    return {"ids": ids, "vectors": vectors, "payloads": payloads}
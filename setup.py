@@ -13,7 +13,7 @@ setup(
         "httpx==0.25.2",
         "sqlalchemy==2.0.23",
         "redis==5.0.1",
-        "qdrant-client==1.6.4",
+        "qdrant-client==1.8.2",
         "fakeredis==2.20.0",
         "pytest-mock==3.12.0",
         "transformers==4.34.0",
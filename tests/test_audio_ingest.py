@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.core.config import Settings
+from app.services import audio_ingest
+from app.services.audio_ingest import AudioIngest, PCMCache, resample
+
+
+def _wav(samples: np.ndarray, rate: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, rate, format="WAV", subtype="FLOAT")
+    return buffer.getvalue()
+
+
+def test_resample_uses_reduced_ratio():
+    """Test resampling 44.1 kHz to 16 kHz keeps duration and dtype"""
+    samples = np.sin(np.linspace(0, 200 * np.pi, 44100)).astype(np.float64)
+    result = resample(samples, 44100, 16000)
+
+    assert len(result) == 16000
+    assert result.dtype == np.float32
+    assert result.flags.c_contiguous
+
+
+def test_pcm_cache_evicts_least_recently_used():
+    """Test the cache stays within its byte budget"""
+    cache = PCMCache(max_bytes=2 * 400)
+    for name in ("a", "b"):
+        cache.put((name, 16000), np.zeros(100, dtype=np.float32))
+    cache.get(("a", 16000))
+    cache.put(("c", 16000), np.zeros(100, dtype=np.float32))
+
+    assert cache.get(("b", 16000)) is None
+    assert cache.get(("a", 16000)) is not None
+    assert cache.size == 800
+
+
+@pytest.mark.asyncio
+async def test_load_decodes_once_and_shares_buffer(monkeypatch):
+    """Test a repeat load skips decoding and returns a read-only view"""
+    stereo = np.random.default_rng(0).uniform(-1, 1, (8000, 2)).astype(np.float32)
+    data = _wav(stereo, 8000)
+    calls = []
+    decode = audio_ingest.decode_audio
+
+    def counting_decode(*args):
+        calls.append(args)
+        return decode(*args)
+
+    monkeypatch.setattr(audio_ingest, "decode_audio", counting_decode)
+    ingest = AudioIngest(target_rate=16000)
+
+    first = await ingest.load(data, "wav")
+    second = await ingest.load(data, "wav")
+
+    assert len(calls) == 1
+    assert first.sample_rate == 16000
+    assert first.duration == pytest.approx(1.0)
+    assert np.shares_memory(first.samples, second.samples)
+    assert not first.samples.flags.writeable
+    assert first.view.readonly
+
+    await ingest.load(data, "wav", target_rate=8000)
+    assert len(calls) == 2
+
+
+def test_audio_ingest_from_settings():
+    """Test the target rate and PCM cache budget come from the settings"""
+    settings = Settings(AUDIO_TARGET_SAMPLE_RATE=8000, AUDIO_PCM_CACHE_BYTES=1024)
+
+    ingest = AudioIngest.from_settings(settings)
+
+    assert ingest.target_rate == 8000
+    assert ingest.cache.max_bytes == 1024
@@ -0,0 +1,108 @@
+import io
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.core.config import Settings
+from app.services.audio_streaming import (
+    ChunkPlanner,
+    StreamingTranscriber,
+    format_timestamp,
+    stitch_words,
+)
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end, "confidence": 0.9}
+
+
+def test_format_timestamp():
+    """Test seconds are formatted as HH:MM:SS.mmm"""
+    assert format_timestamp(2.5) == "00:00:02.500"
+    assert format_timestamp(3725.25) == "01:02:05.250"
+
+
+def test_chunk_planner_overlaps_and_cuts_in_pauses():
+    """Test chunks overlap and end in the quiet part of the search window"""
+    rate = 1000
+    audio = np.ones(25 * rate, dtype=np.float32)
+    audio[8200:8400] = 0.0
+    planner = ChunkPlanner(rate, chunk_seconds=10, overlap_seconds=1, search_seconds=3)
+
+    chunks = planner.feed(audio) + planner.flush()
+
+    start, first = chunks[0]
+    assert start == 0.0
+    assert 8200 <= len(first) <= 8400
+    assert chunks[1][0] == pytest.approx((len(first) - 1000) / rate)
+    end = chunks[-1][0] + len(chunks[-1][1]) / rate
+    assert end == pytest.approx(25.0)
+
+
+def test_stitch_words_anchors_on_shared_word():
+    """Test overlapping words are kept once, joined at a word both chunks heard"""
+    committed = [word("the", 8.0, 8.2), word("quick", 8.3, 8.6), word("bro", 9.7, 9.9)]
+    incoming = [
+        word("quick", 8.35, 8.6),
+        word("brown", 9.7, 10.1),
+        word("fox", 10.2, 10.5),
+    ]
+
+    stitched = stitch_words(committed, incoming, overlap_start=8.2, overlap_end=10.0)
+
+    assert [w["word"] for w in stitched] == ["the", "quick", "brown", "fox"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_transcriber_reports_partials():
+    """Test chunks are transcribed, stitched in order and reported as they finish"""
+    rate = 8000
+    buffer = io.BytesIO()
+    sf.write(buffer, np.full(rate * 25, 0.5, dtype=np.float32), rate, format="WAV")
+
+    async def transcribe(samples, sample_rate):
+        duration = len(samples) / sample_rate
+        return [word("chunk", 0.0, 0.5), word("end.", duration - 0.5, duration)]
+
+    partials = []
+
+    async def on_partial(result):
+        partials.append(result)
+
+    transcriber = StreamingTranscriber(
+        transcribe, chunk_seconds=10, overlap_seconds=1, max_concurrency=2
+    )
+    result = await transcriber.process(buffer.getvalue(), on_partial, block_seconds=2)
+
+    # Cuts fall 7 s into each 10 s window: chunks at 0, 6, 12 and 18 s
+    assert len(partials) == 4
+    assert result["duration"] == "00:00:25.000"
+    assert result["words"][0]["startTime"] == "00:00:00.000"
+    assert result["segments"][-1]["endTime"] == "00:00:25.000"
+
+
+def test_streaming_transcriber_from_settings():
+    """Test chunk length, overlap and concurrency come from the settings"""
+
+    async def transcribe(samples, sample_rate):
+        return []
+
+    settings = Settings(
+        TRANSCRIPTION_CHUNK_SECONDS=20.0,
+        TRANSCRIPTION_CHUNK_OVERLAP=1.5,
+        TRANSCRIPTION_MAX_CONCURRENCY=3,
+    )
+    transcriber = StreamingTranscriber.from_settings(transcribe, settings)
+
+    assert transcriber.transcribe is transcribe
+    assert transcriber.chunk_seconds == 20.0
+    assert transcriber.overlap_seconds == 1.5
+    assert transcriber.max_concurrency == 3
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+from transformers import AutoTokenizer
+
+from app.services.chunking import chunk_text, collapse_by_parent
+from app.services.text_encoder import DEFAULT_TEXT_MODEL
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    """Tokenizer of the default text encoder"""
+    return AutoTokenizer.from_pretrained(DEFAULT_TEXT_MODEL)
+
+
+@pytest.fixture
+def long_text():
+    """A text far longer than one encoder window"""
+    with open("test_data/text/shakespeare_sample.txt") as f:
+        text = f.read()
+    return " ".join([text.strip()] * 4)
+
+
+def test_short_text_is_one_chunk(tokenizer):
+    """Test text within the window is returned whole"""
+    chunks = chunk_text("A short document.", tokenizer, window_tokens=64)
+
+    assert len(chunks) == 1
+    assert chunks[0].text == "A short document."
+
+
+def test_chunks_fit_window_and_cover_text(tokenizer, long_text):
+    """Test every chunk fits the encoder and chunks overlap across the text"""
+    chunks = chunk_text(long_text, tokenizer, window_tokens=64, overlap_tokens=16)
+
+    assert len(chunks) > 1
+    assert chunks[0].start_char == 0
+    assert chunks[-1].end_char == len(long_text)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_char < previous.end_char
+        assert chunk.start_char > previous.start_char
+    for chunk in chunks:
+        assert len(tokenizer(chunk.text)["input_ids"]) <= 64
+
+
+def test_collapse_by_parent():
+    """Test chunk hits collapse to one hit per parent with max/sum scoring"""
+    hits = [
+        {"id": "c1", "parent_id": "doc1", "score": 0.9},
+        {"id": "c2", "parent_id": "doc2", "score": 0.8},
+        {"id": "c3", "parent_id": "doc2", "score": 0.7},
+        {"id": "legacy", "parent_id": None, "score": 0.75},
+    ]
+
+    by_max = collapse_by_parent(hits, aggregation="max")
+    by_sum = collapse_by_parent(hits, aggregation="sum")
+
+    assert [hit["id"] for hit in by_max] == ["doc1", "doc2", "legacy"]
+    assert [hit["id"] for hit in by_sum] == ["doc2", "doc1", "legacy"]
+    assert by_sum[0]["score"] == pytest.approx(1.5)
+    assert by_sum[0]["matched_chunks"] == 2
@@ -34,19 +34,19 @@ def test_db_session(test_db_engine):
 
 # Mock Qdrant Client
 class MockQdrantClient:
-    """Mock Qdrant client for testing."""
+    """Mock async Qdrant client for testing."""
 
     def __init__(self):
         self.collections = {}
         self.points = {}
 
-    def create_collection(self, collection_name: str, vectors_config=None):
+    async def create_collection(self, collection_name: str, vectors_config=None):
         """Create a collection."""
         if collection_name not in self.collections:
             self.collections[collection_name] = vectors_config or VectorParams(size=384, distance=Distance.COSINE)
             self.points[collection_name] = {}
 
-    def upsert(self, collection_name: str, points: list):
+    async def upsert(self, collection_name: str, points: list):
         """Upsert points into a collection."""
         if collection_name not in self.points:
             self.points[collection_name] = {}
@@ -57,7 +57,7 @@ class MockQdrantClient:
                 "payload": point.payload
             }
 
-    def search(self, collection_name: str, query_vector: list, limit: int = 10, score_threshold: float = 0.7, query_filter=None):
+    async def search(self, collection_name: str, query_vector: list, limit: int = 10, score_threshold: float = 0.7, query_filter=None, search_params=None):
         """Search for similar vectors."""
         if collection_name not in self.points:
             return []
@@ -85,6 +85,15 @@ class MockQdrantClient:
         
         return results
 
+    async def count(self, collection_name: str, count_filter=None, exact: bool = True):
+        """Count points matching a filter."""
+        points = self.points.get(collection_name, {}).values()
+        matched = [
+            point for point in points
+            if self._check_filter(point["payload"]["metadata"], count_filter)
+        ]
+        return CountResult(count=len(matched))
+
     def _check_filter(self, metadata: dict, query_filter: dict) -> bool:
         """Check if metadata matches the filter."""
         if not query_filter:
@@ -133,7 +142,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from fastapi.testclient import TestClient
-from qdrant_client.http.models import Filter, PointStruct, ScoredPoint
+from qdrant_client.http.models import CountResult, Filter, PointStruct, ScoredPoint
 from qdrant_client.models import Distance, VectorParams
 
 from app.main import app
@@ -0,0 +1,140 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.services.audio_streaming import words_to_segments
+from app.services.diarization import (
+    Diarizer,
+    assign_speakers,
+    cluster_blocks,
+    normalize_rows,
+    sliding_windows,
+)
+
+
+def _speakers(n_per_speaker: int, dimension: int = 16, seed: int = 0):
+    """Noisy unit embeddings around three well separated speaker directions"""
+    rng = np.random.default_rng(seed)
+    voices = np.eye(dimension)[:3]
+    labels = np.repeat(np.arange(3), n_per_speaker)
+    embeddings = voices[labels] + 0.05 * rng.standard_normal((len(labels), dimension))
+    return normalize_rows(embeddings), labels
+
+
+def test_sliding_windows_are_views():
+    """Test windows share memory with the audio and have centered times"""
+    samples = np.arange(10, dtype=np.float32)
+    windows, centers = sliding_windows(samples, 2, window_seconds=2, hop_seconds=1)
+
+    assert windows.shape == (4, 4)
+    assert np.shares_memory(windows, samples)
+    assert centers.tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+@pytest.mark.parametrize("block_size", [1000, 7])
+def test_cluster_blocks_recovers_speakers(block_size):
+    """Test blockwise clustering finds the same speakers as a single pass"""
+    embeddings, truth = _speakers(20)
+    labels, sums, counts = cluster_blocks(
+        embeddings, np.ones(len(embeddings)), 0.5, block_size=block_size
+    )
+
+    assert len(sums) == 3
+    assert counts.sum() == len(embeddings)
+    for speaker in range(3):
+        assert len(set(labels[truth == speaker].tolist())) == 1
+
+
+def test_cluster_blocks_respects_max_clusters():
+    """Test the speaker cap forces merges below the threshold"""
+    embeddings, _ = _speakers(10)
+    labels, sums, _ = cluster_blocks(
+        embeddings, np.ones(len(embeddings)), 0.99, max_clusters=2, block_size=8
+    )
+
+    assert len(sums) == 2
+    assert set(labels.tolist()) == {0, 1}
+
+
+def test_assign_speakers_uses_nearest_voiced_window():
+    """Test words take the label of the closest non-silent window"""
+    centers = np.array([0.5, 1.5, 2.5, 3.5])
+    labels = np.array([0, -1, 1, 1])
+    words = [
+        {"word": "hi", "start": 0.2, "end": 0.6},
+        {"word": "there", "start": 1.6, "end": 2.2},
+        {"word": "you", "start": 3.4, "end": 3.8},
+    ]
+
+    result = assign_speakers(words, centers, labels)
+
+    assert [w["speakerId"] for w in result] == [1, 2, 2]
+    assert "speakerId" not in words[0]
+
+
+def test_segments_split_on_speaker_change():
+    """Test a speaker turn starts a new segment"""
+    words = [
+        {"word": "hello", "start": 0.0, "end": 0.4, "speakerId": 1},
+        {"word": "hi", "start": 0.5, "end": 0.7, "speakerId": 2},
+    ]
+
+    assert [s["speakerId"] for s in words_to_segments(words)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_diarizer_labels_turns_and_skips_silence():
+    """Test two alternating voices get two speakers and silence none"""
+    rate = 100
+    t = np.arange(rate * 2) / rate
+    low = np.sin(2 * np.pi * 5 * t).astype(np.float32)
+    high = np.sin(2 * np.pi * 20 * t).astype(np.float32)
+    silence = np.zeros(rate * 2, dtype=np.float32)
+    samples = np.concatenate([low, silence, high, low])
+    batches = []
+
+    async def embed(windows, sample_rate):
+        batches.append(len(windows))
+        spectrum = np.abs(np.fft.rfft(windows, axis=1))
+        return spectrum[:, [5, 20]]
+
+    diarizer = Diarizer(embed, window_seconds=1.0, hop_seconds=1.0, batch_size=3)
+    centers, labels = await diarizer.diarize(samples, rate, max_speakers=4)
+
+    assert labels.tolist() == [0, 0, -1, -1, 1, 1, 0, 0]
+    assert max(batches) <= 3 and sum(batches) == 6
+
+
+@pytest.mark.asyncio
+async def test_diarizer_from_settings_caps_speakers_by_default():
+    """Test the configured speaker cap applies when a request sets none"""
+    rate = 100
+    t = np.arange(rate * 2) / rate
+    low = np.sin(2 * np.pi * 5 * t).astype(np.float32)
+    high = np.sin(2 * np.pi * 20 * t).astype(np.float32)
+    samples = np.concatenate([low, high])
+
+    async def embed(windows, sample_rate):
+        return np.abs(np.fft.rfft(windows, axis=1))[:, [5, 20]]
+
+    settings = Settings(
+        DIARIZATION_WINDOW_SECONDS=1.0,
+        DIARIZATION_HOP_SECONDS=1.0,
+        DIARIZATION_MAX_SPEAKERS=1,
+    )
+    diarizer = Diarizer.from_settings(embed, settings)
+
+    _, capped = await diarizer.diarize(samples, rate)
+    _, uncapped = await diarizer.diarize(samples, rate, max_speakers=4)
+
+    assert diarizer.window_seconds == 1.0
+    assert capped.tolist() == [0, 0, 0, 0]
+    assert uncapped.tolist() == [0, 0, 1, 1]
@@ -1,4 +1,5 @@
 import base64
+import io
 import os
 import sys
 from pathlib import Path
@@ -8,8 +9,12 @@ project_root = str(Path(__file__).parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+import cv2
+import numpy as np
 import pytest
+import soundfile as sf
 from fastapi.testclient import TestClient
+from PIL import Image
 
 from app.main import app
 from app.services.qdrant_handler import QdrantHandler
@@ -99,31 +104,40 @@ async def test_semantic_search_endpoint():
 
 
 @pytest.mark.asyncio
-async def test_qdrant_vectorization():
+async def test_qdrant_vectorization(tmp_path):
     """Test Qdrant vectorization with different data types"""
     qdrant = QdrantHandler()
+    dimensions = qdrant.registry.dimensions()
 
     # Test text vectorization
     text_vector = await qdrant.vectorize_text("Sample text for testing")
-    assert len(text_vector) == 384  # Updated to match the new model's vector size
+    assert len(text_vector) == dimensions["text"] == 384
 
     # Test image vectorization
-    with open(SAMPLE_TEXT_PATH, "rb") as f:
-        image_data = base64.b64encode(f.read()).decode("utf-8")
+    image = io.BytesIO()
+    Image.new("RGB", (64, 48), (200, 30, 30)).save(image, format="PNG")
+    image_data = base64.b64encode(image.getvalue()).decode("utf-8")
     image_vector = await qdrant.vectorize_image(image_data)
-    assert len(image_vector) == 384  # Updated to match the new model's vector size
+    assert len(image_vector) == dimensions["image"]
 
     # Test audio vectorization
-    with open(SAMPLE_TEXT_PATH, "rb") as f:
-        audio_data = base64.b64encode(f.read()).decode("utf-8")
+    audio = io.BytesIO()
+    tone = np.sin(np.linspace(0, 880 * np.pi, 16000)).astype(np.float32)
+    sf.write(audio, tone, 16000, format="WAV")
+    audio_data = base64.b64encode(audio.getvalue()).decode("utf-8")
     audio_vector = await qdrant.vectorize_audio(audio_data)
-    assert len(audio_vector) == 384  # Updated to match the new model's vector size
+    assert len(audio_vector) == dimensions["audio"]
 
     # Test video vectorization
-    with open(SAMPLE_TEXT_PATH, "rb") as f:
+    video_path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    for _ in range(20):
+        writer.write(np.full((48, 64, 3), 128, dtype=np.uint8))
+    writer.release()
+    with open(video_path, "rb") as f:
         video_data = base64.b64encode(f.read()).decode("utf-8")
     video_vector = await qdrant.vectorize_video(video_data)
-    assert len(video_vector) == 384  # Updated to match the new model's vector size
+    assert len(video_vector) == dimensions["video"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+from qdrant_client.http.models import ScoredPoint
+
+from app.core.exceptions import APIException
+from app.services.face_gallery import (
+    FaceGallery,
+    best_match_per_face,
+    normalize_embeddings,
+)
+
+
+def test_normalize_embeddings():
+    """Test embeddings are scaled to unit length and a single one becomes a row"""
+    normalized = normalize_embeddings([[3.0, 4.0], [0.0, 2.0]])
+
+    assert normalized.dtype == np.float32
+    assert np.linalg.norm(normalized, axis=1) == pytest.approx([1.0, 1.0])
+    assert normalize_embeddings([1.0, 0.0]).shape == (1, 2)
+
+
+def test_best_match_per_face():
+    """Test each face gets its best hit above the threshold or no match"""
+
+    def hit(person_id, score):
+        return ScoredPoint(
+            id=1,
+            version=1,
+            score=score,
+            payload={"person_id": person_id, "name": person_id.title()},
+        )
+
+    results = best_match_per_face(
+        [[hit("ada", 0.93), hit("alan", 0.85)], [hit("grace", 0.5)], []],
+        threshold=0.8,
+    )
+
+    assert results[0] == {
+        "matched": True,
+        "personId": "ada",
+        "score": 0.93,
+        "name": "Ada",
+    }
+    assert results[1] == {"matched": False}
+    assert results[2] == {"matched": False}
+
+
+class GalleryClient:
+    """Records the calls a FaceGallery makes"""
+
+    def __init__(self, collections=(), payload_schema=None):
+        self.collections = list(collections)
+        self.payload_schema = payload_schema or {}
+        self.calls = []
+
+    async def get_collections(self):
+        return SimpleNamespace(
+            collections=[SimpleNamespace(name=name) for name in self.collections]
+        )
+
+    async def get_collection(self, collection_name):
+        return SimpleNamespace(payload_schema=self.payload_schema)
+
+    async def create_collection(self, collection_name, **kwargs):
+        self.calls.append(("create_collection", collection_name))
+
+    async def create_payload_index(self, collection_name, field_name, field_schema):
+        self.calls.append(("create_payload_index", field_name))
+
+    async def upsert(self, collection_name, points):
+        self.calls.append(("upsert", points))
+
+    async def delete(self, collection_name, points_selector):
+        self.calls.append(("delete", points_selector))
+
+    async def search_batch(self, collection_name, requests):
+        self.calls.append(("search_batch", requests))
+        return [[] for _ in requests]
+
+
+@pytest.mark.asyncio
+async def test_initialize_indexes_existing_collection():
+    """Test missing payload indexes are created on an existing collection"""
+    client = GalleryClient(["faces"], payload_schema={"database_id": object()})
+
+    await FaceGallery(client, dimension=2).initialize()
+
+    assert client.calls == [("create_payload_index", "person_id")]
+
+
+@pytest.mark.asyncio
+async def test_enroll_upserts_before_dropping_stale_faces():
+    """Test re-enrollment only deletes faces outside the new set, afterwards"""
+    client = GalleryClient()
+    gallery = FaceGallery(client, dimension=2)
+
+    await gallery.enroll("db", "ada", [[1.0, 0.0], [0.0, 1.0]])
+
+    (upsert, points), (delete, selector) = client.calls
+    assert (upsert, delete) == ("upsert", "delete")
+    assert selector.filter.must_not[0].has_id == points.ids
+    assert [c.key for c in selector.filter.must] == ["database_id", "person_id"]
+
+
+@pytest.mark.asyncio
+async def test_match_rejects_wrong_dimension():
+    """Test embeddings of the wrong size are rejected before searching"""
+    client = GalleryClient()
+    gallery = FaceGallery(client, dimension=2)
+
+    with pytest.raises(APIException) as error:
+        await gallery.match("db", [[1.0, 0.0, 0.0]])
+
+    assert error.value.status_code == 400
+    assert client.calls == []
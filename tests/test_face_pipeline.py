@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+
+from app.services.face_pipeline import (
+    FacePipeline,
+    OnnxFaceEmbedder,
+    crop_faces,
+    haar_detector,
+)
+
+
+def detector(images):
+    """Two faces per image, the second more confident"""
+    boxes = np.array([[10, 10, 30, 30], [40, 20, 60, 60]], dtype=np.float32)
+    return [(boxes, np.array([0.7, 0.9])) for _ in images]
+
+
+class CountingModel:
+    """Crop model recording the size of every batch it is called with"""
+
+    def __init__(self, output):
+        self.output = output
+        self.calls = []
+
+    def __call__(self, crops):
+        self.calls.append(len(crops))
+        return [self.output(crop) for crop in crops]
+
+
+def test_crop_faces_shape():
+    """Test crops are square, resized and scaled to [0, 1]"""
+    image = np.full((80, 100, 3), 255, dtype=np.uint8)
+    crops = crop_faces(image, np.array([[0, 0, 10, 40], [90, 70, 120, 90]]), 32)
+
+    assert crops.shape == (2, 32, 32, 3)
+    assert crops.max() == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_models_run_on_pooled_batches():
+    """Test models are called per batch of faces, and results return per image"""
+    landmark_model = CountingModel(lambda crop: np.full((5, 2), 0.5))
+    embedding_model = CountingModel(lambda crop: np.ones(4))
+    pipeline = FacePipeline(
+        detector,
+        landmark_model=landmark_model,
+        embedding_model=embedding_model,
+        batch_size=4,
+    )
+    images = [np.zeros((100, 100, 3), dtype=np.uint8) for _ in range(5)]
+    features = [
+        {"landmarks": True, "matching": {"enabled": i == 0, "databaseId": "staff"}}
+        for i in range(5)
+    ]
+    matched = []
+
+    async def match(database_id, embeddings, threshold):
+        matched.append((database_id, len(embeddings)))
+        return [{"matched": False} for _ in embeddings]
+
+    faces = await pipeline.process(images, features, [2, 2, 2, 2, 1], match)
+
+    assert landmark_model.calls == [4, 4, 1]
+    assert embedding_model.calls == [2]
+    assert matched == [("staff", 2)]
+    assert [len(image_faces) for image_faces in faces] == [2, 2, 2, 2, 1]
+    best = faces[4][0]
+    assert best["confidence"] == pytest.approx(0.9)
+    # Landmarks at the crop center map to the center of the face box
+    assert best["landmarks"]["nose"] == {"x": 50, "y": 40}
+    assert best["matching"] is None
+    assert faces[0][0]["matching"] == {"matched": False}
+
+
+def test_haar_detector_finds_nothing_in_blank_images():
+    """Test the cascade adapter returns empty boxes and scores per image"""
+    detect = haar_detector()
+    images = [np.zeros((120, 160, 3), dtype=np.uint8) for _ in range(2)]
+
+    detections = detect(images)
+
+    assert len(detections) == 2
+    boxes, scores = detections[0]
+    assert boxes.shape == (0, 4)
+    assert scores.shape == (0,)
+
+
+def test_pipeline_from_settings_matches_only_with_an_embedding_model():
+    """Test matching is enabled by configuring an embedding network"""
+    settings = SimpleNamespace(FACE_EMBEDDING_MODEL_PATH=None, FACE_BATCH_SIZE=8)
+    assert FacePipeline.from_settings(settings).embedding_model is None
+
+    settings.FACE_EMBEDDING_MODEL_PATH = "arcface.onnx"
+    pipeline = FacePipeline.from_settings(settings)
+    assert isinstance(pipeline.embedding_model, OnnxFaceEmbedder)
+    assert pipeline.batch_size == 8
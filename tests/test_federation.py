@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.exceptions import APIException
+from app.services.federation import merge_collections, normalize_scores
+from app.services.semantic_search_service import SemanticSearchService
+
+
+def test_normalize_scores():
+    """Test min-max and z-score normalization, including flat score lists"""
+    scores = np.array([0.9, 0.8, 0.7])
+
+    assert normalize_scores(scores, "minmax") == pytest.approx([1.0, 0.5, 0.0])
+    assert normalize_scores(scores, "zscore").mean() == pytest.approx(0.0)
+    assert normalize_scores(np.array([0.5, 0.5]), "minmax").tolist() == [1.0, 1.0]
+    with pytest.raises(ValueError):
+        normalize_scores(scores, "softmax")
+
+
+def test_merge_collections_applies_weights():
+    """Test per-collection normalization and weights decide the merged order"""
+    hits_by_collection = {
+        "text": [{"id": "t1", "score": 0.95}, {"id": "t2", "score": 0.75}],
+        "image": [{"id": "i1", "score": 0.31}, {"id": "i2", "score": 0.21}],
+    }
+
+    merged = merge_collections(
+        hits_by_collection, weights={"text": 1.0, "image": 0.5}, limit=3
+    )
+
+    assert [hit["id"] for hit in merged] == ["t1", "i1", "t2"]
+    assert merged[1]["collection"] == "image"
+    assert merged[1]["raw_score"] == 0.31
+
+
+class FederatedHandler:
+    """QdrantHandler double with per-modality query spaces"""
+
+    def __init__(self, sizes, failures=None):
+        self.registry = SimpleNamespace(modalities=["text", "image", "audio"])
+        self.sizes = sizes
+        self.failures = failures or {}
+        self.queries = {}
+
+    async def vectorize_query(self, modality, text):
+        dimension = {"text": 3, "image": 4, "audio": 4}[modality]
+        return [1.0] * dimension
+
+    async def vector_size(self, collection_name):
+        return self.sizes[collection_name]
+
+    async def search(self, collection_name, query_vector, **kwargs):
+        if collection_name in self.failures:
+            raise self.failures[collection_name]
+        self.queries[collection_name] = len(query_vector)
+        return [
+            {
+                "id": f"{collection_name}-1",
+                "score": 0.9,
+                "data": {},
+                "metadata": {},
+                "parent_id": None,
+            }
+        ]
+
+
+def _service(handler):
+    service = SemanticSearchService()
+    service._handler = handler
+    return service
+
+
+@pytest.mark.asyncio
+async def test_federated_search_embeds_query_per_modality():
+    """Test each collection is searched with its own modality's query vector"""
+    handler = FederatedHandler({"text": 3, "image_v2": 4, "audio": 4})
+
+    result = await _service(handler).federated_search(
+        "dog", ["text", "image_v2", "audio"]
+    )
+
+    assert handler.queries == {"text": 3, "image_v2": 4, "audio": 4}
+    assert result["total_results"] == 3
+    assert result["skipped_collections"] == []
+
+
+@pytest.mark.asyncio
+async def test_federated_search_rejects_dimension_mismatch():
+    """Test a collection whose vectors do not fit its query is a 400"""
+    handler = FederatedHandler({"text": 3, "image": 384})
+
+    with pytest.raises(APIException) as error:
+        await _service(handler).federated_search("dog", ["text", "image"])
+    assert error.value.status_code == 400
+    assert "image" in error.value.detail
+
+
+@pytest.mark.asyncio
+async def test_federated_search_skips_only_unavailable_collections():
+    """Test timeouts skip a collection while other errors fail the query"""
+    handler = FederatedHandler(
+        {"text": 3, "audio": 4}, failures={"audio": asyncio.TimeoutError()}
+    )
+
+    result = await _service(handler).federated_search("dog", ["text", "audio"])
+    assert result["skipped_collections"] == ["audio"]
+    assert result["total_results"] == 1
+
+    handler.failures["audio"] = KeyError("data")
+    with pytest.raises(KeyError):
+        await _service(handler).federated_search("dog", ["text", "audio"])
@@ -0,0 +1,62 @@
+import io
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.image_ingest import (
+    ImageIngest,
+    decode_image,
+    estimate_skew,
+    rotate_image,
+)
+
+
+@pytest.fixture
+def jpeg_bytes():
+    """A 4000x3000 JPEG photo"""
+    gradient = np.linspace(0, 255, 4000, dtype=np.uint8)
+    pixels = np.dstack([np.tile(gradient, (3000, 1))] * 3)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_decode_downscales(jpeg_bytes):
+    """Test decoding to a working resolution keeps the aspect ratio"""
+    image = decode_image(jpeg_bytes, max_side=640)
+
+    assert image.shape == (480, 640, 3)
+    assert image.dtype == np.uint8
+
+
+def test_ingest_reuses_decodes(jpeg_bytes):
+    """Test arrays are cached per resolution and derived from larger ones"""
+    ingest = ImageIngest(jpeg_bytes)
+    large = ingest.array(1000)
+
+    assert ingest.array(1000) is large
+    assert ingest.array(500).shape == (375, 500, 3)
+    options = {"scale": 1.0, "deskew": False, "enhanceContrast": True}
+    assert ingest.ocr_input(options, 500) is ingest.ocr_input(options, 500)
+    assert ingest.ocr_input(options, 500).ndim == 2
+
+
+def test_estimate_skew():
+    """Test the skew of a rotated block of text lines is recovered"""
+    page = np.full((600, 600), 255, dtype=np.uint8)
+    for y in range(150, 450, 30):
+        cv2.rectangle(page, (100, y), (500, y + 12), 0, -1)
+
+    skewed = rotate_image(page, 5.0)
+
+    assert estimate_skew(skewed) == pytest.approx(5.0, abs=0.5)
+    assert estimate_skew(page) == pytest.approx(0.0, abs=0.5)
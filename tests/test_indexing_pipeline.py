@@ -0,0 +1,142 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import asyncio
+
+import pytest
+
+from app.services.indexing_pipeline import (
+    IndexingPipeline,
+    ocr_document,
+    transcript_document,
+)
+
+
+def _word(text, x, y, width=40, height=10):
+    return {
+        "description": text,
+        "boundingPoly": {
+            "vertices": [
+                {"x": x, "y": y},
+                {"x": x + width, "y": y},
+                {"x": x + width, "y": y + height},
+                {"x": x, "y": y + height},
+            ]
+        },
+    }
+
+
+def test_ocr_document_groups_lines_with_boxes():
+    """Test OCR words become lines in reading order anchored to boxes"""
+    result = {
+        "requestId": "r1",
+        "textAnnotations": [
+            _word("Hello world\nSecond line", 0, 0, 200, 40),
+            _word("world", 50, 0),
+            _word("Hello", 0, 2),
+            _word("line", 60, 30),
+            _word("Second", 0, 30),
+        ],
+    }
+
+    document = ocr_document(result)
+
+    assert document["id"] == "ocr:r1"
+    assert document["content"] == "Hello world\nSecond line"
+    assert [a["boundingBox"] for a in document["anchors"]] == [
+        [0, 0, 90, 12],
+        [0, 30, 100, 40],
+    ]
+    first, second = document["anchors"]
+    assert document["content"][second["start_char"] : second["end_char"]] == (
+        "Second line"
+    )
+
+
+def test_transcript_document_anchors_segments():
+    """Test transcript segments keep their times and character ranges"""
+    result = {
+        "requestId": "t1",
+        "segments": [
+            {
+                "text": "Hi there.",
+                "startTime": "00:00:00.000",
+                "endTime": "00:00:01.000",
+            },
+            {"text": " ", "startTime": "00:00:01.000", "endTime": "00:00:01.500"},
+            {
+                "text": "Welcome back.",
+                "startTime": "00:00:02.000",
+                "endTime": "00:00:03.000",
+                "speakerId": 2,
+            },
+        ],
+    }
+
+    document = transcript_document(result)
+
+    assert document["content"] == "Hi there. Welcome back."
+    assert [a["startTime"] for a in document["anchors"]] == [
+        "00:00:00.000",
+        "00:00:02.000",
+    ]
+    assert document["anchors"][1]["speakerId"] == 2
+    assert transcript_document({"requestId": "t2", "segments": []}) is None
+
+
+@pytest.mark.asyncio
+async def test_pipeline_batches_and_debounces_across_jobs():
+    """Test documents from several jobs are indexed together, latest wins"""
+    batches = []
+
+    async def index(documents):
+        batches.append(documents)
+
+    pipeline = IndexingPipeline(index, max_batch_size=3, debounce_seconds=0.05)
+    await pipeline.start()
+
+    await pipeline.submit([{"id": "a", "v": 1}, {"id": "b"}])
+    await pipeline.submit([{"id": "a", "v": 2}, None])
+    await asyncio.sleep(0.1)
+    assert len(batches) == 1
+    assert sorted(d["id"] for d in batches[0]) == ["a", "b"]
+    assert [d["v"] for d in batches[0] if d["id"] == "a"] == [2]
+
+    await pipeline.submit([{"id": str(i)} for i in range(4)])
+    await pipeline.stop()
+    assert [len(batch) for batch in batches[1:]] == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_survives_index_errors():
+    """Test a failing batch is logged and the worker keeps running"""
+    calls = []
+
+    async def index(documents):
+        calls.append(len(documents))
+        if len(calls) == 1:
+            raise RuntimeError("qdrant down")
+
+    pipeline = IndexingPipeline(index, debounce_seconds=0.01)
+    await pipeline.start()
+    await pipeline.submit([{"id": "a"}])
+    await asyncio.sleep(0.05)
+    await pipeline.submit([{"id": "b"}])
+    await pipeline.stop()
+
+    assert calls == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_submit_before_start_is_dropped():
+    """Test nothing is queued when the worker is not running"""
+
+    async def index(documents):
+        raise AssertionError("not expected")
+
+    assert await IndexingPipeline(index).submit([{"id": "a"}]) == 0
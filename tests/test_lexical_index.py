@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+
+from app.services.lexical_index import (
+    BM25Index,
+    LexicalIndexes,
+    LexicalIndexUnavailable,
+    reciprocal_rank_fusion,
+    stitch_chunks,
+    tokenize,
+)
+
+
+def test_tokenize_keeps_identifiers():
+    """Test identifiers with separators stay single terms"""
+    assert tokenize("Invoice INV-4471.b for COVID-19") == [
+        "invoice",
+        "inv-4471.b",
+        "for",
+        "covid-19",
+    ]
+
+
+def test_bm25_ranks_rare_terms_and_updates_incrementally():
+    """Test BM25 favors rare exact matches and re-adding replaces a document"""
+    index = BM25Index()
+    index.add("doc1", "quarterly report on revenue and revenue growth")
+    index.add("doc2", "invoice INV-4471 for consulting services")
+    index.add("doc3", "report on consulting services")
+
+    assert index.search("INV-4471 report")[0][0] == "doc2"
+    assert index.candidates("invoice") == {"doc2"}
+
+    index.add("doc2", "an unrelated memo")
+    assert index.candidates("invoice") == set()
+    assert len(index) == 3
+
+    index.remove("doc3")
+    assert "doc3" not in index
+    assert [doc_id for doc_id, _ in index.search("consulting")] == []
+
+
+def test_reciprocal_rank_fusion():
+    """Test documents ranked well in both lists come first"""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+
+
+def _chunk(parent_id, index, text, start, indexed_at=1.0):
+    return {
+        "parent_id": parent_id,
+        "chunk_index": index,
+        "start_char": start,
+        "end_char": start + len(text),
+        "indexed_at": indexed_at,
+        "data": {"content": text},
+    }
+
+
+class ChunkStore:
+    """Qdrant scroll double over chunk payloads"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.filters = []
+
+    async def scroll(self, collection, filter):
+        self.filters.append(filter)
+        since = filter["must"][0]["range"]["gte"] if filter else float("-inf")
+        for chunk in self.chunks:
+            if chunk["indexed_at"] >= since:
+                yield chunk
+
+
+def test_stitch_chunks_removes_overlap():
+    """Test overlapping chunks rebuild the original text once"""
+    chunks = [
+        _chunk("a", 1, "brown fox jumps", 10),
+        _chunk("a", 0, "the quick brown", 0),
+        _chunk("a", 2, "lazy dog", 27),
+    ]
+
+    assert stitch_chunks(chunks) == "the quick brown fox jumps lazy dog"
+
+
+@pytest.mark.asyncio
+async def test_lexical_indexes_build_and_sync_from_qdrant():
+    """Test indexes are rebuilt from stored chunks and pick up new writes"""
+    store = ChunkStore([_chunk("a", 0, "invoice INV-4471", 0, indexed_at=100.0)])
+    indexes = LexicalIndexes(store.scroll, ["text"], refresh_seconds=10.0)
+
+    with pytest.raises(LexicalIndexUnavailable):
+        indexes.get("text")
+    with pytest.raises(ValueError):
+        indexes.get("image")
+
+    await indexes.sync("text")
+    assert indexes.get("text").candidates("inv-4471") == {"a"}
+
+    # Written by another worker after the first sync
+    store.chunks.append(_chunk("b", 0, "quarterly report", 0, indexed_at=105.0))
+    await indexes.sync("text")
+    assert store.filters[-1]["must"][0]["range"] == {"gte": 90.0}
+    assert indexes.get("text").candidates("report") == {"b"}
+
+
+@pytest.mark.asyncio
+async def test_lexical_index_disabled_past_max_documents():
+    """Test an oversized corpus disables lexical search instead of truncating"""
+    store = ChunkStore([_chunk(str(i), 0, f"doc {i}", 0) for i in range(3)])
+    indexes = LexicalIndexes(store.scroll, ["text"], max_documents=2)
+
+    await indexes.sync("text")
+
+    with pytest.raises(LexicalIndexUnavailable, match="exceeds 2"):
+        indexes.get("text")
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.live_transcription import (
+    LiveTranscriptionSession,
+    PcmDecoder,
+    decode_pcm,
+)
+
+
+def test_decode_pcm():
+    """Test 16-bit PCM is scaled to [-1, 1] and channels are averaged"""
+    frame = np.array([16384, -16384, 32767, 32767], dtype="<i2").tobytes()
+
+    assert decode_pcm(frame).tolist() == pytest.approx([0.5, -0.5, 1.0, 1.0], 1e-4)
+    assert decode_pcm(frame, channels=2).tolist() == pytest.approx([0.0, 1.0], 1e-4)
+
+
+def test_decode_pcm_rejects_bad_input():
+    """Test partial frames, unknown encodings and non-finite floats fail"""
+    with pytest.raises(ValueError):
+        decode_pcm(b"\x00\x00\x00", "pcm_s16le")
+    with pytest.raises(ValueError):
+        decode_pcm(b"", "mp3")
+    with pytest.raises(ValueError):
+        decode_pcm(np.array([np.nan], dtype="<f4").tobytes(), "pcm_f32le")
+
+
+def test_pcm_decoder_keeps_split_frames():
+    """Test samples cut across messages are joined, not dropped or shifted"""
+    data = np.array([1000, -1000, 2000, -2000, 3000, -3000], dtype="<i2").tobytes()
+    decoder = PcmDecoder("pcm_s16le", channels=2)
+
+    chunks = [decoder.decode(data[:3]), decoder.decode(data[3:9])]
+    chunks.append(decoder.decode(data[9:]))
+
+    assert [len(chunk) for chunk in chunks] == [0, 2, 1]
+    assert np.concatenate(chunks).tolist() == [0.0, 0.0, 0.0]
+    assert decoder.decode(b"").tolist() == []
+
+
+@pytest.mark.asyncio
+async def test_session_emits_interim_and_final_segments():
+    """Test speech yields interim segments and a final one after a pause"""
+    rate = 8000
+    calls = []
+
+    async def transcribe(samples, sample_rate):
+        calls.append(len(samples) / sample_rate)
+        return [{"word": "hello", "start": 0.0, "end": 0.5, "confidence": 0.8}]
+
+    session = LiveTranscriptionSession(
+        transcribe, sample_rate=rate, interim_seconds=0.5, silence_seconds=0.3
+    )
+    silence = np.zeros(rate // 2, dtype=np.float32)
+    tone = 0.5 * np.sin(np.linspace(0, 2000 * np.pi, rate * 2)).astype(np.float32)
+
+    events = await session.feed(silence)
+    events += await session.feed(tone[: rate])
+    await asyncio.sleep(0)
+    interim = session.interim()
+    events += await session.feed(tone[rate:])
+    events += await session.feed(silence)
+
+    assert interim["type"] == "interim"
+    assert [event["type"] for event in events] == ["final"]
+    final = events[0]["segment"]
+    assert final["startTime"] == "00:00:00.480"
+    assert final["text"] == "hello"
+    # The final transcription covers the speech without the trailing pause
+    assert calls[-1] == pytest.approx(2.0, abs=0.05)
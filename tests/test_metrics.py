@@ -0,0 +1,126 @@
+import base64
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+from fakeredis import FakeRedis
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.cache import RedisCache
+from app.core import metrics
+from app.core.metrics import StageTimer, TimedRoute
+from app.services.image_ingest import to_bytes
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _stage_count(service, stage):
+    return _sample("air_stage_duration_seconds_count", service=service, stage=stage)
+
+
+def test_stage_timer_times_sync_functions():
+    """Test decorated sync calls are observed and errors counted"""
+
+    @StageTimer("test", "sync")
+    def work(fail=False):
+        if fail:
+            raise RuntimeError("boom")
+        return 42
+
+    before = _stage_count("test", "sync")
+    assert work() == 42
+    with pytest.raises(RuntimeError):
+        work(fail=True)
+
+    assert _stage_count("test", "sync") == before + 2
+    assert _sample("air_stage_errors_total", service="test", stage="sync") >= 1
+
+
+@pytest.mark.asyncio
+async def test_stage_timer_times_async_functions():
+    """Test decorated coroutines are observed once awaited"""
+
+    @StageTimer("test", "async")
+    async def work():
+        return "done"
+
+    before = _stage_count("test", "async")
+    assert await work() == "done"
+    assert _stage_count("test", "async") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_cache_lookups_counted():
+    """Test cache reads count hits and misses"""
+    cache = RedisCache(FakeRedis())
+    hits = _sample("air_cache_lookups_total", result="hit")
+    misses = _sample("air_cache_lookups_total", result="miss")
+
+    await cache.set("key", {"value": 1})
+    await cache.get("key")
+    await cache.get("missing")
+
+    assert _sample("air_cache_lookups_total", result="hit") == hits + 1
+    assert _sample("air_cache_lookups_total", result="miss") == misses + 1
+
+
+def test_timed_route_reports_request_stages():
+    """Test routes record parse, handler and serialize stages by tag"""
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.post("/echo")
+    async def echo(payload: dict):
+        return payload
+
+    app = FastAPI()
+    app.include_router(router, tags=["Timed Service"])
+    before = {
+        stage: _stage_count("timed_service", stage)
+        for stage in ("parse", "handler", "serialize")
+    }
+
+    response = TestClient(app).post("/echo", json={"a": 1})
+
+    assert response.json() == {"a": 1}
+    for stage, count in before.items():
+        assert _stage_count("timed_service", stage) == count + 1
+
+
+def test_timed_route_reuses_mark_buffers():
+    """Test sequential requests share one stage buffer instead of allocating"""
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/ping")
+    async def ping():
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    client.get("/ping")
+    buffers = list(metrics._free_marks)
+    client.get("/ping")
+
+    assert buffers and metrics._free_marks == buffers
+    assert all(a is b for a, b in zip(metrics._free_marks, buffers))
+
+
+def test_base64_decode_timed_per_path():
+    """Test each ingest path reports base64 decoding under its own service"""
+    timer = StageTimer("test_ingest", "base64_decode")
+    before = _stage_count("test_ingest", "base64_decode")
+
+    assert to_bytes(base64.b64encode(b"audio").decode(), timer) == b"audio"
+    assert to_bytes(b"raw", timer) == b"raw"
+
+    assert _stage_count("test_ingest", "base64_decode") == before + 1
@@ -0,0 +1,162 @@
+import logging
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+from qdrant_client.models import Distance
+
+from app.services.model_registry import Encoder, ModelRegistry
+from app.services.qdrant_handler import QdrantHandler
+
+
+class FakeEncoder(Encoder):
+    """Encoder returning each item's value in every dimension"""
+
+    def __init__(self, dimension: int = 4, max_batch_size: int = 3):
+        super().__init__("fake", max_batch_size)
+        self._dimension = dimension
+        self.loads = 0
+        self.batches = []
+
+    def _load(self):
+        self.loads += 1
+
+    def _encode_batch(self, items):
+        self.batches.append(len(items))
+        return np.array([[float(item) + 1] * self.dimension for item in items])
+
+
+class RecordingClient:
+    """Qdrant client double recording created collections"""
+
+    def __init__(self):
+        self.created = {}
+
+    async def get_collections(self):
+        raise ConnectionError("offline")
+
+    async def create_collection(self, collection_name, vectors_config):
+        self.created[collection_name] = vectors_config
+
+    async def update_collection_aliases(self, change_aliases_operations):
+        pass
+
+
+def test_encode_micro_batches_and_normalizes():
+    """Test items are encoded in bounded batches into unit vectors"""
+    encoder = FakeEncoder()
+    registry = ModelRegistry({"fake": encoder})
+
+    vectors = registry.encode("fake", list(range(7)))
+
+    assert encoder.batches == [3, 3, 1]
+    assert vectors.shape == (7, 4)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+
+def test_encoder_loads_once_on_first_use():
+    """Test weights load lazily and only once"""
+    encoder = FakeEncoder()
+    registry = ModelRegistry({"fake": encoder})
+
+    assert registry.dimensions() == {"fake": 4}
+    assert encoder.loads == 0
+    registry.encode("fake", [1])
+    registry.encode("fake", [2])
+    assert encoder.loads == 1
+
+
+def test_unknown_modality():
+    """Test encoding an unregistered modality fails clearly"""
+    with pytest.raises(ValueError, match="thermal"):
+        ModelRegistry().encode("thermal", [1])
+
+
+@pytest.mark.asyncio
+async def test_collections_sized_by_registry():
+    """Test collections follow the registered encoders' sizes and distances"""
+    registry = ModelRegistry({"image": FakeEncoder(8), "depth": FakeEncoder(3)})
+    client = RecordingClient()
+    handler = QdrantHandler(client=client, registry=registry)
+
+    await handler.initialize()
+
+    assert client.created["image_v1"].size == 8
+    assert client.created["depth_v1"].size == 3
+    assert client.created["depth_v1"].distance == Distance.COSINE
+
+
+class ExistingClient(RecordingClient):
+    """Qdrant client double whose collections already exist at some size"""
+
+    def __init__(self, sizes):
+        super().__init__()
+        self.sizes = sizes
+
+    async def get_collections(self):
+        return SimpleNamespace(
+            collections=[SimpleNamespace(name=name) for name in self.sizes]
+        )
+
+    async def get_aliases(self):
+        return SimpleNamespace(aliases=[])
+
+    async def get_collection(self, collection_name):
+        vectors = SimpleNamespace(size=self.sizes[collection_name])
+        params = SimpleNamespace(vectors=vectors)
+        return SimpleNamespace(config=SimpleNamespace(params=params))
+
+
+@pytest.mark.asyncio
+async def test_startup_reports_collections_sized_for_another_encoder(caplog):
+    """Test an existing collection of the wrong vector size is logged loudly"""
+    registry = ModelRegistry({"image": FakeEncoder(8), "audio": FakeEncoder(3)})
+    handler = QdrantHandler(
+        client=ExistingClient({"image": 512, "audio": 3}), registry=registry
+    )
+
+    with caplog.at_level(logging.ERROR):
+        await handler.initialize()
+
+    errors = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+    assert len(errors) == 1
+    assert "image holds 512-dimensional vectors" in errors[0]
+
+
+@pytest.mark.asyncio
+async def test_vectorize_runs_off_the_event_loop():
+    """Test encoding happens on an executor thread, not the loop's"""
+    threads = []
+
+    class ThreadEncoder(FakeEncoder):
+        def _encode_batch(self, items):
+            threads.append(threading.get_ident())
+            return super()._encode_batch(items)
+
+    handler = QdrantHandler(
+        client=RecordingClient(), registry=ModelRegistry({"fake": ThreadEncoder()})
+    )
+
+    vectors = await handler.vectorize("fake", [1, 2])
+
+    assert len(vectors) == 2
+    assert threads and threading.get_ident() not in threads
+
+
+def test_encoder_requires_load_and_encode_batch():
+    """Test an encoder missing its model hooks cannot be created"""
+
+    class Incomplete(Encoder):
+        def _load(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete("fake")
@@ -0,0 +1,146 @@
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+from fakeredis import FakeRedis
+from PIL import Image
+
+from app.core.cache import RedisCache
+from app.services.ocr_tiling import (
+    PageProgress,
+    Tile,
+    TiledOCR,
+    count_pages,
+    deduplicate,
+    load_pages,
+    plan_tiles,
+    recognize_tile,
+)
+
+
+def box(text, x1, y1, x2, y2, confidence=0.9):
+    """A TextAnnotation dict with a rectangular bounding polygon"""
+    vertices = [
+        {"x": x1, "y": y1},
+        {"x": x2, "y": y1},
+        {"x": x2, "y": y2},
+        {"x": x1, "y": y2},
+    ]
+    return {
+        "description": text,
+        "boundingPoly": {"vertices": vertices},
+        "confidence": confidence,
+    }
+
+
+def test_plan_tiles_cover_page():
+    """Test tiles overlap, stay inside the page and cover every pixel"""
+    tiles = plan_tiles(height=1000, width=2500, tile_size=1024, overlap=100)
+    covered = np.zeros((1000, 2500), dtype=bool)
+    for tile in tiles:
+        covered[tile.y : tile.y + tile.height, tile.x : tile.x + tile.width] = True
+        assert tile.x + tile.width <= 2500 and tile.y + tile.height <= 1000
+
+    assert covered.all()
+    assert len(tiles) == 3
+    assert tiles[0].inner_edges == (False, False, True, False)
+
+
+def test_recognize_tile_remaps_and_drops_cut_text():
+    """Test annotations move to page coordinates and seam-cut ones are dropped"""
+    tile = Tile(x=900, y=0, width=1024, height=1000, inner_edges=(True,) * 4)
+
+    def recognize(image):
+        return [box("whole", 100, 50, 200, 80), box("cut", 0, 50, 40, 80)]
+
+    annotations = recognize_tile(recognize, np.zeros((1000, 1024)), tile)
+
+    assert [a["description"] for a in annotations] == ["whole"]
+    assert annotations[0]["boundingPoly"]["vertices"][0] == {"x": 1000, "y": 50}
+
+
+def test_deduplicate_across_tiles_only():
+    """Test text read by two tiles is kept once, and same-tile text is kept"""
+    annotations = [
+        box("seam", 1000, 50, 1100, 80, confidence=0.8),
+        box("seam", 1001, 50, 1100, 81, confidence=0.95),
+        box("line", 0, 200, 500, 230),
+        box("word", 0, 200, 100, 230),
+    ]
+
+    kept = deduplicate(annotations, tiles=[0, 1, 0, 0])
+
+    assert [a["description"] for a in kept] == ["seam", "line", "word"]
+    assert kept[0]["confidence"] == 0.95
+
+
+def _tiff(pages):
+    """A multi-page TIFF with one solid grey page per value"""
+    frames = [Image.new("L", (8, 8), color=value) for value in pages]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="TIFF", save_all=True, append_images=frames[1:])
+    return buffer.getvalue()
+
+
+def test_load_pages_is_lazy():
+    """Test pages are decoded one at a time as the iterator advances"""
+    data = _tiff([10, 20, 30])
+    pages = load_pages(data)
+
+    assert count_pages(data) == 3
+    assert not isinstance(pages, list)
+    assert [int(page[0, 0]) for page in pages] == [10, 20, 30]
+
+
+@pytest.mark.asyncio
+async def test_process_bounds_pages_in_flight():
+    """Test no more than max_pages pages are in flight and order is kept"""
+    ocr = TiledOCR(recognize=None, max_pages=2)
+    active, peak = 0, 0
+
+    async def process_page(page):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01 * (5 - int(page[0, 0])))
+        active -= 1
+        return [int(page[0, 0])]
+
+    ocr._process_page = process_page
+    finished = []
+
+    async def on_page(index, annotations):
+        finished.append(index)
+
+    pages = (np.full((1, 1), value) for value in range(5))
+    results = await ocr.process(pages, on_page)
+
+    assert results == [[0], [1], [2], [3], [4]]
+    assert peak == 2
+    assert sorted(finished) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_page_progress_stores_one_field_per_page():
+    """Test each finished page is its own hash field and completes the job"""
+    redis_client = FakeRedis()
+    progress = PageProgress(RedisCache(redis_client))
+
+    await progress.start("job", 2)
+    await progress.add_page("job", 1, [{"description": "b"}])
+    assert (await progress.get("job"))["status"] == "processing"
+    await progress.add_page("job", 0, [{"description": "a"}])
+
+    state = await progress.get("job")
+    assert redis_client.hlen("ocr:pages:job") == 3
+    assert state["status"] == "completed"
+    assert state["progress"] == 1.0
+    assert state["pages"]["0"] == [{"description": "a"}]
@@ -0,0 +1,110 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+
+from app.core.qdrant import CircuitBreaker, CircuitOpenError, ResilientQdrantClient
+
+
+class FlakyClient:
+    """Async client stub failing a set number of times before succeeding"""
+
+    def __init__(self, failures: int, error: Exception = ConnectionError("down")):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def count(self, collection_name: str):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return 42
+
+    async def slow(self):
+        await asyncio.sleep(1)
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried():
+    client = ResilientQdrantClient(FlakyClient(failures=2), retries=3, backoff=0)
+
+    assert await client.count(collection_name="text") == 42
+    assert client.client.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_non_transient_errors_are_not_retried():
+    flaky = FlakyClient(failures=1, error=ValueError("bad request"))
+    client = ResilientQdrantClient(flaky, retries=3, backoff=0)
+
+    with pytest.raises(ValueError):
+        await client.count(collection_name="text")
+    assert flaky.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_is_enforced():
+    client = ResilientQdrantClient(FlakyClient(failures=0), timeout=0.01, retries=0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.slow()
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    flaky = FlakyClient(failures=10)
+    client = ResilientQdrantClient(flaky, retries=1, backoff=0, breaker=breaker)
+
+    with pytest.raises(ConnectionError):
+        await client.count(collection_name="text")
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await client.count(collection_name="text")
+    assert flaky.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+
+    client = ResilientQdrantClient(FlakyClient(failures=0), breaker=breaker)
+    probe = asyncio.ensure_future(client.slow())
+    await asyncio.sleep(0)
+
+    with pytest.raises(CircuitOpenError):
+        await client.count(collection_name="text")
+    await probe
+    assert breaker.state == "closed"
+    assert await client.count(collection_name="text") == 42
+
+
+@pytest.mark.asyncio
+async def test_with_timeout_overrides_deadline_and_retries():
+    connected = []
+
+    def connect(timeout):
+        connected.append(timeout)
+        return FlakyClient(failures=0)
+
+    client = ResilientQdrantClient(
+        FlakyClient(failures=0), timeout=0.01, retries=3, connect=connect
+    )
+    slow = client.with_timeout(5, retries=0)
+
+    await slow.slow()
+    assert slow.retries == 0
+    assert slow.breaker is client.breaker
+    assert slow is client.with_timeout(5, retries=0)
+    assert connected == [5]
+    with pytest.raises(asyncio.TimeoutError):
+        await client.slow()
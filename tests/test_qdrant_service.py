@@ -0,0 +1,143 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import asyncio
+
+import numpy as np
+import pytest
+from qdrant_client.http import models
+
+from app.services import qdrant_service
+from app.services.qdrant_service import QdrantException, QdrantService
+
+
+class BatchClient:
+    """Qdrant client double recording write requests and their overlap"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.upserts = []
+        self.updates = []
+        self.deletes = []
+        self.active = 0
+        self.peak = 0
+
+    async def _request(self):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+
+    async def upsert(self, collection_name, points):
+        await self._request()
+        self.upserts.append(points)
+
+    async def batch_update_points(self, collection_name, update_operations):
+        await self._request()
+        self.updates.append(update_operations)
+
+    async def delete(self, collection_name, points_selector):
+        self.deletes.append(points_selector)
+
+    async def count(self, *args, **kwargs):
+        raise AssertionError("delete_by_filter must not count")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = BatchClient()
+    monkeypatch.setattr(qdrant_service, "get_qdrant_client", lambda settings: client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_splits_by_point_count(client):
+    """Test points are split into batches of at most batch_size"""
+    vectors = np.arange(40, dtype=np.float32).reshape(10, 4)
+
+    stats = await QdrantService().upsert_many(
+        "text", ids=list(range(10)), vectors=vectors, batch_size=3
+    )
+
+    assert [batch.ids for batch in client.upserts] == [
+        [0, 1, 2],
+        [3, 4, 5],
+        [6, 7, 8],
+        [9],
+    ]
+    assert client.upserts[3].vectors == [vectors[9].tolist()]
+    assert [s["points"] for s in stats] == [3, 3, 3, 1]
+    assert [s["batch"] for s in stats] == [0, 1, 2, 3]
+    assert all(s["seconds"] >= 0 for s in stats)
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_splits_by_estimated_bytes(client, monkeypatch):
+    """Test large vectors and payloads shrink batches below batch_size"""
+    monkeypatch.setattr(qdrant_service.settings, "QDRANT_MAX_BATCH_BYTES", 4096)
+    vectors = np.ones((7, 256), dtype=np.float32)
+    payloads = [{"text": "x" * 30} for _ in range(7)]
+    service = QdrantService()
+
+    # 1024 bytes of vector plus 42 bytes of payload per point
+    assert service._rows_per_batch(vectors, payloads, 100) == 3
+    stats = await service.upsert_many(
+        "text", ids=list(range(7)), vectors=vectors, payloads=payloads
+    )
+
+    assert [s["points"] for s in stats] == [3, 3, 1]
+    assert client.upserts[2].payloads == payloads[6:]
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_write_concurrency(client, monkeypatch):
+    """Test no more than QDRANT_WRITE_CONCURRENCY requests run at once"""
+    monkeypatch.setattr(qdrant_service.settings, "QDRANT_WRITE_CONCURRENCY", 2)
+    client.delay = 0.01
+
+    stats = await QdrantService().upsert_many(
+        "text", ids=list(range(6)), vectors=np.zeros((6, 2)), batch_size=1
+    )
+
+    assert len(stats) == 6
+    assert client.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_set_payload_many_groups_operations(client):
+    """Test per-point payload updates are sent as batched update requests"""
+    payloads = {i: {"rank": i} for i in range(5)}
+
+    stats = await QdrantService().set_payload_many("text", payloads, batch_size=2)
+
+    assert [s["points"] for s in stats] == [2, 2, 1]
+    first = client.updates[0][0].set_payload
+    assert first.points == [0]
+    assert first.payload == {"rank": 0}
+
+
+@pytest.mark.asyncio
+async def test_delete_by_filter_uses_filter_selector(client):
+    """Test a filter delete is one FilterSelector request without a count"""
+    query_filter = {"must": [{"key": "parent_id", "match": {"value": "doc1"}}]}
+
+    stats = await QdrantService().delete_by_filter("text", query_filter)
+
+    (selector,) = client.deletes
+    assert isinstance(selector, models.FilterSelector)
+    assert selector.filter == models.Filter(**query_filter)
+    assert stats["seconds"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_rejects_mismatched_lengths(client):
+    """Test ids, vectors and payloads must line up"""
+    with pytest.raises(QdrantException):
+        await QdrantService().upsert_many(
+            "text", ids=[1, 2], vectors=np.zeros((3, 2), dtype=np.float32)
+        )
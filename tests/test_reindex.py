@@ -0,0 +1,311 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+from fakeredis import FakeRedis
+from qdrant_client.http import models
+
+from app.core.exceptions import APIException
+from app.services import reindex_service
+from app.services.change_log import SWITCHING, ChangeLog
+from app.services.reindex_service import ReindexException, ReindexService
+
+
+class AliasClient:
+    """Minimal async client tracking collections and alias operations"""
+
+    def __init__(self, collections, aliases):
+        self.collections = collections
+        self.aliases = aliases
+        self.operations = []
+        self.timeouts = []
+
+    def with_timeout(self, timeout, retries=None):
+        self.timeouts.append((timeout, retries))
+        return self
+
+    async def get_collections(self):
+        return SimpleNamespace(
+            collections=[SimpleNamespace(name=name) for name in self.collections]
+        )
+
+    async def get_aliases(self):
+        return SimpleNamespace(
+            aliases=[
+                SimpleNamespace(alias_name=alias, collection_name=collection)
+                for alias, collection in self.aliases.items()
+            ]
+        )
+
+    async def update_collection_aliases(self, change_aliases_operations):
+        self.operations.append(change_aliases_operations)
+
+
+@pytest.mark.asyncio
+async def test_next_version_and_alias_resolution():
+    """Test the next collection version follows the highest existing one"""
+    client = AliasClient(["text_v1", "text_v2", "image_v1"], {"text": "text_v2"})
+    service = ReindexService(SimpleNamespace(client=client, change_log=None))
+
+    assert await service.resolve_alias("text") == "text_v2"
+    assert await service.resolve_alias("audio") is None
+    assert await service._next_version("text") == "text_v3"
+    assert await service._next_version("video") == "video_v1"
+
+
+@pytest.mark.asyncio
+async def test_switch_alias_is_one_update():
+    """Test the alias is moved with a delete and create in a single request"""
+    client = AliasClient(["text_v1", "text_v2"], {"text": "text_v1"})
+    service = ReindexService(SimpleNamespace(client=client, change_log=None))
+
+    await service._switch_alias("text", "text_v1", "text_v2")
+
+    assert len(client.operations) == 1
+    delete, create = client.operations[0]
+    assert isinstance(delete, models.DeleteAliasOperation)
+    assert create.create_alias.collection_name == "text_v2"
+    assert create.create_alias.alias_name == "text"
+
+
+def _point(point_id, content="text"):
+    return SimpleNamespace(
+        id=point_id, vector=[1.0, 0.0], payload={"data": {"content": content}}
+    )
+
+
+class CollectionClient(AliasClient):
+    """In-memory collections of points, enough for a full reindex"""
+
+    def __init__(self, points, on_scroll=None):
+        super().__init__({"text_v1": dict(points)}, {"text": "text_v1"})
+        self.on_scroll = on_scroll
+        self.count_offset = 0
+        self.recovered = []
+
+    async def get_collection(self, name):
+        return SimpleNamespace(
+            config=SimpleNamespace(
+                params=SimpleNamespace(
+                    vectors=models.VectorParams(
+                        size=2, distance=models.Distance.COSINE
+                    )
+                ),
+                hnsw_config=models.HnswConfigDiff(m=16),
+            )
+        )
+
+    async def create_collection(self, collection_name, **kwargs):
+        self.collections[collection_name] = {}
+
+    async def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    async def recover_snapshot(self, collection_name, location):
+        self.recovered.append((collection_name, location))
+        self.collections[collection_name] = {}
+
+    async def update_collection_aliases(self, change_aliases_operations):
+        await super().update_collection_aliases(change_aliases_operations)
+        for operation in change_aliases_operations:
+            if isinstance(operation, models.CreateAliasOperation):
+                alias = operation.create_alias
+                self.aliases[alias.alias_name] = alias.collection_name
+
+    async def scroll(self, collection_name, limit, offset=None, **kwargs):
+        ids = sorted(self.collections[collection_name])
+        start = offset or 0
+        page = [self.collections[collection_name][i] for i in ids[start:][:limit]]
+        if self.on_scroll is not None:
+            on_scroll, self.on_scroll = self.on_scroll, None
+            await on_scroll(self.collections[collection_name])
+        next_offset = start + limit if start + limit < len(ids) else None
+        return page, next_offset
+
+    async def retrieve(self, collection_name, ids, **kwargs):
+        points = self.collections[collection_name]
+        return [points[i] for i in ids if i in points]
+
+    async def upsert(self, collection_name, points):
+        for point_id, vector, payload in zip(
+            points.ids, points.vectors, points.payloads
+        ):
+            self.collections[collection_name][point_id] = SimpleNamespace(
+                id=point_id, vector=vector, payload=payload
+            )
+
+    async def delete(self, collection_name, points_selector):
+        for point_id in points_selector.points:
+            self.collections[collection_name].pop(point_id, None)
+
+    async def count(self, collection_name, exact=True):
+        count = len(self.collections[collection_name])
+        if collection_name != "text_v1":
+            count += self.count_offset
+        return SimpleNamespace(count=count)
+
+    async def search_batch(self, collection_name, requests):
+        return [[SimpleNamespace(id=1)] for _ in requests]
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+def _service(client, redis_client=None):
+    changes = ChangeLog(redis_client or FakeRedis(), poll_seconds=0)
+    handler = SimpleNamespace(
+        client=client,
+        change_log=changes,
+        payload_indexes={},
+        _migrate_payload_indexes=_noop,
+    )
+    return ReindexService(handler)
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(reindex_service.settings, "REINDEX_BATCH_SIZE", 2)
+    monkeypatch.setattr(reindex_service.settings, "REINDEX_MAX_POINTS_PER_SECOND", 0)
+
+
+@pytest.mark.asyncio
+async def test_reindex_copies_points_and_switches_alias(small_batches):
+    """Test every point is copied to the next version and the alias moved"""
+    client = CollectionClient({i: _point(i) for i in range(5)})
+    service = _service(client)
+
+    report = await service.reindex("text")
+
+    assert report["target"] == "text_v2"
+    assert report["points"] == 5
+    assert sorted(client.collections["text_v2"]) == list(range(5))
+    assert client.aliases["text"] == "text_v2"
+    assert service.changes.acquire("text")
+
+
+@pytest.mark.asyncio
+async def test_reindex_replays_writes_made_during_copy(small_batches):
+    """Test upserts and deletes logged while copying reach the new version"""
+    service = None
+
+    async def write(points):
+        points[1] = _point(1, "updated")
+        points[9] = _point(9, "added")
+        points.pop(4)
+        await service.changes.record("text", {"op": "upsert", "ids": [1, 9, 4]})
+
+    client = CollectionClient({i: _point(i) for i in range(5)}, on_scroll=write)
+    service = _service(client)
+
+    report = await service.reindex("text")
+
+    target = client.collections["text_v2"]
+    assert report["replayed"] == 1
+    assert sorted(target) == [0, 1, 2, 3, 9]
+    assert target[1].payload["data"]["content"] == "updated"
+
+
+@pytest.mark.asyncio
+async def test_reindex_count_mismatch_rolls_back(small_batches):
+    """Test a failed verification drops the new version and frees the alias"""
+    client = CollectionClient({i: _point(i) for i in range(3)})
+    client.count_offset = 1
+    service = _service(client)
+
+    with pytest.raises(ReindexException, match="count mismatch"):
+        await service.reindex("text")
+
+    assert "text_v2" not in client.collections
+    assert client.aliases["text"] == "text_v1"
+    assert service.changes.acquire("text")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reindex_of_alias_rejected():
+    """Test a second reindex of an alias fails while the first holds it"""
+    redis_client = FakeRedis()
+    client = CollectionClient({1: _point(1)})
+    other = _service(client, redis_client)
+    assert other.changes.acquire("text")
+    service = _service(client, redis_client)
+
+    with pytest.raises(ReindexException, match="already running"):
+        await service.reindex("text")
+    assert "text_v2" not in client.collections
+
+    service.start("text")
+    with pytest.raises(ReindexException, match="already running"):
+        service.start("text")
+
+
+@pytest.mark.asyncio
+async def test_writes_held_while_alias_switches():
+    """Test writers give up with 503 if the switch outlasts the pause"""
+    changes = ChangeLog(FakeRedis(), poll_seconds=0, max_pause_seconds=0)
+    assert changes.acquire("text")
+    await changes.record("text", {"op": "upsert", "ids": [1]})
+    changes.refresh("text", SWITCHING)
+
+    with pytest.raises(APIException) as error:
+        await changes.record("text", {"op": "upsert", "ids": [2]})
+
+    assert error.value.status_code == 503
+    assert changes.pop("text", 10) == [{"op": "upsert", "ids": [1]}]
+
+
+@pytest.mark.asyncio
+async def test_restore_into_new_version():
+    """Test a snapshot is recovered beside the current version, then switched"""
+    client = CollectionClient({1: _point(1)})
+    service = _service(client)
+
+    target = await service.restore("text", "http://snapshots/text.snapshot")
+
+    assert target == "text_v2"
+    assert client.recovered == [("text_v2", "http://snapshots/text.snapshot")]
+    assert client.aliases["text"] == "text_v2"
+    assert "text_v1" in client.collections
+    # Recovery outlasts the default deadline and must not be started twice
+    assert (reindex_service.settings.QDRANT_ADMIN_TIMEOUT, 0) in client.timeouts
+
+
+@pytest.mark.asyncio
+async def test_reembed_rejected_for_media_collections():
+    """Test media points, which keep no source, cannot be re-embedded"""
+    client = CollectionClient({1: _point(1)})
+    service = _service(client)
+
+    with pytest.raises(ReindexException, match="re-ingest"):
+        await service.reindex("image", reembed=True)
+
+    assert service.changes.acquire("image")
+
+
+@pytest.mark.asyncio
+async def test_reindex_text_with_reembed(small_batches):
+    """Test text points are re-encoded from their content when reembedding"""
+    client = CollectionClient({i: _point(i, f"chunk {i}") for i in range(3)})
+    service = _service(client)
+    encoded = []
+
+    async def vectorize(modality, sources):
+        encoded.append((modality, list(sources)))
+        return [[0.0, 1.0] for _ in sources]
+
+    service.handler.vectorize = vectorize
+
+    report = await service.reindex("text", reembed=True)
+
+    assert report["points"] == 3
+    assert encoded == [("text", ["chunk 0", "chunk 1"]), ("text", ["chunk 2"])]
+    assert all(
+        point.vector == [0.0, 1.0] for point in client.collections["text_v2"].values()
+    )
+    assert client.aliases["text"] == "text_v2"
@@ -7,22 +7,47 @@ project_root = str(Path(__file__).parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from types import SimpleNamespace
+
 import pytest
+from fakeredis import FakeRedis
+from fastapi import HTTPException
+from qdrant_client.http import models
 
+from app.core.cache import RedisCache
+from app.api.v1.endpoints import semantic_search
+from app.core.exceptions import APIException
 from app.services.qdrant_handler import QdrantHandler
+from app.services.query_planner import QueryPlanner, build_search_params
+from app.services.semantic_search_service import (
+    SemanticSearchService,
+    get_semantic_search_service,
+)
 from tests.test_config import MockQdrantClient
 
 
 @pytest.fixture
-def mock_qdrant_handler(monkeypatch):
+def mock_qdrant_handler():
     """Mock QdrantHandler for testing"""
-    def mock_init(self, qdrant_url="http://localhost:6333"):
-        self.client = MockQdrantClient()
-        self._initialize_models()
-        self._create_collections()
-    
-    monkeypatch.setattr(QdrantHandler, "__init__", mock_init)
-    return QdrantHandler()
+    return QdrantHandler(client=MockQdrantClient())
+
+
+class RecordingHandler:
+    """QdrantHandler double recording upserted ids and delete filters"""
+
+    def __init__(self, tokenizer):
+        self.text_tokenizer = tokenizer
+        self.upserts = []
+        self.deletes = []
+
+    async def vectorize_texts(self, texts):
+        return [[0.0]] * len(texts)
+
+    async def upsert_points(self, collection_name, ids, vectors, payloads):
+        self.upserts.append(ids)
+
+    async def delete_by_filter(self, collection_name, filter):
+        self.deletes.append(filter)
 
 
 @pytest.mark.asyncio
@@ -113,3 +138,239 @@ async def test_semantic_search_with_filter(mock_qdrant_handler):
     assert len(results) == 1
     assert results[0]["data"]["id"] == "test1"
     assert results[0]["metadata"]["category"] == "tech"
+
+
+@pytest.mark.asyncio
+async def test_text_vectors_are_normalized_and_padding_invariant(mock_qdrant_handler):
+    """Test batched text vectors are unit length and unaffected by padding"""
+    texts = ["short", "a much longer sentence that forces padding in the batch"]
+
+    batched = await mock_qdrant_handler.vectorize_texts(texts)
+    single = await mock_qdrant_handler.vectorize_text(texts[0])
+
+    for vector in batched:
+        assert sum(v * v for v in vector) == pytest.approx(1.0, abs=1e-5)
+    assert batched[0] == pytest.approx(single, abs=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_query_planner_uses_exact_search_for_selective_filters(
+    mock_qdrant_handler,
+):
+    """Test selective filters are planned as exact search"""
+    planner = mock_qdrant_handler.planner
+    query_filter = {"must": [{"key": "metadata.category", "match": {"value": "tech"}}]}
+
+    assert await planner.plan("text", None) is None
+    assert (await planner.plan("text", query_filter)).exact is True
+
+    planner.exact_search_threshold = -1
+    planner._cardinalities.clear()
+    assert await planner.plan("text", query_filter) is None
+
+
+class CountingClient:
+    """Qdrant client double counting count requests"""
+
+    def __init__(self):
+        self.counts = 0
+
+    async def count(self, collection_name, count_filter, exact):
+        self.counts += 1
+        return SimpleNamespace(count=5)
+
+
+@pytest.mark.asyncio
+async def test_cardinality_cache_is_bounded():
+    """Test the planner evicts least recently used filters past its size"""
+    client = CountingClient()
+    planner = QueryPlanner(client, cache_size=2)
+    filters = [
+        {"must": [{"key": "parent_id", "match": {"value": str(i)}}]} for i in range(3)
+    ]
+
+    for query_filter in filters:
+        await planner.estimate_cardinality("text", query_filter)
+    await planner.estimate_cardinality("text", filters[2])
+
+    assert len(planner._cardinalities) == 2
+    assert client.counts == 3
+    await planner.estimate_cardinality("text", filters[0])
+    assert client.counts == 4
+
+
+class SchemaClient:
+    """Qdrant client double with existing payload indexes"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.dropped = []
+        self.created = []
+
+    async def get_collection(self, collection_name):
+        return SimpleNamespace(payload_schema=self.schema)
+
+    async def delete_payload_index(self, collection_name, field_name):
+        self.dropped.append(field_name)
+
+    async def create_payload_index(self, collection_name, field_name, field_schema):
+        self.created.append(field_name)
+
+
+@pytest.mark.asyncio
+async def test_payload_index_migration_only_drops_retired_indexes():
+    """Test undeclared indexes survive unless explicitly retired"""
+    keyword = SimpleNamespace(data_type=models.PayloadSchemaType.KEYWORD)
+    client = SchemaClient({"by_hand": keyword, "old_field": keyword})
+    handler = QdrantHandler(client=client)
+
+    await handler._migrate_payload_indexes(
+        "text", {"parent_id": "keyword"}, retired=["old_field"]
+    )
+
+    assert client.dropped == ["old_field"]
+    assert client.created == ["parent_id"]
+
+
+def test_build_search_params():
+    """Test request search options map onto Qdrant search params"""
+    assert build_search_params({"hnsw_ef": None, "exact": None}) is None
+
+    params = build_search_params({"hnsw_ef": 32, "rescore": True, "oversampling": 2.0})
+    assert params.hnsw_ef == 32
+    assert params.exact is False
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 2.0
+
+    assert build_search_params({"exact": True}).exact is True
+
+
+@pytest.mark.asyncio
+async def test_reindexing_is_deterministic_and_drops_stale_chunks(
+    mock_qdrant_handler,
+):
+    """Test documents without ids keep their point ids and lose extra chunks"""
+    service = SemanticSearchService()
+    service.cache = RedisCache(FakeRedis())
+    service._handler = RecordingHandler(mock_qdrant_handler.text_tokenizer)
+    document = {"content": "A short document without an id."}
+
+    first = await service.index_documents([document])
+    second = await service.index_documents([dict(document)])
+
+    assert first[0]["id"] == second[0]["id"]
+    assert service._handler.upserts[0] == service._handler.upserts[1]
+    stale = service._handler.deletes[-1]["should"][0]["must"]
+    assert stale[0] == {"key": "parent_id", "match": {"value": first[0]["id"]}}
+    assert stale[1] == {"key": "chunk_index", "range": {"gte": 1}}
+
+
+@pytest.mark.asyncio
+async def test_cached_candidates_retired_by_indexing():
+    """Test paging reuses cached candidates until the collection changes"""
+    service = SemanticSearchService()
+    service.cache = RedisCache(FakeRedis())
+    calls = []
+
+    async def rank(query, collection, limit, *args):
+        calls.append(limit)
+        return [
+            {"id": str(i), "score": 1.0, "content": {}, "metadata": {}}
+            for i in range(limit)
+        ]
+
+    service._rank = rank
+    first = await service.search("query", top_k=2)
+    await service.search("query", top_k=2, cursor=first["next_cursor"])
+    assert len(calls) == 1
+
+    await service._invalidate("text")
+    with pytest.raises(APIException):
+        await service.search("query", top_k=2, cursor=first["next_cursor"])
+    await service.search("query", top_k=2)
+    assert len(calls) == 2
+
+
+def test_negative_cursor_offset_rejected():
+    """Test a cursor cannot page from the end of the candidates"""
+    cursor = SemanticSearchService._encode_cursor("key", -5)
+
+    with pytest.raises(APIException) as error:
+        SemanticSearchService._decode_cursor(cursor, "key")
+    assert error.value.status_code == 400
+
+
+def test_endpoints_share_one_search_service():
+    """Test the search, OCR and transcription routes use the same service"""
+    from app.api.v1.endpoints import ocr, semantic_search, transcription
+
+    service = get_semantic_search_service()
+
+    assert service is get_semantic_search_service()
+    assert semantic_search.semantic_search_service is service
+    assert ocr.semantic_search_service is service
+    assert transcription.semantic_search_service is service
+
+
+@pytest.fixture
+def endpoint_service(monkeypatch):
+    """Search service behind the semantic search routes, with a fake cache"""
+    service = SemanticSearchService()
+    service.cache = RedisCache(FakeRedis())
+    monkeypatch.setattr(semantic_search, "semantic_search_service", service)
+    return service
+
+
+async def _search_status(collection=None, **query) -> int:
+    """Status code /search responds with for a query"""
+    with pytest.raises(HTTPException) as error:
+        await semantic_search.semantic_search(
+            semantic_search.SearchQuery(query="query", **query), collection=collection
+        )
+    return error.value.status_code
+
+
+@pytest.mark.asyncio
+async def test_search_client_errors_are_400(endpoint_service):
+    """Test bad cursors and paging past the candidates reach /search as 400"""
+    cursor = SemanticSearchService._encode_cursor("other query", 2)
+
+    assert await _search_status(cursor="not a cursor") == 400
+    assert await _search_status(cursor=cursor) == 400
+    assert await _search_status(offset=10**6) == 400
+
+    with pytest.raises(HTTPException) as error:
+        await semantic_search.batch_semantic_search(
+            semantic_search.BatchSearchRequest(
+                queries=[semantic_search.SearchQuery(query="query", cursor=cursor)]
+            ),
+            collection=None,
+        )
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_mode_errors_reach_clients(endpoint_service):
+    """Test unknown modes and unavailable lexical search keep their status"""
+    assert await _search_status(mode="fuzzy") == 400
+    assert await _search_status(collection="image", mode="lexical") == 400
+    # The text index was never built, so lexical search is still unavailable
+    assert await _search_status(mode="hybrid") == 503
+
+
+@pytest.mark.asyncio
+async def test_unknown_search_profile_is_400(endpoint_service):
+    """Test a profile missing from SEARCH_PROFILES reaches /search as 400"""
+    assert await _search_status(profile="turbo") == 400
+
+
+@pytest.mark.asyncio
+async def test_index_document_without_content_is_400(endpoint_service):
+    """Test /index rejects a document with no text as 400"""
+    endpoint_service._handler = RecordingHandler(tokenizer=None)
+
+    with pytest.raises(HTTPException) as error:
+        await semantic_search.index_document({"id": "empty"}, collection=None)
+
+    assert error.value.status_code == 400
+    assert endpoint_service._handler.upserts == []
@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+from fakeredis import FakeRedis
+
+from app.core.cache import RedisCache
+from app.services.table_extraction import LayoutCache, extract_tables, merge_intervals
+
+
+def word(text, x, y, width=40, height=10):
+    """A word annotation at (x, y)"""
+    vertices = [
+        {"x": x, "y": y},
+        {"x": x + width, "y": y},
+        {"x": x + width, "y": y + height},
+        {"x": x, "y": y + height},
+    ]
+    return {
+        "description": text,
+        "boundingPoly": {"vertices": vertices},
+        "confidence": 0.9,
+    }
+
+
+def test_merge_intervals_respects_groups():
+    """Test overlapping intervals merge, but never across groups"""
+    starts = np.array([0.0, 5.0, 20.0, 6.0])
+    ends = np.array([10.0, 12.0, 30.0, 8.0])
+
+    labels, band_starts, band_ends = merge_intervals(starts, ends)
+    assert labels.tolist() == [0, 0, 1, 0]
+    assert band_starts.tolist() == [0.0, 20.0]
+    assert band_ends.tolist() == [12.0, 30.0]
+
+    labels, _, _ = merge_intervals(starts, ends, groups=np.array([0, 0, 0, 1]))
+    assert labels.tolist() == [0, 0, 1, 2]
+
+
+def test_extract_table_between_prose():
+    """Test a grid of words becomes a table and surrounding prose is ignored"""
+    words = [word("Quarterly", 0, 0), word("report", 45, 0)]
+    for row, y in enumerate([30, 45, 60]):
+        words.append(word(f"name{row}", 0, y))
+        words.append(word(f"qty{row}", 200, y))
+        # A two-word cell
+        words.append(word("unit", 400, y))
+        words.append(word(f"price{row}", 445, y))
+    words += [word("Totals", 0, 120), word("follow", 45, 120)]
+
+    tables = extract_tables(words)
+
+    assert len(tables) == 1
+    table = tables[0]
+    assert (table["rows"], table["columns"]) == (3, 3)
+    cells = {(c["rowIndex"], c["columnIndex"]): c["text"] for c in table["cells"]}
+    assert cells[(0, 0)] == "name0"
+    assert cells[(2, 1)] == "qty2"
+    assert cells[(1, 2)] == "unit price1"
+
+
+@pytest.mark.asyncio
+async def test_layout_cache_reuses_ocr():
+    """Test a second request, now with tables, does not run OCR again"""
+    layout = LayoutCache(RedisCache(FakeRedis()))
+    key = LayoutCache.page_key(b"page image")
+    calls = []
+
+    async def recognize():
+        calls.append(1)
+        return [
+            word("a", 0, 0),
+            word("b", 200, 0),
+            word("c", 0, 15),
+            word("d", 200, 15),
+        ]
+
+    words = await layout.words(key, recognize)
+    tables = await layout.tables(key, recognize)
+
+    assert len(calls) == 1
+    assert len(words) == 4
+    assert tables[0]["rows"] == 2
+
+
+def test_layout_key_depends_on_ocr_options():
+    """Test pages read with different OCR options are cached apart"""
+    options = {"languageHints": ["en"], "scale": 1.0, "deskew": True}
+
+    key = LayoutCache.page_key(b"page image", 0, options)
+
+    assert key == LayoutCache.page_key(b"page image", 0, dict(options))
+    assert key != LayoutCache.page_key(b"page image", 0, {**options, "deskew": False})
+    assert key != LayoutCache.page_key(
+        b"page image", 0, {**options, "languageHints": ["de"]}
+    )
+    assert key != LayoutCache.page_key(b"page image", 1, options)
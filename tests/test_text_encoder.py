@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pytest
+
+from app.services.text_encoder import TextEncoder, plan_token_batches
+
+SAMPLE_TEXTS = [
+    "What are the side effects of the new COVID-19 vaccine?",
+    "Invoice 4471-B",
+    "The quick brown fox jumps over the lazy dog near the riverbank at dawn.",
+]
+
+
+@pytest.fixture(scope="module")
+def reference_vectors():
+    """Vectors from the float32 eager reference backend"""
+    return TextEncoder(backend="eager").encode(SAMPLE_TEXTS)
+
+
+@pytest.mark.parametrize(
+    "backend,min_cosine",
+    [("torchscript", 0.9999), ("quantized", 0.98), ("onnx", 0.9999)],
+)
+def test_backend_parity(backend, min_cosine, reference_vectors, tmp_path):
+    """Test each backend stays within a cosine drift bound of the reference"""
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+
+    encoder = TextEncoder(backend=backend, onnx_path=str(tmp_path / "encoder.onnx"))
+    vectors = encoder.encode(SAMPLE_TEXTS)
+
+    assert vectors.shape == reference_vectors.shape
+    cosine = np.sum(vectors * reference_vectors, axis=1)
+    assert np.all(cosine >= min_cosine)
+
+
+def test_unknown_backend():
+    """Test an unknown backend is rejected"""
+    with pytest.raises(ValueError):
+        TextEncoder(backend="tensorrt")
+
+
+def test_plan_token_batches_respects_budget_and_covers_inputs():
+    """Test batches stay within the token budget and cover every input once"""
+    lengths = [200, 5, 7, 180, 6, 250, 8]
+
+    batches = plan_token_batches(lengths, token_budget=400, max_batch_size=8)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        padded = max(lengths[i] for i in batch) * len(batch)
+        assert padded <= 400 or len(batch) == 1
+    # Short inputs are bucketed together rather than padded to the long ones
+    assert sorted(batches[0]) == [1, 2, 4, 6]
+
+
+def test_encode_preserves_input_order(reference_vectors):
+    """Test bucketed encoding returns vectors in the original order"""
+    encoder = TextEncoder(backend="eager", token_budget=16)
+
+    vectors = encoder.encode(SAMPLE_TEXTS)
+
+    assert np.allclose(vectors, reference_vectors, atol=1e-5)
+
+
+def test_onnx_reuses_export_without_loading_torch_model(tmp_path, monkeypatch):
+    """Test an existing ONNX export in the model dir skips the PyTorch weights"""
+    pytest.importorskip("onnxruntime")
+    TextEncoder(backend="onnx", model_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("*.onnx"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("PyTorch model loaded")
+
+    monkeypatch.setattr("app.services.text_encoder.AutoModel.from_pretrained", fail)
+    encoder = TextEncoder(backend="onnx", model_dir=str(tmp_path))
+
+    assert encoder.encode(SAMPLE_TEXTS[:1]).shape == (1, encoder.dimension)
@@ -0,0 +1,141 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.model_registry import ModelRegistry
+from app.services.qdrant_handler import QdrantHandler
+from app.services.video_ingest import (
+    Shot,
+    VideoEmbedding,
+    VideoIngest,
+    iter_keyframes,
+    pool,
+    shot_points,
+)
+
+COLORS = [(0, 0, 255), (0, 255, 0), (255, 0, 0)]
+
+
+def _video(path: Path, seconds_per_color: int = 2, fps: int = 10) -> Path:
+    """An MJPG clip of solid color shots, one per entry of COLORS"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for color in COLORS:
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:] = color
+        for _ in range(seconds_per_color * fps):
+            writer.write(frame)
+    writer.release()
+    return path
+
+
+def _mean_color(frames: np.ndarray) -> np.ndarray:
+    return frames.mean(axis=(1, 2))
+
+
+def test_iter_keyframes_finds_scene_changes(tmp_path):
+    """Test one keyframe per shot, plus gap keyframes in long shots"""
+    path = _video(tmp_path / "clip.avi")
+
+    keyframes = list(iter_keyframes(str(path), sample_fps=2, max_gap=100))
+    assert [k.shot for k in keyframes] == [0, 1, 2]
+    assert [k.timestamp for k in keyframes] == pytest.approx([0.0, 2.0, 4.0])
+    assert keyframes[0].image.shape == (224, 224, 3)
+
+    keyframes = list(iter_keyframes(str(path), sample_fps=2, max_gap=1.0))
+    assert [k.shot for k in keyframes] == [0, 0, 1, 1, 2, 2]
+
+
+def test_pool_weights_unit_vectors():
+    """Test pooling normalizes inputs so magnitude does not dominate"""
+    vectors = np.array([[10.0, 0.0], [0.0, 1.0]])
+
+    assert pool(vectors).tolist() == pytest.approx([0.7071, 0.7071], 1e-3)
+    assert pool(vectors, np.array([3.0, 1.0]))[0] > 0.9
+
+
+@pytest.mark.asyncio
+async def test_process_pools_shots_in_batches(tmp_path):
+    """Test keyframes are embedded in batches and pooled per shot"""
+    data = _video(tmp_path / "clip.avi").read_bytes()
+    batches = []
+
+    def embed(frames):
+        batches.append(len(frames))
+        return _mean_color(frames)
+
+    ingest = VideoIngest(embed, sample_fps=2, max_keyframe_gap=1.0, batch_size=4)
+    video = await ingest.process(data, video_format="avi")
+
+    assert batches == [4, 2]
+    assert [(s.start, s.end) for s in video.shots] == pytest.approx(
+        [(0.0, 2.0), (2.0, 4.0), (4.0, 6.0)]
+    )
+    # Frames are RGB, so the red BGR shot dominates the first channel
+    assert int(np.argmax(video.shots[0].vector)) == 0
+    assert video.duration == pytest.approx(6.0)
+    assert np.linalg.norm(video.vector) == pytest.approx(1.0, 1e-5)
+
+
+def test_shot_points_link_shots_to_video():
+    """Test shot payloads carry time ranges and the parent video id"""
+    video = VideoEmbedding(
+        duration=4.0,
+        shots=[Shot(0, 0.0, 4.0, [0.0], np.array([1.0, 0.0]))],
+        vector=np.array([1.0, 0.0]),
+    )
+    points = shot_points("vid-1", video, {"source": "upload"})
+
+    assert len(set(points["ids"])) == 2
+    assert points["payloads"][0]["kind"] == "video"
+    assert points["payloads"][0]["parent_id"] == "vid-1"
+    assert points["payloads"][1]["parent_id"] == "vid-1"
+    assert points["payloads"][1]["data"]["end_time"] == 4.0
+
+
+class VideoClient:
+    """Records upserts and deletes"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def upsert(self, collection_name, points):
+        self.calls.append(("upsert", points))
+
+    async def delete(self, collection_name, points_selector):
+        self.calls.append(("delete", points_selector))
+
+
+@pytest.mark.asyncio
+async def test_reindexing_video_drops_stale_shots():
+    """Test shots the new indexing no longer produces are deleted afterwards"""
+    video = VideoEmbedding(
+        duration=4.0,
+        shots=[Shot(0, 0.0, 4.0, [0.0], np.array([1.0, 0.0]))],
+        vector=np.array([1.0, 0.0]),
+    )
+
+    async def process(data, video_format):
+        return video
+
+    client = VideoClient()
+    handler = QdrantHandler(
+        client=client,
+        registry=ModelRegistry(),
+        video_ingest=SimpleNamespace(process=process),
+    )
+
+    await handler.index_video("vid-1", b"video")
+
+    (upsert, points), (delete, selector) = client.calls
+    assert (upsert, delete) == ("upsert", "delete")
+    assert selector.filter.must[0].match.value == "vid-1"
+    assert selector.filter.must_not[0].has_id == [point.id for point in points]